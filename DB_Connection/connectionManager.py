@@ -0,0 +1,196 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from Logging.logging import Logger
+
+
+class connectionManager:
+
+    """
+    Description: This class is used to manage the connections of a pipeline run with a sqlite3 database. The run gets
+    a single connection, opened when it is first needed and reused by all its database operations, and a single read
+    connection for the queries which read the staged data back. The pragmas (write ahead log, relaxed synchronous mode,
+    page cache and busy timeout) are set in one place for both the connections, and the connections are closed together
+    when the run ends, the manager being usable as a context manager.
+
+    Written By: Shivam Shinde
+
+    Version: 1.0
+
+    Revision: None
+    """
+
+    def __init__(self, database_path, file_object, busy_timeout=30.0):
+        self.databasePath = database_path
+        self.file_object = file_object
+        self.logger = Logger()
+        self.busyTimeout = busy_timeout
+
+        # connection of the run, opened lazily and lent to one thread at a time
+        self.conn = None
+        self.lock = threading.RLock()
+
+        # read connection of the run, opened lazily as well, it has a lock of its own so that a read is not blocked
+        # by a transaction of the run
+        self.readConn = None
+        self.readLock = threading.Lock()
+        self.closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def openConnection(self, query_only=False):
+
+        """
+        Description: This method is used to open a connection with the database and to set its pragmas. The staged data
+        can always be inserted again from the client files, so the synchronous mode is relaxed under the write ahead
+        log, which also lets the readers run while a file is being inserted. A busy connection waits for the busy
+        timeout instead of failing at once. The read connections are opened in the query only mode.
+
+        On Failure: Raises exception
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :param query_only: Whether the connection is only used to read the database
+
+        :return: Database connector
+        """
+
+        directory = os.path.dirname(self.databasePath)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        conn = sqlite3.connect(self.databasePath, timeout=self.busyTimeout, check_same_thread=False)
+        try:
+            conn.execute(f"PRAGMA busy_timeout={int(self.busyTimeout * 1000)}")
+            conn.execute("PRAGMA cache_size=-65536")
+            if query_only:
+                # the journal mode is kept in the database, so the readers don't wait for a lock to set it again
+                conn.execute("PRAGMA query_only=ON")
+            else:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+            return conn
+
+        except Exception as e:
+            conn.close()
+            raise e
+
+    @contextmanager
+    def connection(self):
+
+        """
+        Description: This method is used to lend the connection of the run, opening it the first time. The open
+        transaction is rolled back if the code run inside it fails, the connection itself stays open for the next
+        operations of the run.
+
+        On Failure: Raises exception
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+        """
+
+        with self.lock:
+            if self.closed:
+                raise sqlite3.ProgrammingError(f"Connections with the database {self.databasePath} are closed")
+            if self.conn is None:
+                self.conn = self.openConnection()
+                self.logger.log(self.file_object, f"Connection with the database "
+                                                  f"{os.path.basename(self.databasePath)} made")
+            try:
+                yield self.conn
+            except BaseException:
+                self.conn.rollback()
+                raise
+
+    @contextmanager
+    def transaction(self):
+
+        """
+        Description: This method is used to run the code inside it in a transaction on the connection of the run, which
+        is committed when the code finishes and rolled back when it fails.
+
+        On Failure: Raises exception
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+        """
+
+        with self.connection() as conn:
+            yield conn
+            conn.commit()
+
+    @contextmanager
+    def reader(self):
+
+        """
+        Description: This method is used to lend the read connection of the run, opening it the first time. The
+        connection can only read the database and stays open for the next reads of the run.
+
+        On Failure: Raises exception
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+        """
+
+        with self.readLock:
+            if self.closed:
+                raise sqlite3.ProgrammingError(f"Connections with the database {self.databasePath} are closed")
+            if self.readConn is None:
+                self.readConn = self.openConnection(query_only=True)
+            try:
+                yield self.readConn
+            finally:
+                # ending the read transaction begun by the caller so that the connection doesn't keep an old snapshot
+                # of the database, a query only connection has no changes to roll back
+                if self.readConn.in_transaction:
+                    self.readConn.rollback()
+
+    def close(self):
+
+        """
+        Description: This method is used to close the connection of the run and its read connection. Uncommitted
+        changes are rolled back.
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :return: None
+        """
+
+        with self.lock, self.readLock:
+            if self.closed:
+                return
+            self.closed = True
+            for conn in [self.conn, self.readConn]:
+                if conn is None:
+                    continue
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+            self.conn = None
+            self.readConn = None
+            self.logger.log(self.file_object, f"Connections with the database "
+                                              f"{os.path.basename(self.databasePath)} closed")
@@ -1,15 +1,22 @@
 import csv
 import os
-import shutil
-import sqlite3
 
+import numpy as np
+import pandas as pd
+
+from DB_Connection.connectionManager import connectionManager
 from Logging.logging import Logger
+from Prediction_Workspace.predictionWorkspace import predictionWorkspace
+from Raw_Data_Validation.dataFiles import compressionOf
+from Raw_Data_Validation.derivedColumns import deriveColumns
+from Raw_Data_Validation.schemaValidator import compileSchema
 
 
 class DBOperationsPrediction:
     
     """
-    Description: This class contains the methods that deal with the database operations.
+    Description: This class contains the methods that deal with the database operations. An object of the class is
+    used for a single prediction run, all its operations share the connections of the run which are closed by close().
 
     Written By: Shivam Shinde
 
@@ -19,16 +26,27 @@ class DBOperationsPrediction:
     
     """
     
-    def __init__(self):
-        self.path = "Database/"
-        self.goodDataPath = "Prediction_raw_data_validated/GoodData/"
-        self.badDataPath = "Prediction_raw_data_validated/BadData/"
+    def __init__(self, workspace=None):
+        self.workspace = workspace if workspace is not None else predictionWorkspace()
+        self.path = self.workspace.databasePath
         self.logger = Logger()
+        self.schema = compileSchema("Prediction_Schema_json_file/schema_prediction.json")
+
+        # connection managers of the databases used by the run and the log file shared by all the operations
+        self.connections = dict()
+        self.file_object = open('PredictionLogs/DatabaseLogs.txt', 'a+')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
     def dbConnection(self,databaseName='goodRawDataDbPrediction'):
 
         """
-        Description: This method is used to create a connection with the sqlite3 database
+        Description: This method is used to get the connection manager of the sqlite3 database, which is created once
+        for the run. The connection itself is opened when the first operation needs it.
 
         On Failure: Raises exception
 
@@ -38,29 +56,48 @@ class DBOperationsPrediction:
 
         Revision: None
 
-        :return: Databases connector
+        :return: Connection manager of the database
 
         """
 
-        f = open('PredictionLogs/DatabaseLogs.txt','a+')
         try:
-            if not os.path.isdir(self.path):
-                os.makedirs(self.path)
-            conn = sqlite3.connect(self.path+databaseName+'.db')
-            self.logger.log(f,f"Connection with the database {databaseName} made")
-            f.close()
-            return conn
-
-        except ConnectionError as ce:
-            self.logger.log(f,f"Connection error occurred while creating a connection to the database. Error: {str(ce)}")
-            f.close()
-            raise ce
+            if databaseName not in self.connections:
+                self.connections[databaseName] = connectionManager(self.path+databaseName+'.db', self.file_object)
+            return self.connections[databaseName]
+
+        except Exception as e:
+            self.logger.log(self.file_object,f"Connection error occurred while creating a connection to the database. Error: {str(e)}")
+            raise e
+
+    def close(self):
+
+        """
+        Description: This method is used to close the connections of the run with all the databases and the log file.
+        The connections must be closed before the workspace of the run is removed.
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :return: None
+
+        """
+
+        for connections in self.connections.values():
+            connections.close()
+        self.connections = dict()
+        if not self.file_object.closed:
+            self.file_object.close()
 
     def createTableIntoDb(self,columnNamesDict,databaseName='goodRawDataDbPrediction'):
 
         """
 
-        Description: This method is used create a table in the existing database
+        Description: This method is used create a table in the existing database. The table has the columns of the
+        schema followed by its derived columns, the derived columns missing from a table created by an older run are
+        added to it.
 
         Written By: Shivam Shinde
 
@@ -78,49 +115,179 @@ class DBOperationsPrediction:
 
         """
 
-        conn = self.dbConnection(databaseName)
-        cursor = conn.cursor()
+        try:
+            with self.dbConnection(databaseName).transaction() as conn:
+                cursor = conn.cursor()
+
+                # sqlite runs the ALTER TABLE statements outside of any transaction unless one is begun explicitly, so
+                # the added columns are committed or rolled back along with the removal of the rows of the previous run
+                if not conn.in_transaction:
+                    cursor.execute("BEGIN")
+                cursor.execute(''' SELECT count(name) FROM sqlite_master WHERE type='table' AND name='goodRawDataPrediction' ''')
+
+                columnNamesDict = {**columnNamesDict, **self.schema.derivedColumns}
+                if cursor.fetchone()[0] == 1:
+                    # removing the rows of the previous prediction run so that they are not predicted again
+                    cursor.execute("DELETE FROM goodRawDataPrediction")
+
+                    # adding the derived columns missing from a table created by an older run
+                    existing = [row[1] for row in cursor.execute("PRAGMA table_info(goodRawDataPrediction)").fetchall()]
+                    for key in columnNamesDict.keys():
+                        if key not in existing:
+                            cursor.execute(f"ALTER TABLE goodRawDataPrediction ADD {key} {columnNamesDict[key]}")
+                    self.logger.log(self.file_object, "Table named goodRawDataPrediction created in the database goodRawDataDbPrediction")
+
+                else:
+                    for key in columnNamesDict.keys():
+                        datatype = columnNamesDict[key]
+
+                        ## Here in try block we check if the table is existed or not and if it is then add the columns to it
+                        ## In catch block, we will create a table
+                        try:
+                            command = f"""ALTER TABLE goodRawDataPrediction ADD {key} {datatype}"""
+                            cursor.execute(command)
+                        except:
+                            command = f"""CREATE TABLE goodRawDataPrediction ({key} {datatype})"""
+                            cursor.execute(command)
+
+                    self.logger.log(self.file_object,"Table named goodRawDataPrediction created successfully in the database goodRawDataDbPrediction")
+
+        except Exception as e:
+            self.logger.log(self.file_object,f"Exception occurred while creating the table inside the database named "
+                                             f"goodRawDataDbPrediction. Exception: {str(e)}")
+            raise e
+
+
+    def insertGoodDataIntoTable(self,files,frames=None,database='goodRawDataDbPrediction',batch_size=10000):
+
+        """
+
+        Description: This method is used to add the data into the already created table. The derived columns of every
+        file are computed once here and its rows are inserted using parameterized batches inside a single transaction,
+        which is committed once the whole file is inserted and rolled back if any of its rows fails, so a file is
+        either completely staged or not at all. A file which is not found in the parsed dataframes is read in chunks of
+        batch_size rows, so it is never loaded into the memory at once.
+
+        On Failure: Raises exception
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :param files: Paths of the good data files which are read and inserted in place
+
+        :param frames: Dictionary of the path and the dataframe parsed by the validation, the files found in it are
+        not read again
+
+        :param database: Name of the database into which the table is present.
+
+        :param batch_size: Number of rows inserted by a single executemany call
+
+        :return: Number of rows inserted
+
+        """
+
+        columns = list(self.schema.stagedColumns)
+        inserted = 0
+        for file in files:
+            chunks = (deriveColumns(csv_file, self.schema)[columns]
+                      for csv_file in self.fileChunks(file, frames, batch_size))
+            inserted += self.stageFile(file, chunks, database, batch_size)
+
+        return inserted
+
+    def stageFile(self,file,chunks,database='goodRawDataDbPrediction',batch_size=10000):
+
+        """
+
+        Description: This method is used to insert the rows of a file, given as chunks of rows with their derived
+        columns, inside a single transaction. The transaction is committed once all the chunks are inserted and rolled
+        back if any of the chunks fails, so the rows of a file staged as its shards are validated are rolled back when
+        one of its shards is rejected.
+
+        On Failure: Raises exception
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :param file: Path of the file
+
+        :param chunks: Iterator of the dataframes of the rows of the file with the staged columns
+
+        :param database: Name of the database into which the table is present.
+
+        :param batch_size: Number of rows inserted by a single executemany call
+
+        :return: Number of rows inserted
 
-        cursor.execute(''' SELECT count(name) FROM sqlite_master WHERE type='table' AND name='goodRawDataPrediction' ''')
+        """
 
-        f = open('PredictionLogs/DatabaseLogs.txt', 'a+')
+        f = self.file_object
+        columns = list(self.schema.stagedColumns)
+        query = f"INSERT INTO goodRawDataPrediction ({', '.join(columns)}) values ({','.join('?' * len(columns))})"
         try:
-            if cursor.fetchone()[0] == 1:
-                self.logger.log(f, "Table named goodRawDataPrediction created in the database goodRawDataDbPrediction")
-                f.close()
-                conn.close()
-
-            else:
-                for key in columnNamesDict.keys():
-                    datatype = columnNamesDict[key]
-
-                    ## Here in try block we check if the table is existed or not and if it is then add the columns to it
-                    ## In catch block, we will create a table
-                    try:
-                        command = f"""ALTER TABLE goodRawDataPrediction ADD {key} {datatype}"""
-                        cursor.execute(command)
-                    except:
-                        command = f"""CREATE TABLE goodRawDataPrediction ({key} {datatype})"""
-                        cursor.execute(command)
-
-                conn.commit()
-                self.logger.log(f,"Table named goodRawDataPrediction created successfully in the database goodRawDataDbPrediction")
-                f.close()
-                conn.close()
+            # binding the values as python objects, the missing values are inserted as NULL
+            rows = 0
+            with self.dbConnection(database).transaction() as conn:
+                for csv_file in chunks:
+                    for start in range(0, len(csv_file), batch_size):
+                        batch = csv_file.iloc[start:start + batch_size].astype(object)
+                        conn.executemany(query, batch.where(batch.notnull(), None).itertuples(index=False, name=None))
+                    rows += len(csv_file)
+            self.logger.log(f, f"{rows} rows of the file {os.path.basename(file)} inserted into the table")
+            return rows
 
         except Exception as e:
-            self.logger.log(f,f"Exception occurred while creating the table inside the database named "
-                              f"goodRawDataDbPrediction. Exception: {str(e)}")
-            f.close()
-            conn.close()
+            self.logger.log(f,f"Error occurred while inserting the data of the file {os.path.basename(file)} into "
+                              f"the table. Exception: {str(e)}")
             raise e
 
+    def fileChunks(self,file,frames,chunksize):
+
+        """
+
+        Description: This method is used to get the rows of a good data file with the normalized headers, either the
+        dataframe parsed by the validation or the chunks of the file read in place.
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :param file: Path of the good data file
+
+        :param frames: Dictionary of the path and the dataframe parsed by the validation
+
+        :param chunksize: Number of rows read at once from the file
+
+        :return: Generator of the dataframes of the rows of the file
+
+        """
+
+        if frames is not None and file in frames:
+            yield frames[file]
+            return
+
+        with pd.read_csv(file, compression=compressionOf(file), chunksize=chunksize) as reader:
+            for csv_file in reader:
+                csv_file.columns = [self.schema.normalizeHeader(column) for column in csv_file.columns]
+                yield csv_file
 
-    def insertGoodDataIntoTable(self,database='goodRawDataDbPrediction'):
+
+    def getDataFromDbTable(self,database='goodRawDataDbPrediction',batch_size=10000,snapshot=False):
 
         """
 
-        Description: This method is used to add the data into the already created table.
+        Description: This method is used to fetch the data from the table inside the database as a dataframe which is
+        handed to the next stage in the memory, without writing it into a csv file. The rows are fetched in batches and
+        copied into typed column arrays allocated for the whole table, so only one batch of the rows is held as python
+        tuples at a time. A columnar snapshot of the data can also be saved on the disk.
 
         On Failure: Raises exception
 
@@ -130,41 +297,178 @@ class DBOperationsPrediction:
 
         Revision: None
 
-        :param database: Name of the database into which the table is present.
+        :param database: The name of the database into which the table is present.
 
-        :return: None
+        :param batch_size: Number of rows fetched at once
+
+        :param snapshot: Whether a columnar snapshot of the data is saved on the disk
+
+        :return: Dataframe containing the data of the table
+
+        """
+
+        f = self.file_object
+
+        try:
+            with self.dbConnection(database).reader() as conn:
+                cursor = conn.cursor()
+                # counting and reading the rows in one read transaction so that both see the same snapshot of the
+                # table, even when rows are inserted in between
+                cursor.execute("BEGIN")
+                rows = cursor.execute("SELECT count(*) FROM goodRawDataPrediction").fetchone()[0]
+                cursor.execute("SELECT * FROM goodRawDataPrediction")
+                headers = [i[0] for i in cursor.description]
+
+                # allocating the arrays of the whole table once and filling them batch by batch
+                numeric = [column in self.schema.stagedNumericColumns for column in headers]
+                arrays = [np.empty(rows, dtype=float if isNumeric else object) for isNumeric in numeric]
+                filled = 0
+                while True:
+                    batch = cursor.fetchmany(batch_size)
+                    if len(batch) == 0:
+                        break
+                    for array, column, values in zip(arrays, headers, zip(*batch)):
+                        array[filled:filled + len(batch)] = self.columnArray(column, values)
+                    filled += len(batch)
+
+            data = pd.DataFrame({column: self.typedColumn(column, array[:filled])
+                                 for array, column in zip(arrays, headers)}, columns=headers, copy=False)
+
+            self.logger.log(f,f"{len(data)} rows fetched from the database into the memory")
+            if snapshot:
+                self.logger.log(f,f"Columnar snapshot of the data saved at {self.saveColumnarSnapshot(data)}")
+            return data
+
+        except Exception as e:
+            self.logger.log(f,f"Exception occurred while fetching the data from the database. Exception: {str(e)}")
+            raise e
+
+    def getDataFromDbTableInChunks(self,chunksize,database='goodRawDataDbPrediction'):
+
+        """
+
+        Description: This method is used to stream the data of the table inside the database as dataframes of chunksize
+        rows, read from a single cursor in one read transaction, so that the memory used depends on the chunk size and
+        not on the size of the table. The columns are typed like the ones returned by getDataFromDbTable.
+
+        On Failure: Raises exception
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :param chunksize: Number of rows in every chunk
+
+        :param database: The name of the database into which the table is present.
+
+        :return: Generator of the dataframes of the rows of the table
+
+        """
+
+        f = self.file_object
+
+        try:
+            rows = 0
+            with self.dbConnection(database).reader() as conn:
+                cursor = conn.cursor()
+                cursor.execute("BEGIN")
+                cursor.execute("SELECT * FROM goodRawDataPrediction")
+                headers = [i[0] for i in cursor.description]
+                for batch in iter(lambda: cursor.fetchmany(chunksize), []):
+                    rows += len(batch)
+                    yield pd.DataFrame({column: self.typedColumn(column, self.columnArray(column, values))
+                                        for column, values in zip(headers, zip(*batch))}, columns=headers, copy=False)
+
+            self.logger.log(f,f"{rows} rows streamed from the database in chunks of {chunksize} rows")
+
+        except Exception as e:
+            self.logger.log(f,f"Exception occurred while streaming the data from the database. Exception: {str(e)}")
+            raise e
+
+    def typedColumn(self,column,array):
+
+        """
+
+        Description: This method is used to give the final type to the array of the values of a column, the integer
+        columns without any missing value are kept as integers.
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :param column: Name of the column
+
+        :param array: Typed array of the values of the column
+
+        :return: Array of the values of the column
+
+        """
+
+        if column in self.schema.stagedNumericColumns and \
+                self.schema.stagedNumericColumns[column] in ('INTEGER', 'INT') and not np.isnan(array).any():
+            return array.astype(np.int64)
+        return array
+
+    def columnArray(self,column,values):
+
+        """
+
+        Description: This method is used to convert a batch of the values of a column into a typed array. The numeric
+        columns become float arrays with NaN for the missing values, the other columns become object arrays in which the
+        missing values (stored as NULL, or as the text 'nan' by the older runs) are NaN, exactly like the exported csv
+        file is read by pandas.
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :param column: Name of the column
+
+        :param values: Values of the column in the batch
+
+        :return: Typed array of the values
 
         """
 
-        conn = self.dbConnection(database)
-        cursor = conn.cursor()
-        f = open('PredictionLogs/DatabaseLogs.txt', 'a+')
-        for file in os.listdir(self.goodDataPath):
-            try:
-                with open(self.goodDataPath + file, 'r') as p:
-                    next(p)
-                    reader = csv.reader(p,delimiter='\n')
-                    self.logger.log(f, f"{file} File loaded successfully!!")
-                    for line in enumerate(reader):
-                        for list_ in line[1]:
-                            try:
-                                cursor.execute(f"INSERT INTO goodRawDataPrediction values ({list_})")
-                                conn.commit()
-                            except Exception as e:
-                                raise e
+        if column in self.schema.stagedNumericColumns:
+            return np.array([np.nan if value is None else value for value in values], dtype=float)
+        return np.array([np.nan if value is None or value == 'nan' else value for value in values], dtype=object)
+
+    def saveColumnarSnapshot(self,data):
 
-            except Exception as e:
-                conn.rollback()
-                shutil.move(self.goodDataPath+file,self.badDataPath)
-                self.logger.log(f,f"Error occurred while inserting the data into the table. Exception: {str(e)}")
-                f.close()
-                conn.close()
-                raise e
+        """
 
-            f.close()
-            conn.close()
+        Description: This method is used to save a columnar snapshot of the data fetched from the database. The
+        snapshot is saved as a parquet file when pyarrow is installed and as a pickled dataframe otherwise.
 
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
 
+        :param data: Dataframe containing the data of the table
+
+        :return: Path of the snapshot
+
+        """
+
+        fileFromDb = self.workspace.fileFromDb
+        if not os.path.isdir(fileFromDb):
+            os.makedirs(fileFromDb)
+
+        try:
+            data.to_parquet(fileFromDb + "inputFile.parquet", index=False)
+            return fileFromDb + "inputFile.parquet"
+        except ImportError:
+            data.to_pickle(fileFromDb + "inputFile.pkl")
+            return fileFromDb + "inputFile.pkl"
 
     def getDataFromDbTableIntoCSV(self,database='goodRawDataDbPrediction'):
 
@@ -172,7 +476,8 @@ class DBOperationsPrediction:
         """
 
         Description: This method is used to fetch the data from the table inside the database and store it as csv
-        file into some directory.
+        file into some directory. The pipeline hands the data to the next stage in the memory, the csv file is only
+        written when the run is audited.
 
         Written By: Shivam Shinde
 
@@ -186,40 +491,33 @@ class DBOperationsPrediction:
 
         """
 
-        self.fileFromDb = "Prediction_fileFromDb/"
+        self.fileFromDb = self.workspace.fileFromDb
         self.fileName = "inputFile.csv"
-        f = open('PredictionLogs/DatabaseLogs.txt', 'a+')
+        f = self.file_object
 
         try:
-            conn = self.dbConnection()
-            cursor = conn.cursor()
-
-            query = "SELECT * FROM goodRawDataPrediction"
-            cursor.execute(query)
-
-            results = cursor.fetchall()
-
-            headers = [i[0] for i in cursor.description]
-
             # Make the CSV output directory
             if not os.path.isdir(self.fileFromDb):
                 os.makedirs(self.fileFromDb)
 
-            # Open CSV file for writing.
-            csvfile = csv.writer(open(self.fileFromDb + self.fileName, 'w', newline=''), delimiter=',',
-                                 lineterminator='\r\n', quoting=csv.QUOTE_ALL, escapechar='\\')
+            # Open CSV file for writing and add the headers and the data to it batch by batch.
+            with self.dbConnection(database).reader() as conn, \
+                    open(self.fileFromDb + self.fileName, 'w', newline='') as output:
+                cursor = conn.cursor()
+                query = "SELECT * FROM goodRawDataPrediction"
+                cursor.execute(query)
 
-            # Add the headers and data to the CSV file.
-            csvfile.writerow(headers)
-            csvfile.writerows(results)
+                headers = [i[0] for i in cursor.description]
+                csvfile = csv.writer(output, delimiter=',', lineterminator='\r\n', quoting=csv.QUOTE_ALL,
+                                     escapechar='\\')
+                csvfile.writerow(headers)
+                for rows in iter(lambda: cursor.fetchmany(10000), []):
+                    csvfile.writerows(rows)
 
             self.logger.log(f,"File exported successfully!!")
-            f.close()
-            conn.close()
 
         except Exception as e:
             self.logger.log(f,f"Exception occurred while exporting the data file from the database. Exception: {str(e)}")
-            f.close()
             raise e
 
 
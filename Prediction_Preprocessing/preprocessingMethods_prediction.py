@@ -4,13 +4,11 @@ import warnings
 
 import numpy as np
 import pandas as pd
-from sklearn.compose import ColumnTransformer
-from sklearn.impute import SimpleImputer
-from sklearn.pipeline import Pipeline
-from sklearn.preprocessing import OrdinalEncoder, StandardScaler
 
 from Logging.logging import Logger
+from Prediction_Workspace.predictionWorkspace import predictionWorkspace
 from Prediction_data_ingestion.data_loading_prediction import DataGetterPrediction
+from model_methods.model_methods import modelMethods
 
 warnings.simplefilter(action='ignore', category=FutureWarning)
 
@@ -27,10 +25,32 @@ class PreprocessingMethodsPrediction:
     Revision: None
     """
 
-    def __init__(self):
+    def __init__(self, dataframe=None, preprocessing_bundle=None, workspace=None, audit=False):
         self.logger_obj = Logger()
         self.file_object = open("PredictionLogs/preprocessingLogs.txt", "a+")
-        self.df = DataGetterPrediction(self.file_object, self.logger_obj).getData().copy()
+        self.workspace = workspace if workspace is not None else predictionWorkspace()
+
+        # state fitted on the training data (pipeline, outlier bounds and dropped columns)
+        if preprocessing_bundle is None:
+            # models trained before the bundle existed have none, they are reported below instead of failing the load
+            model_methods = modelMethods()
+            if os.path.exists(os.path.join(model_methods.model_directory, "PreprocessingBundle",
+                                           "PreprocessingBundle.pkl")):
+                preprocessing_bundle = model_methods.loadingSavedModel("PreprocessingBundle", None)
+        if preprocessing_bundle is None or \
+                preprocessing_bundle.get('bundleVersion') != modelMethods.preprocessingBundleVersion:
+            self.logger_obj.log(self.file_object, "Preprocessing bundle is missing or has an unsupported version")
+            raise Exception("Preprocessing bundle is missing or has an unsupported version. Train the models again.")
+        self.preprocessingBundle = preprocessing_bundle
+
+        # when a dataframe is provided, it is preprocessed in the memory without reading or writing any file (unless
+        # the run is audited, in which case the preprocessed data is also written into the csv file)
+        self.inMemory = dataframe is not None
+        self.audit = audit
+        if self.inMemory:
+            self.df = dataframe.reset_index(drop=True)
+        else:
+            self.df = DataGetterPrediction(self.file_object, self.logger_obj, self.workspace).getData().copy()
 
     def removeUnnecessaryFeatureColumn(self, column_name):
 
@@ -217,6 +237,53 @@ class PreprocessingMethodsPrediction:
                                 f"Exception: {str(e)}")
             raise e
 
+    def hasDerivedColumns(self):
+
+        """
+        Description: This method is used to check whether the data has the typed columns derived from the raw values
+        when it was staged into the database. The json records predicted in the memory don't have them.
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :return: True if the data has the derived columns, False otherwise
+        """
+
+        return all(column in self.df.columns for column in ['Day_of_Journey', 'Month_of_Journey', 'Year_of_Journey',
+                                                            'Flight_Duration', 'Number_of_Stops'])
+
+    def usingDerivedColumns(self):
+
+        """
+        Description: This method is used to replace the raw Date_of_Journey, Duration and Total_Stops columns by the
+        typed columns derived from them when the data was staged into the database, instead of parsing the raw values
+        again. The day, month and year of the journey and the flight duration in minutes are used as they are and the
+        number of stops becomes the Total_Stops column.
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :return: None
+        """
+
+        try:
+            for column in ['Date_of_Journey', 'Duration', 'Total_Stops']:
+                self.removeUnnecessaryFeatureColumn(column)
+            self.df.rename(columns={'Number_of_Stops': 'Total_Stops'}, inplace=True)
+            self.logger_obj.log(self.file_object, "Using the day, month and year of journey, flight duration and "
+                                                  "number of stops derived when the data was staged")
+
+        except Exception as e:
+            self.logger_obj.log(self.file_object,
+                                f"Exception occurred while using the derived columns. Exception: {str(e)}")
+            raise e
+
     def removingdDuplicateRows(self):
 
         """
@@ -289,9 +356,13 @@ class PreprocessingMethodsPrediction:
         """
 
         try:
-            # correcting the typos in the Additional_Info column of the dataframe
-            self.df['Additional_Info'] = np.where(self.df['Additional_Info'] == "No Info", "No info",
-                                                  self.df['Additional_Info'])
+            # the Additional_Info normalized when the data was staged replaces the raw one, otherwise correcting the
+            # typos in the Additional_Info column of the dataframe
+            if 'Additional_Info_Normalized' in self.df.columns:
+                self.df['Additional_Info'] = self.df.pop('Additional_Info_Normalized')
+            else:
+                self.df['Additional_Info'] = np.where(self.df['Additional_Info'] == "No Info", "No info",
+                                                      self.df['Additional_Info'])
             self.logger_obj.log(self.file_object, "Successfully corrected the typos in the Additional_Info column..")
         except Exception as e:
             self.logger_obj.log(self.file_object,
@@ -302,7 +373,8 @@ class PreprocessingMethodsPrediction:
     def replacingOutliersWithNan(self):
 
         """
-        Description: This method is used to replace the outliers with the null values
+        Description: This method is used to replace the outliers with the null values using the outlier bounds
+        found on the training data
 
         Written By: Shivam Shinde
 
@@ -314,17 +386,12 @@ class PreprocessingMethodsPrediction:
         """
 
         try:
-            # fetching the lists which contain the names of categorical and numerical columns
-            cat_feat, num_feat = self.findingNamesOfNumericalAndCategoricalColumns()
-
-            # finding the first and third quantile followed by the inter-quartile range for each of the numerical column
-            for feature in num_feat:
-                Q1 = self.df[feature].quantile(0.25)
-                Q3 = self.df[feature].quantile(0.75)
-                IQR = Q3 - Q1
-                # replacing the outliers in the numerical column using the null value
-                self.df[feature] = np.where(self.df[feature] > (Q3 + 1.45 * IQR), np.nan, self.df[feature])
-                self.df[feature] = np.where(self.df[feature] < (Q1 - 1.45 * IQR), np.nan, self.df[feature])
+            # replacing the values outside the bounds found on the training data with the null value
+            for feature, (lower_bound, upper_bound) in self.preprocessingBundle['outlierBounds'].items():
+                if feature not in self.df.columns:
+                    continue
+                self.df[feature] = np.where(self.df[feature] > upper_bound, np.nan, self.df[feature])
+                self.df[feature] = np.where(self.df[feature] < lower_bound, np.nan, self.df[feature])
 
             self.logger_obj.log(self.file_object, "Successfully replaced the outliers in the columns with null..")
 
@@ -336,7 +403,8 @@ class PreprocessingMethodsPrediction:
     def removingColumnsWithZeroVariance(self):
 
         """
-        Description: This method is used to remove the column from the dataframe which are having zero variance.
+        Description: This method is used to remove the columns which were found to have zero variance in the
+        training data.
 
         Written By: Shivam Shinde
 
@@ -348,12 +416,10 @@ class PreprocessingMethodsPrediction:
         """
 
         try:
-            # fetching the lists which contain the names of categorical and numerical columns
-            cat_feat, num_feat = self.findingNamesOfNumericalAndCategoricalColumns()
-            self.logger_obj.log(self.file_object, "Checking for the column with zero variance..")
-            # finding and removing the column from the dataframe with the zero variance
-            for feature in num_feat:
-                if self.df[feature].var() == 0:
+            self.logger_obj.log(self.file_object, "Removing the columns with zero variance in the training data..")
+            # removing the same columns which were removed from the training data
+            for feature in self.preprocessingBundle['droppedColumns']:
+                if feature in self.df.columns:
                     self.removeUnnecessaryFeatureColumn(feature)
 
         except Exception as e:
@@ -436,7 +502,7 @@ class PreprocessingMethodsPrediction:
 
         """
         Description:
-                    This function is used to
+                    This function is used to (using the pipeline fitted on the training data)
                                             -   Impute the missing values in the dataframe
                                             -   Encode categorical columns
                                             -   Perform scaling on required numerical columns
@@ -450,43 +516,20 @@ class PreprocessingMethodsPrediction:
         :return: None
         """
         try:
-            # creating numerical pipeline for the already encoded categorical columns (Since they are encoded, they
-            #  have been named as numeric for the pipeline)
-            num_pipeline1 = Pipeline([
-                ('num_most_frequent_imputation', SimpleImputer(strategy="most_frequent")),
-            ])
-
-            # creating a numerical pipeline for the numerical columns which needs the mean imputation and scaling
-            num_pipeline2 = Pipeline([
-                ('mean_imputation', SimpleImputer(strategy="mean")),
-                ('std_scaling', StandardScaler()),
-            ])
-
-            # creating a categorical pipeline
-            cat_pipeline = Pipeline([
-                ('most_frequent_imputation', SimpleImputer(strategy="most_frequent")),
-                ('ordinal_encoding', OrdinalEncoder(handle_unknown="use_encoded_value", unknown_value=100)),
-            ])
-
-            # combining two numerical and one categorical pipelines using sklearn ColumnTransformer
-            full_pipeline = ColumnTransformer([
-                ('num1', num_pipeline1, ["Total_Stops", "Day_of_Journey", "Month_of_Journey"]),
-                ('num2', num_pipeline2, ["Flight_Duration"]),
-                ('cat', cat_pipeline, ["Airline", "Source", "Destination", "Additional_Info"]),
-            ])
-
-            full_pipeline.fit(self.df)
-            arr = full_pipeline.transform(self.df)
-
-            self.df = pd.DataFrame(arr,
-                                   columns=["Total_Stops", "Day_of_Journey", "Month_of_Journey",
-                                            "Flight_Duration",
-                                            "Airline", "Source", "Destination", "Additional_Info"])
-
-            if not os.path.exists("Prediction_PreprocessedData/"):
-                os.makedirs("Prediction_PreprocessedData/")
-
-            self.df.to_csv("Prediction_PreprocessedData/preprocessedPredictionInputData.csv", header=True, index=False)
+            # transforming the data using the pipeline fitted on the training data
+            arr = self.preprocessingBundle['columnTransformer'].transform(self.df)
+
+            self.df = pd.DataFrame(arr, columns=self.preprocessingBundle['featureColumns'])
+
+            # in-memory dataframes are handed back directly by the preprocessor
+            if self.inMemory and not self.audit:
+                return
+
+            if not os.path.exists(self.workspace.preprocessedDataPath):
+                os.makedirs(self.workspace.preprocessedDataPath)
+
+            self.df.to_csv(self.workspace.preprocessedDataPath + "preprocessedPredictionInputData.csv", header=True,
+                           index=False)
 
         except Exception as e:
             self.logger_obj.log(self.file_object, f"Exception occurred while implementing the data preprocessing "
@@ -508,7 +551,7 @@ class PreprocessingMethodsPrediction:
         """
         try:
             self.logger_obj.log(self.file_object, "Exporting preprocessed data")
-            data = pd.read_csv("Prediction_PreprocessedData/preprocessedPredictionInputData.csv")
+            data = pd.read_csv(self.workspace.preprocessedDataPath + "preprocessedPredictionInputData.csv")
 
             return data
         except Exception as e:
@@ -17,9 +17,9 @@ class PreprocessorPrediction:
     Revision: None
     """
 
-    def __init__(self):
+    def __init__(self, dataframe=None, preprocessing_bundle=None, workspace=None, audit=False):
         self.logger_obj = Logger()
-        self.process_data = PreprocessingMethodsPrediction()
+        self.process_data = PreprocessingMethodsPrediction(dataframe, preprocessing_bundle, workspace, audit)
         self.file_object = open("TrainingLogs/preprocessingLogs.txt", "a+")
 
     def preprocessPrediction(self):
@@ -36,11 +36,68 @@ class PreprocessorPrediction:
         """
 
         try:
-            # removing unnecessary columns
-            self.process_data.removeUnnecessaryFeatureColumn('Route')
-            self.process_data.removeUnnecessaryFeatureColumn('Dep_Time')
-            self.process_data.removeUnnecessaryFeatureColumn('Arrival_Time')
+            # duplicate rows are kept so that every row of the input data gets its prediction
+            self.transformData()
 
+            # getting preprocessed X and y
+            data = self.process_data.getPreprocessedData()
+
+            self.logger_obj.log(self.file_object,
+                                f"Preprocessing of the data finished successfully!!")
+
+            return data
+        except Exception as e:
+            self.logger_obj.log(self.file_object, f"Exception occurred while preprocessing the data. Exception: {str(e)}")
+            raise e
+
+    def preprocessRecords(self):
+        """
+        Description: This method will implement the preprocessing techniques on the in-memory itinerary records or on a
+        chunk of the prediction data. It keeps one row for every record so that the predictions can be
+        returned in the same order as the records.
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :return: Preprocessed dataframe having one row for every record
+        """
+
+        try:
+            self.transformData()
+
+            return self.process_data.df
+        except Exception as e:
+            self.logger_obj.log(self.file_object, f"Exception occurred while preprocessing the records. Exception: {str(e)}")
+            raise e
+
+    def transformData(self):
+        """
+        Description: This method will implement the preprocessing steps shared by the prediction data and the itinerary
+        records, from removing the unnecessary columns to the encoding, scaling and null values imputation.
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :return: None
+        """
+
+        # removing unnecessary columns (the prediction data contains them, json records don't)
+        for column in ['Route', 'Dep_Time', 'Arrival_Time']:
+            if column in self.process_data.df.columns:
+                self.process_data.removeUnnecessaryFeatureColumn(column)
+
+        if self.process_data.hasDerivedColumns():
+            # using the day, month and year of journey, flight duration and number of stops derived when the data was
+            # staged
+            self.process_data.usingDerivedColumns()
+
+        else:
             # changing the datatype of the datetime column i.e. Date_of_Journey from string to datetime
             self.process_data.datatypeToDatetime('Date_of_Journey')
 
@@ -54,39 +111,17 @@ class PreprocessorPrediction:
             # converting the Total_Stop column values into the integer from the string
             self.process_data.makeTotalStopsInteger()
 
-            # removing the duplicate rows from the dataframe
-            self.process_data.removingdDuplicateRows()
-
-            # correcting the typos in the Additional_Info column
-            self.process_data.correctingTyposInAdditionalInfoColumn()
-
-            # replacing the outliers with the nan values
-            self.process_data.replacingOutliersWithNan()
-            
-            # removing the feature column with zero variance
-            self.process_data.removingColumnsWithZeroVariance()
-
-            # removing year of journey if it is not removed
-            self.process_data.removingYearOfJourneyColumn()
-
-            # self.process_data.pipeline1()
-            # self.process_data.pipeline2()
-            # self.process_data.pipeline3()
-
-            # performing encoding,scaling and null values imputation on the dataframe
-            self.process_data.transformPipeline()
-
-            # getting preprocessed X and y
-            data = self.process_data.getPreprocessedData()
-
-            self.logger_obj.log(self.file_object,
-                                f"Preprocessing of the data finished successfully!!")
-
-            return data
-        except Exception as e:
-            self.logger_obj.log(self.file_object, f"Exception occurred while preprocessing the data. Exception: {str(e)}")
-            raise e
+        # correcting the typos in the Additional_Info column
+        self.process_data.correctingTyposInAdditionalInfoColumn()
 
+        # replacing the outliers with the nan values
+        self.process_data.replacingOutliersWithNan()
 
+        # removing the feature columns with zero variance in the training data
+        self.process_data.removingColumnsWithZeroVariance()
 
+        # removing year of journey if it is not removed
+        self.process_data.removingYearOfJourneyColumn()
 
+        # performing encoding,scaling and null values imputation on the dataframe
+        self.process_data.transformPipeline()
@@ -0,0 +1,143 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from Logging.logging import Logger
+
+
+class microBatcher:
+
+    """
+    Description: This class is used to merge the prediction requests which arrive concurrently within a short merge
+    window into a single batch, so that the preprocessing, clustering and prediction are performed once for the whole
+    batch. The results are then split back and handed over to each of the callers.
+
+    Written By: Shivam Shinde
+
+    Version: 1.0
+
+    Revision: None
+    """
+
+    def __init__(self, predict_function, merge_window_ms=5, max_batch_size=512):
+        self.predict_function = predict_function
+        self.merge_window = merge_window_ms / 1000
+        self.max_batch_size = max_batch_size
+        self.logger = Logger()
+        self.file_obj = open("PredictionLogs/microBatchingLogs.txt", "a+")
+        self.requests = queue.Queue()
+        self.worker = None
+        self.worker_lock = threading.Lock()
+
+    def submit(self, records):
+
+        """
+        Description: This method is used to submit the records of one request and wait for their predictions.
+
+        On Failure: Raises exception
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :param records: List of records of a single request
+
+        :return: List of predictions in the same order as the records
+        """
+
+        self.startWorker()
+        future = Future()
+        self.requests.put((records, future))
+        return future.result()
+
+    def startWorker(self):
+
+        """
+        Description: This method is used to start the background thread which collects and runs the batches, if it is
+        not already running.
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :return: None
+        """
+
+        with self.worker_lock:
+            if self.worker is None or not self.worker.is_alive():
+                self.worker = threading.Thread(target=self.collectBatches, daemon=True)
+                self.worker.start()
+
+    def collectBatches(self):
+
+        """
+        Description: This method keeps collecting the requests into batches. A batch is closed when the merge window
+        since its first request has passed or when it has reached the maximum batch size.
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :return: None
+        """
+
+        while True:
+            batch = [self.requests.get()]
+            batch_size = len(batch[0][0])
+            deadline = time.monotonic() + self.merge_window
+
+            while batch_size < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self.requests.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(item)
+                batch_size += len(item[0])
+
+            self.runBatch(batch)
+
+    def runBatch(self, batch):
+
+        """
+        Description: This method is used to predict the merged records of a batch and split the predictions back to
+        the requests. If the merged prediction fails, every request is predicted separately so that one malformed
+        request does not fail the other requests of the batch.
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :param batch: List of (records, future) pairs
+
+        :return: None
+        """
+
+        records = [record for request_records, future in batch for record in request_records]
+        try:
+            predictions = self.predict_function(records)
+        except Exception as e:
+            self.logger.log(self.file_obj, f"Prediction of the batch of {len(batch)} requests failed, predicting the "
+                                           f"requests separately. Exception: {str(e)}")
+            for request_records, future in batch:
+                try:
+                    future.set_result(self.predict_function(request_records))
+                except Exception as request_exception:
+                    future.set_exception(request_exception)
+            return
+
+        offset = 0
+        for request_records, future in batch:
+            future.set_result(predictions[offset:offset + len(request_records)])
+            offset += len(request_records)
@@ -0,0 +1,120 @@
+import re
+from datetime import datetime
+
+import pandas as pd
+
+from Logging.logging import Logger
+from Prediction_Preprocessing.preprocessor_prediction import PreprocessorPrediction
+from Raw_Data_Validation.derivedColumns import stopsCount
+
+
+class recordPredictor:
+
+    """
+    Description: This class is used to predict the flight fare for the itinerary records received as json, without
+    writing them to the disk or inserting them into the database.
+
+    Written By: Shivam Shinde
+
+    Version: 1.0
+
+    Revision: None
+    """
+
+    recordColumns = ['Airline', 'Date_of_Journey', 'Source', 'Destination', 'Duration', 'Total_Stops',
+                     'Additional_Info']
+
+    # format of the journey dates and of the flight durations (e.g. 2h 50m, 19h or 45m) understood by the preprocessing
+    dateFormat = "%d/%m/%Y"
+    durationPattern = re.compile(r"\d+h( \d+m)?|\d+m")
+
+    def __init__(self, model_registry):
+        self.logger = Logger()
+        self.file_obj = open("PredictionLogs/recordPredictions.txt", "a+")
+        self.model_registry = model_registry
+
+    def validateRecords(self, records):
+
+        """
+        Description: This method is used to check that every record is a json object containing all the fields needed
+        for the prediction and that their values are in the formats understood by the preprocessing, so that a
+        malformed record is reported to the client instead of failing the prediction.
+
+        On Failure: Raises exception
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :param records: List of itinerary records
+
+        :return: None
+        """
+
+        if not isinstance(records, list) or len(records) == 0:
+            raise ValueError("Records should be a non-empty list of itinerary records")
+
+        for number, record in enumerate(records):
+            if not isinstance(record, dict):
+                raise ValueError(f"Record number {number} is not a json object")
+            missing = [column for column in self.recordColumns if column not in record]
+            if missing:
+                raise ValueError(f"Record number {number} is missing the fields: {', '.join(missing)}")
+
+            invalid = [column for column in self.recordColumns if not isinstance(record[column], str)]
+            if invalid:
+                raise ValueError(f"Record number {number} has non string values in the fields: {', '.join(invalid)}")
+
+            try:
+                datetime.strptime(record['Date_of_Journey'], self.dateFormat)
+            except ValueError:
+                raise ValueError(f"Record number {number} has the invalid Date_of_Journey "
+                                 f"{record['Date_of_Journey']!r}, expected a date like 24/03/2019")
+            if self.durationPattern.fullmatch(record['Duration']) is None:
+                raise ValueError(f"Record number {number} has the invalid Duration {record['Duration']!r}, expected a "
+                                 f"duration like 2h 50m, 19h or 45m")
+            if record['Total_Stops'] not in stopsCount:
+                raise ValueError(f"Record number {number} has the invalid Total_Stops {record['Total_Stops']!r}, "
+                                 f"expected one of: {', '.join(stopsCount)}")
+
+    def predictRecords(self, records):
+
+        """
+        Description: This method is used to preprocess the records, route them to their cluster and predict their
+        flight fare.
+
+        On Failure: Raises exception
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :param records: List of itinerary records
+
+        :return: List of predicted flight fares in the same order as the records
+        """
+
+        try:
+            self.validateRecords(records)
+
+            # swapping in the set of models published by a training run in any process, then preprocessing and
+            # predicting with the same set of models even if the models are swapped meanwhile
+            self.model_registry.refreshModels()
+            models = self.model_registry.getModels()
+
+            data = pd.DataFrame.from_records(records, columns=self.recordColumns)
+            data = PreprocessorPrediction(data, preprocessing_bundle=models[2]).preprocessRecords()
+
+            predictions = self.model_registry.predict(data, models)
+            self.logger.log(self.file_obj, f"Predicted the flight fare for {len(records)} records")
+
+            return predictions.tolist()
+
+        except Exception as e:
+            self.logger.log(self.file_obj, f"Exception occurred while predicting the flight fare for the records. "
+                                           f"Exception: {str(e)}")
+            raise e
@@ -0,0 +1,55 @@
+import os
+import shutil
+
+
+class predictionWorkspace:
+
+    """
+    Description: This class holds the locations used by one run of the prediction pipeline. Every run with a run id
+    gets its own folders and its own database so that several prediction runs can be executed at the same time
+    without overwriting each other's files. Without a run id the workspace points to the default folders.
+
+    Written By: Shivam Shinde
+
+    Version: 1.0
+
+    Revision: None
+    """
+
+    def __init__(self, run_id=None, root="Prediction_Runs"):
+        self.run_id = run_id
+        self.root = os.path.join(root, run_id) if run_id is not None else ""
+
+        self.inputPath = os.path.join(self.root, "Prediction_input/")
+        self.fileFromDb = os.path.join(self.root, "Prediction_fileFromDb/")
+        self.preprocessedDataPath = os.path.join(self.root, "Prediction_PreprocessedData/")
+        self.outputPath = os.path.join(self.root, "Prediction_output_files/")
+        self.outputFile = os.path.join(self.outputPath, "predicted_flight_fare_data.csv")
+        self.validationManifest = os.path.join(self.outputPath, "validationManifest.json")
+        self.databasePath = os.path.join(self.root, "Database/")
+
+        # bad data of every run is archived into the common archive folder, under a folder named after the run
+        self.archivedBadDataPath = "PredictionRawBadDataArchived/"
+        self.archiveSuffix = "_" + run_id.replace(os.sep, "_") if run_id is not None else ""
+
+    def cleanUp(self):
+
+        """
+        Description: This method is used to remove the intermediate folders and the database of the run once the
+        predictions are saved. The prediction output folder is kept.
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :return: None
+        """
+
+        if self.run_id is None:
+            return
+
+        for path in [self.inputPath, self.fileFromDb, self.preprocessedDataPath, self.databasePath]:
+            if os.path.isdir(path):
+                shutil.rmtree(path)
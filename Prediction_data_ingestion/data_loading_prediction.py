@@ -1,5 +1,9 @@
+import os
+
 import pandas as pd
 
+from Prediction_Workspace.predictionWorkspace import predictionWorkspace
+
 class DataGetterPrediction:
 
     """
@@ -9,10 +13,11 @@ class DataGetterPrediction:
     Revision: None
     """
 
-    def __init__(self, fileObject, loggerObject):
+    def __init__(self, fileObject, loggerObject, workspace=None):
         self.fileObject = fileObject
         self.loggerObject = loggerObject
-        self.predictionData = "Prediction_fileFromDb/inputFile.csv"
+        workspace = workspace if workspace is not None else predictionWorkspace()
+        self.predictionData = os.path.join(workspace.fileFromDb, "inputFile.csv")
 
     def getData(self):
 
@@ -42,4 +47,3 @@ class DataGetterPrediction:
             self.loggerObject.log(self.fileObject, "Exception occurred while loading data using getData method of DataGetter class. Error message: str(e")
             self.loggerObject.log(self.fileObject, "Data loading unsuccessful using the getData method of DataGetter class due to exception")
             raise e
-
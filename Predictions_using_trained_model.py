@@ -3,9 +3,11 @@ import os
 import pandas as pd
 
 from Logging.logging import Logger
+from Prediction_DB_Operation.dataInsertionIntoDB_prediction import DBOperationsPrediction
 from Prediction_Preprocessing.preprocessor_prediction import PreprocessorPrediction
+from Prediction_Workspace.predictionWorkspace import predictionWorkspace
 from Prediction_raw_data_validation.rawDataValidation_prediction import rawPredictionDataValidation
-from model_methods.model_methods import modelMethods
+from model_methods.model_registry import modelRegistry
 
 
 class predictionsUsingTheTrainedModels:
@@ -20,84 +22,129 @@ class predictionsUsingTheTrainedModels:
     Revision: None
     """
 
-    def __init__(self,path):
+    def __init__(self,path,model_registry=None,workspace=None,data=None,audit=False):
         self.logger = Logger()
         self.file_obj = open("PredictionLogs/predictions.txt", "a+")
-        self.prediction_data_validation = rawPredictionDataValidation(path)
+        self.workspace = workspace if workspace is not None else predictionWorkspace()
 
-    def predictUsingModel(self):
+        # data handed in the memory by the database stage, the exported csv file is read when it is not given
+        self.data = data
+        self.audit = audit
+        self.prediction_data_validation = rawPredictionDataValidation(path, self.workspace)
+
+        # loading the models from the disk only when the caller does not own an already loaded model registry
+        if model_registry is None:
+            model_registry = modelRegistry()
+            model_registry.loadModels()
+        self.model_registry = model_registry
+
+    def predictUsingModel(self, chunksize=None):
 
         """
         Description : This method is used to predict the flight fare for the observations given in the data file using
-        the trained model
+        the trained model. The rows of the output file line up with the rows of the input data.
 
         Written By: Shivam Shinde
 
         Version: 1.0
 
         Revision: None
+        :param chunksize: Number of rows predicted at once. When it is provided, the data is streamed in chunks instead
+        of being loaded into the memory at once.
         :return: path of the csv file containing the predicted values
         """
 
+        if chunksize is not None:
+            return self.predictUsingModelInChunks(chunksize)
+
         try:
             # deleting the prediction files from the previous code run
             self.prediction_data_validation.deletePredictionOutputFiles()
 
             # now that previous files are deleted, it is time for preprocessing of validated files
-            p = PreprocessorPrediction()
-            data = p.preprocessPrediction()
+            # the data is transformed using the preprocessing bundle fitted on the training data
+            models = self.model_registry.getModels()
+            if self.data is not None:
+                p = PreprocessorPrediction(self.data, models[2], self.workspace, self.audit)
+                data = p.preprocessRecords()
+            else:
+                p = PreprocessorPrediction(preprocessing_bundle=models[2], workspace=self.workspace)
+                data = p.preprocessPrediction()
 
-            # clustering the data into 4 clusters
-            # loading the trained kmeans model
-            mm = modelMethods()
-            kmeans_model1 = mm.loadingSavedModel("KMeansCluster", 4)
-            clusterNumbers = kmeans_model1.predict(data)
+            # routing every observation to its cluster and predicting the flight fare. The predictions are in the same
+            # order as the rows of the input data.
+            predictions = pd.DataFrame({'Flight_Fare': self.model_registry.predict(data, models)})
 
-            # creating a column in the data which will contains the cluster number for the particular observation
-            data['clusterNo'] = clusterNumbers
+            if not os.path.exists(self.workspace.outputPath):
+                os.makedirs(self.workspace.outputPath)
 
-            clusters = data['clusterNo'].unique()
+            predictions.to_csv(self.workspace.outputFile, header=True, index=False)
 
-            # creating an empty list which contains the prediction results
-            prediction_results = []
+            self.logger.log(self.file_obj, f"Prediction results placed at the path: {self.workspace.outputFile}")
 
-            # creating an empty list which will contain the indices of the predictions
-            prediction_indices = []
+            return self.workspace.outputFile
 
-            for i in clusters:
+        except Exception as e:
+            self.logger.log(self.file_obj, f"Exception occurred while predicting the flight fare using the saved "
+                                           f"models. Exception: {str(e)}")
+            raise e
 
-                clusterData = data[data['clusterNo'] == i]
+    def predictUsingModelInChunks(self, chunksize):
 
-                # adding the indices of the observations for the cluster number i
-                for j in clusterData.index:
-                    prediction_indices.append(j)
+        """
+        Description : This method is used to predict the flight fare for the observations given in the data file by
+        reading, preprocessing and predicting a fixed number of rows at a time. The predictions of every chunk are
+        appended to the output file. When no data is handed in the memory, the chunks are streamed from the database of
+        the run, so the memory used depends on the chunk size and not on the size of the file. An input without any row
+        gets an output file having only the header.
 
-                clusterFeatures = clusterData.drop(columns=['clusterNo'], axis=1)
+        Written By: Shivam Shinde
 
-                # finding the saved model for cluster number i
-                model_name = modelMethods().findCorrectModel(i)
-                model = modelMethods().loadingSavedModel(model_name, i)
+        Version: 1.0
 
-                # predicting the flight fare for each of the observations in the data
-                predictions = model.predict(clusterFeatures)
+        Revision: None
+        :param chunksize: Number of rows predicted at once
+        :return: path of the csv file containing the predicted values
+        """
 
-                # appending the prediction results found in an empty list
-                for prediction in predictions:
-                    prediction_results.append(prediction)
+        try:
+            # deleting the prediction files from the previous code run
+            self.prediction_data_validation.deletePredictionOutputFiles()
 
-            if not os.path.exists("Prediction_output_files"):
-                os.makedirs("Prediction_output_files")
+            if not os.path.exists(self.workspace.outputPath):
+                os.makedirs(self.workspace.outputPath)
 
-            predictions = pd.DataFrame(prediction_results,columns=["Flight_Fare"])
-            predictions['Index_column'] = prediction_indices
+            # using the same set of models for all the chunks even if the models are swapped meanwhile
+            models = self.model_registry.getModels()
+            preprocessing_bundle = models[2]
 
-            predictions.to_csv("Prediction_output_files/predicted_flight_fare_data.csv",header=True)
+            # slicing the data handed in the memory or streaming the staged rows from the database
+            with DBOperationsPrediction(self.workspace) as db_operations:
+                if self.data is not None:
+                    chunks = (self.data.iloc[i:i + chunksize] for i in range(0, len(self.data), chunksize))
+                else:
+                    chunks = db_operations.getDataFromDbTableInChunks(chunksize)
 
-            self.logger.log(self.file_obj, f"Prediction results placed at the path: Prediction_output_files/predicted_flight_fare_data.csv")
+                rows = 0
+                for chunk in chunks:
+                    data = PreprocessorPrediction(chunk, preprocessing_bundle, self.workspace).preprocessRecords()
 
-        except Exception as e:
-            self.logger.log(self.file_obj, f"Exception occurred while predicting the flight fare using the saved "
-                                           f"models. Exception: {str(e)}")
-            raise e
+                    predictions = pd.DataFrame({'Flight_Fare': self.model_registry.predict(data, models)})
+
+                    # writing the header only along with the first chunk
+                    predictions.to_csv(self.workspace.outputFile, mode='a', header=(rows == 0), index=False)
+                    rows += len(chunk)
+
+            # writing the header of an empty output so that the returned file always exists
+            if rows == 0:
+                pd.DataFrame({'Flight_Fare': []}).to_csv(self.workspace.outputFile, header=True, index=False)
 
+            self.logger.log(self.file_obj, f"Predictions for {rows} rows placed at the path: "
+                                           f"{self.workspace.outputFile}")
 
+            return self.workspace.outputFile
+
+        except Exception as e:
+            self.logger.log(self.file_obj, f"Exception occurred while predicting the flight fare in chunks using the "
+                                           f"saved models. Exception: {str(e)}")
+            raise e
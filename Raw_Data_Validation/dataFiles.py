@@ -0,0 +1,69 @@
+import bz2
+import gzip
+import io
+import lzma
+import os
+
+try:
+    import zstandard
+except ImportError:
+    # the zstandard package is needed only for the .csv.zst files
+    zstandard = None
+
+
+# extensions of the compressed data files accepted along with the plain csv files and the name of their compression
+compressionExtensions = {'.gz': 'gzip', '.bz2': 'bz2', '.xz': 'xz', '.zst': 'zstd'}
+
+
+def compressionOf(file_path):
+
+    """
+    Description: This function is used to find the compression of a data file from its extension.
+
+    Written By: Shivam Shinde
+
+    Version: 1.0
+
+    Revision: None
+
+    :param file_path: Path of the data file
+
+    :return: Name of the compression (as understood by pandas) or None if the file is a plain csv file
+    """
+
+    return compressionExtensions.get(os.path.splitext(str(file_path))[1].lower())
+
+
+def openDataFile(file_path):
+
+    """
+    Description: This function is used to open a plain or compressed data file as a text stream. The compressed files
+    are decompressed on the fly while they are read, they are never inflated on the disk or in the memory.
+
+    On Failure: Raises exception
+
+    Written By: Shivam Shinde
+
+    Version: 1.0
+
+    Revision: None
+
+    :param file_path: Path of the data file
+
+    :return: Text stream of the content of the file
+    """
+
+    compression = compressionOf(file_path)
+    if compression is None:
+        return open(file_path, 'r', newline='', errors='replace')
+    if compression == 'gzip':
+        return gzip.open(file_path, 'rt', newline='', errors='replace')
+    if compression == 'bz2':
+        return bz2.open(file_path, 'rt', newline='', errors='replace')
+    if compression == 'xz':
+        return lzma.open(file_path, 'rt', newline='', errors='replace')
+
+    if zstandard is None:
+        raise ImportError(f"The zstandard package is needed to read the file {os.path.basename(file_path)}")
+    stream = zstandard.ZstdDecompressor().stream_reader(open(file_path, 'rb'), closefd=True)
+    return io.TextIOWrapper(stream, newline='', errors='replace')
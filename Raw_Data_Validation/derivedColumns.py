@@ -0,0 +1,58 @@
+import pandas as pd
+
+# number of stops for every value of the Total_Stops column
+stopsCount = {'non-stop': 0, '1 stop': 1, '2 stops': 2, '3 stops': 3, '4 stops': 4}
+
+
+def durationInMinutes(duration):
+
+    """
+    Description: This function is used to convert the flight durations given in hours and minutes (e.g. 2h 50m, 19h or
+    45m) into minutes.
+
+    Written By: Shivam Shinde
+
+    Version: 1.0
+
+    Revision: None
+
+    :param duration: Series containing the flight durations
+
+    :return: Series containing the flight durations in minutes, missing for the values without hours and minutes
+    """
+
+    hours = duration.str.extract(r"(\d+)h", expand=False).astype(float)
+    minutes = duration.str.extract(r"(\d+)m", expand=False).astype(float)
+    return (60 * hours.fillna(0) + minutes.fillna(0)).where(hours.notnull() | minutes.notnull())
+
+
+def deriveColumns(csv_file, schema, date_format="%d/%m/%Y"):
+
+    """
+    Description: This function is used to compute the derived columns of the schema from the raw values of a validated
+    file i.e. the day, month and year of the journey, the flight duration in minutes, the number of stops and the
+    Additional_Info with its typos corrected. They are computed once when the rows are staged so that the
+    preprocessing doesn't parse the raw values again for every training or prediction run.
+
+    Written By: Shivam Shinde
+
+    Version: 1.0
+
+    Revision: None
+
+    :param csv_file: Dataframe of the validated file having the raw columns
+    :param schema: Compiled schema
+
+    :return: Dataframe having the raw columns followed by the derived columns
+    """
+
+    dates = pd.to_datetime(csv_file['Date_of_Journey'], format=date_format, errors='coerce')
+    derivations = {
+        'Day_of_Journey': lambda: dates.dt.day,
+        'Month_of_Journey': lambda: dates.dt.month,
+        'Year_of_Journey': lambda: dates.dt.year,
+        'Flight_Duration': lambda: durationInMinutes(csv_file['Duration']),
+        'Number_of_Stops': lambda: csv_file['Total_Stops'].map(stopsCount),
+        'Additional_Info_Normalized': lambda: csv_file['Additional_Info'].replace("No Info", "No info"),
+    }
+    return csv_file.assign(**{column: derivations[column]() for column in schema.derivedColumns})
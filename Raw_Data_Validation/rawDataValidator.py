@@ -0,0 +1,778 @@
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import random
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import islice
+
+import pandas as pd
+
+from Logging.logging import Logger
+from Raw_Data_Validation.dataFiles import compressionOf
+from Raw_Data_Validation.derivedColumns import deriveColumns
+from Raw_Data_Validation.schemaValidator import compileSchema
+
+# reason recorded in the manifest for the files rejected because of their name, before their content is validated
+invalidFileNameReason = "Invalid file name"
+
+# size of the blocks of a large file which are hashed in parallel
+hashBlockBytes = 64 << 20
+
+
+class shardedFileRejected(Exception):
+
+    """
+    Description: This exception is raised at the end of the shards of a large file when the file is bad, so that the
+    shards already staged are rolled back by the staging function.
+
+    Written By: Shivam Shinde
+
+    Version: 1.0
+
+    Revision: None
+    """
+
+
+class rawDataValidator:
+
+    """
+    Description: This class is used to validate a raw data file received from the client in a single pass. The file is
+    parsed only once, after its header is checked against the compiled schema, and the check of the columns with all the
+    missing values, the check of the datatypes, the check of the date format and the normalization of the headers are
+    all done on the same dataframe. The same validator is used for the training and the prediction data.
+
+    Before a large file is parsed, a sample of its rows (the first rows and the rows found at random byte offsets) is
+    checked so that an obviously malformed file is rejected without parsing it completely. The files which pass the
+    sampled pre-validation are still validated completely.
+
+    A large plain file is split at newline aligned byte offsets into shards which are parsed, checked and given their
+    derived columns on separate cores. The number of the rows, the non missing values of every column and the failures
+    of every shard are combined into the verdict of the file, so a column is reported as having all the missing values
+    only when it is missing in every shard. The rows of the shards are staged as they arrive and are never combined
+    into a dataframe of the whole file.
+
+    Written By: Shivam Shinde
+
+    Version: 1.0
+
+    Revision: None
+    """
+
+    def __init__(self, schema, log_file, date_column='Date_of_Journey', date_format="%d/%m/%Y", sample_rows=1000,
+                 probes=16, probe_rows=64, prevalidation_bytes=8 << 20):
+        self.schema = schema
+        self.dateColumn = date_column
+        self.dateFormat = date_format
+
+        # number of the first rows and of the random byte offset probes (and rows read at every probe) sampled by the
+        # pre-validation, the files smaller than prevalidation_bytes are validated by the full parse directly
+        self.sampleRows = sample_rows
+        self.probes = probes
+        self.probeRows = probe_rows
+        self.prevalidationBytes = prevalidation_bytes
+        self.log_file = log_file
+        self.logger = Logger()
+
+    def validateFile(self, file_path, prechecked=False):
+
+        """
+        Description: This method is used to parse the file once and to run all the validations on it.
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :param file_path: Path of the file to validate
+        :param prechecked: Whether the header and the sample of the file were already checked by precheckFiles
+
+        :return: Verdict of the file (dictionary containing the file name, its status i.e. good or bad, the reason of
+        the failure and the number of rows and columns) and the parsed dataframe
+        """
+
+        file = os.path.basename(file_path)
+        verdict = {'file': file, 'status': 'bad', 'reason': None, 'rows': 0, 'columns': 0}
+        f = open(self.log_file, 'a+')
+
+        try:
+            # checking the header and a sample of the rows before parsing the whole file
+            if not prechecked:
+                verdict['reason'] = self.precheckFile(file_path)
+                if verdict['reason'] is not None:
+                    return verdict, None
+
+            # compressed files are decompressed while they are parsed
+            try:
+                csv_file = pd.read_csv(file_path, compression=compressionOf(file_path))
+            except Exception as e:
+                verdict['reason'] = f"File could not be parsed. Exception: {str(e)}"
+                return verdict, None
+
+            verdict['rows'], verdict['columns'] = csv_file.shape
+
+            # normalizing the headers i.e. removing the hyphens from the column names
+            csv_file.columns = [self.schema.normalizeHeader(column) for column in csv_file.columns]
+
+            # checking if there is any column with all of its values missing
+            allMissing = csv_file.columns[csv_file.isnull().all()]
+            if len(allMissing) > 0:
+                verdict['reason'] = f"Columns with all the missing values: {', '.join(allMissing)}"
+                return verdict, None
+
+            # checking the values of the numeric columns against their datatype and the format of the dates
+            verdict['reason'] = self.checkRows(csv_file)
+            if verdict['reason'] is not None:
+                return verdict, None
+
+            verdict['status'] = 'good'
+            return verdict, csv_file
+
+        finally:
+            self.logger.log(f, f"File {file} validated. Status: {verdict['status']}. Reason: {verdict['reason']}")
+            f.close()
+
+    def precheckFile(self, file_path):
+
+        """
+        Description: This method is used to check a file before it is parsed completely i.e. to check the number and the
+        names of its columns from its first line and, for a large file, to check a sample of its rows.
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :param file_path: Path of the file
+
+        :return: Reason of the failure or None if the file passed the checks
+        """
+
+        # a corrupt compressed file (or one whose compression can't be read) fails while its header is read
+        try:
+            reason = self.schema.checkHeader(file_path)
+        except Exception as e:
+            return f"File could not be read. Exception: {str(e)}"
+        if reason is not None:
+            return reason
+
+        # rejecting an obviously malformed large file from a sample of its rows before parsing it completely
+        if os.path.getsize(file_path) >= self.prevalidationBytes:
+            try:
+                reason = self.checkRows(self.sampleFile(file_path))
+            except Exception as e:
+                reason = f"File could not be sampled. Exception: {str(e)}"
+            if reason is not None:
+                return f"Rejected by the sampled pre-validation: {reason}"
+        return None
+
+    def shardOffsets(self, file_path, shard_bytes):
+
+        """
+        Description: This method is used to split the rows of a plain file into shards of about shard_bytes bytes. Every
+        boundary is moved to the start of the next line so that a row is never split between two shards (the values of
+        the client files never contain line breaks).
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :param file_path: Path of the file
+        :param shard_bytes: Size of a shard in bytes
+
+        :return: List containing the start and end byte offsets of every shard
+        """
+
+        size = os.path.getsize(file_path)
+        with open(file_path, 'rb') as f:
+            # the rows start after the header
+            f.readline()
+            boundaries = [f.tell()]
+            for offset in range(boundaries[0] + shard_bytes, size, shard_bytes):
+                if offset <= boundaries[-1]:
+                    continue
+                f.seek(offset)
+                f.readline()
+                if f.tell() < size:
+                    boundaries.append(f.tell())
+        boundaries.append(size)
+        return [(start, end) for start, end in zip(boundaries, boundaries[1:]) if end > start]
+
+    def validateShard(self, file_path, start, end, keep_data=False):
+
+        """
+        Description: This method is used to parse the rows of a shard of a file and to check them. The columns with all
+        the missing values can't be found from a single shard, the number of the non missing values of every column is
+        returned instead so that it can be summed over the shards. The rows of a valid shard which are kept are returned
+        with the derived columns of the schema, ready to be staged.
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :param file_path: Path of the file
+        :param start: Byte offset of the first row of the shard
+        :param end: Byte offset after the last row of the shard
+        :param keep_data: Whether the rows of the shard are returned to be staged
+
+        :return: Result of the shard (dictionary containing the number of rows, the number of the non missing values of
+        every column, the parsing failure and the failure of the checks of the rows) and the rows of the shard with their
+        derived columns
+        """
+
+        result = {'rows': 0, 'nonMissing': dict(), 'parseError': None, 'reason': None}
+        with open(file_path, 'rb') as f:
+            f.seek(start)
+            data = f.read(end - start)
+
+        try:
+            csv_file = pd.read_csv(io.BytesIO(data), header=None, names=self.schema.headers)
+        except Exception as e:
+            result['parseError'] = f"File could not be parsed. Exception: {str(e)}"
+            return result, None
+
+        result['rows'] = len(csv_file)
+        result['nonMissing'] = {column: int(count) for column, count in csv_file.notnull().sum().items()}
+        result['reason'] = self.checkRows(csv_file)
+        if not keep_data or result['reason'] is not None:
+            return result, None
+        return result, deriveColumns(csv_file, self.schema)[list(self.schema.stagedColumns)]
+
+    def combineShards(self, file_path, shards):
+
+        """
+        Description: This method is used to combine the results of the shards of a file into the verdict of the file.
+        The failures are reported in the same order as by the validation of a whole file i.e. the parsing failures, then
+        the columns with all the missing values and then the failures of the checks of the rows.
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :param file_path: Path of the file
+        :param shards: List containing the result of every shard in the order of the file
+
+        :return: Verdict of the file
+        """
+
+        file = os.path.basename(file_path)
+        verdict = {'file': file, 'status': 'bad', 'reason': None, 'rows': 0, 'columns': 0}
+        f = open(self.log_file, 'a+')
+
+        try:
+            verdict['reason'] = next((result['parseError'] for result in shards if result['parseError']), None)
+            if verdict['reason'] is not None:
+                return verdict
+
+            verdict['rows'] = sum(result['rows'] for result in shards)
+            verdict['columns'] = len(self.schema.headers)
+
+            allMissing = [column for column in self.schema.headers
+                          if sum(result['nonMissing'].get(column, 0) for result in shards) == 0]
+            if len(allMissing) > 0:
+                verdict['reason'] = f"Columns with all the missing values: {', '.join(allMissing)}"
+                return verdict
+
+            verdict['reason'] = next((result['reason'] for result in shards if result['reason']), None)
+            if verdict['reason'] is not None:
+                return verdict
+
+            verdict['status'] = 'good'
+            return verdict
+
+        finally:
+            self.logger.log(f, f"File {file} validated in {len(shards)} shards. Status: {verdict['status']}. "
+                               f"Reason: {verdict['reason']}")
+            f.close()
+
+    def rejectFile(self, file_path, reason):
+
+        """
+        Description: This method is used to record the verdict of a file rejected before it was parsed.
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :param file_path: Path of the file
+        :param reason: Reason of the failure
+
+        :return: Verdict of the file and None in place of its parsed dataframe
+        """
+
+        verdict = {'file': os.path.basename(file_path), 'status': 'bad', 'reason': reason, 'rows': 0, 'columns': 0}
+        f = open(self.log_file, 'a+')
+        self.logger.log(f, f"File {verdict['file']} validated. Status: {verdict['status']}. Reason: {reason}")
+        f.close()
+        return verdict, None
+
+    def checkRows(self, csv_file):
+
+        """
+        Description: This method is used to check the values of the numeric columns against their datatype and the
+        format of the dates in the date column of the rows of a file.
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :param csv_file: Dataframe containing the rows of the file (all of them or a sample of them)
+
+        :return: Reason of the failure or None if the rows are valid
+        """
+
+        reason = self.schema.checkColumnTypes(csv_file)
+        if reason is not None:
+            return reason
+
+        try:
+            pd.to_datetime(csv_file[self.dateColumn], format=self.dateFormat, errors="raise")
+        except Exception as e:
+            return f"Invalid date format in the column {self.dateColumn}. Exception: {str(e)}"
+        return None
+
+    def sampleFile(self, file_path):
+
+        """
+        Description: This method is used to read a sample of the rows of a file i.e. its first rows and the rows found at
+        random byte offsets of the file. Every probe skips the partial line at its offset so that only whole lines are
+        read, and the probed lines which don't have the number of columns of the schema are left out of the sample.
+        Compressed files can't be read from a random offset, only their first rows are sampled.
+
+        On Failure: Raises exception
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :param file_path: Path of the file
+
+        :return: Dataframe containing the sampled rows with the normalized headers
+        """
+
+        sample = pd.read_csv(file_path, compression=compressionOf(file_path), nrows=self.sampleRows)
+        sample.columns = [self.schema.normalizeHeader(column) for column in sample.columns]
+        if compressionOf(file_path) is not None:
+            return sample
+
+        # probing the same offsets every time the same file is validated
+        size = os.path.getsize(file_path)
+        rng = random.Random(size)
+        lines = []
+        with open(file_path, 'rb') as f:
+            for offset in sorted(rng.randrange(size) for _ in range(self.probes)):
+                f.seek(offset)
+                f.readline()
+                for _ in range(self.probeRows):
+                    line = f.readline()
+                    if not line:
+                        break
+                    lines.append(line)
+
+        if len(lines) == 0:
+            return sample
+
+        probes = pd.read_csv(io.BytesIO(b''.join(lines)), header=None, names=list(sample.columns),
+                             on_bad_lines='skip', encoding_errors='replace')
+        return pd.concat([sample, probes], ignore_index=True)
+
+
+def precheckFiles(schema_path, log_file, file_paths, sampling=None):
+
+    """
+    Description: This function is used to check the header and a sample of the rows of the files before they are
+    hashed and parsed, so that an obviously malformed large file is rejected without reading it completely.
+
+    Written By: Shivam Shinde
+
+    Version: 1.0
+
+    Revision: None
+
+    :param schema_path: Path of the schema json file
+    :param log_file: Path of the log file of the validation
+    :param file_paths: Paths of the files to check
+    :param sampling: Dictionary of the sampling parameters of the validator (sample_rows, probes, probe_rows and
+    prevalidation_bytes), the defaults of the validator when not provided
+
+    :return: Dictionary of the path and the verdict of every rejected file
+    """
+
+    validator = rawDataValidator(compileSchema(schema_path), log_file, **(sampling or dict()))
+    rejected = dict()
+    for file_path in file_paths:
+        reason = validator.precheckFile(file_path)
+        if reason is not None:
+            rejected[file_path], _ = validator.rejectFile(file_path, reason)
+            rejected[file_path]['path'] = file_path
+    return rejected
+
+
+def fileContentHash(file_path, start=0, end=None):
+
+    """
+    Description: This function is used to compute the hash of the content of a file, or of a range of its bytes. The
+    file is read in blocks so that large files are never loaded into the memory at once.
+
+    Written By: Shivam Shinde
+
+    Version: 1.0
+
+    Revision: None
+
+    :param file_path: Path of the file
+    :param start: Byte offset of the start of the range
+    :param end: Byte offset after the end of the range, the end of the file when not provided
+
+    :return: Hexadecimal blake2b digest of the content of the file
+    """
+
+    digest = hashlib.blake2b(digest_size=16)
+    remaining = end - start if end is not None else None
+    with open(file_path, 'rb') as f:
+        f.seek(start)
+        while remaining is None or remaining > 0:
+            block = f.read(1 << 20 if remaining is None else min(1 << 20, remaining))
+            if not block:
+                break
+            digest.update(block)
+            if remaining is not None:
+                remaining -= len(block)
+    return digest.hexdigest()
+
+
+def fileContentHashes(file_paths, workers=None):
+
+    """
+    Description: This function is used to compute the content hash of every file. A file larger than a hash block is
+    hashed as the digest of the digests of its blocks, the blocks of all the large files being hashed in parallel by a
+    pool of worker processes, so a huge file is not read by a single core before its validation starts. The smaller
+    files are hashed in the calling process.
+
+    Written By: Shivam Shinde
+
+    Version: 1.0
+
+    Revision: None
+
+    :param file_paths: Paths of the files
+    :param workers: Number of worker processes, number of cpus when not provided
+
+    :return: List containing the content hash of every file in the same order as the file paths
+    """
+
+    workers = workers or os.cpu_count()
+    blocks = dict()
+    for file_path in file_paths:
+        size = os.path.getsize(file_path)
+        if workers > 1 and size > hashBlockBytes:
+            blocks[file_path] = [(file_path, start, min(start + hashBlockBytes, size))
+                                 for start in range(0, size, hashBlockBytes)]
+
+    tasks = [block for file_path in file_paths for block in blocks.get(file_path, [])]
+    digests = iter([])
+    if len(tasks) > 0:
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), mp_context=context) as executor:
+            digests = iter(list(executor.map(fileContentHash, *zip(*tasks))))
+
+    hashes = []
+    for file_path in file_paths:
+        if file_path in blocks:
+            digest = hashlib.blake2b(digest_size=16, person=b'blocks')
+            for _ in blocks[file_path]:
+                digest.update(bytes.fromhex(next(digests)))
+            hashes.append(digest.hexdigest())
+        else:
+            hashes.append(fileContentHash(file_path))
+    return hashes
+
+
+def validateFileInWorker(schema_path, log_file, file_path, keep_data=False, sampling=None, prechecked=False):
+
+    """
+    Description: This function is used to validate a single file in a worker process. The file is read in place and
+    its path is added to its verdict.
+
+    Written By: Shivam Shinde
+
+    Version: 1.0
+
+    Revision: None
+
+    :param schema_path: Path of the schema json file
+    :param log_file: Path of the log file of the validation
+    :param file_path: Path of the file to validate
+    :param keep_data: Whether the parsed dataframe of a good file is returned so that it is not parsed again
+    :param sampling: Dictionary of the sampling parameters of the validator, the defaults when not provided
+    :param prechecked: Whether the header and the sample of the file were already checked
+
+    :return: Verdict of the file and its parsed dataframe (None when the file is bad or keep_data is False)
+    """
+
+    validator = rawDataValidator(compileSchema(schema_path), log_file, **(sampling or dict()))
+    verdict, csv_file = validator.validateFile(file_path, prechecked)
+    verdict['path'] = file_path
+    return verdict, csv_file if keep_data else None
+
+
+def validateShardInWorker(schema_path, log_file, file_path, start, end, keep_data=False):
+
+    """
+    Description: This function is used to validate a shard of a file in a worker process.
+
+    Written By: Shivam Shinde
+
+    Version: 1.0
+
+    Revision: None
+
+    :param schema_path: Path of the schema json file
+    :param log_file: Path of the log file of the validation
+    :param file_path: Path of the file
+    :param start: Byte offset of the first row of the shard
+    :param end: Byte offset after the last row of the shard
+    :param keep_data: Whether the rows of the shard are returned with their derived columns to be staged
+
+    :return: Result of the shard and its rows
+    """
+
+    validator = rawDataValidator(compileSchema(schema_path), log_file)
+    return validator.validateShard(file_path, start, end, keep_data)
+
+
+def runValidationTask(schema_path, log_file, keep_data, stage_shards, sampling, prechecked, task):
+
+    """
+    Description: This function is used to run a validation task in a worker process, a task being either a whole file
+    or a shard of a file.
+
+    Written By: Shivam Shinde
+
+    Version: 1.0
+
+    Revision: None
+
+    :param schema_path: Path of the schema json file
+    :param log_file: Path of the log file of the validation
+    :param keep_data: Whether the parsed dataframe of a whole file is returned
+    :param stage_shards: Whether the rows of a shard are returned to be staged
+    :param sampling: Dictionary of the sampling parameters of the validator
+    :param prechecked: Whether the header and the sample of the files were already checked
+    :param task: Tuple of the path of the file and the start and end byte offsets of the shard (None for a whole file)
+
+    :return: Verdict of the file or result of the shard along with the parsed dataframe
+    """
+
+    file_path, start, end = task
+    if start is None:
+        return validateFileInWorker(schema_path, log_file, file_path, keep_data, sampling, prechecked)
+    return validateShardInWorker(schema_path, log_file, file_path, start, end, stage_shards)
+
+
+def orderedResults(executor, function, tasks, window):
+
+    """
+    Description: This function is used to run the tasks in the pool of worker processes and to get their results in the
+    order of the tasks. At most window tasks are submitted ahead of the result being consumed, so the results waiting
+    to be consumed (e.g. the rows of the shards waiting to be staged) are bounded.
+
+    Written By: Shivam Shinde
+
+    Version: 1.0
+
+    Revision: None
+
+    :param executor: Pool of worker processes
+    :param function: Function run for every task
+    :param tasks: Tuples of the arguments of the tasks
+    :param window: Number of tasks submitted ahead of the consumed result
+
+    :return: Generator of the results of the tasks
+    """
+
+    tasks = iter(tasks)
+    pending = deque(executor.submit(function, *task) for task in islice(tasks, window))
+    while pending:
+        result = pending.popleft().result()
+        for task in islice(tasks, 1):
+            pending.append(executor.submit(function, *task))
+        yield result
+
+
+def validateFiles(schema_path, log_file, file_paths, workers=None, keep_data=False, shard_bytes=64 << 20, stage=None,
+                  sampling=None, prechecked=False):
+
+    """
+    Description: This function is used to validate the files in a pool of worker processes. Parsing and checking the
+    files happen in parallel while archiving the bad files and writing into the database are left to the caller. The
+    plain files larger than shard_bytes are checked from their header and a sample of their rows and then split into
+    shards which are validated in parallel along with the other files. A single small file is validated in the calling
+    process.
+
+    The rows of a sharded file are never returned. When a staging function is given, it is called for every sharded
+    file with a generator of the rows of its shards (with their derived columns) in the order of the file, which
+    yields every shard as soon as it is validated. The generator raises shardedFileRejected once all the shards are
+    consumed if the file is bad, so the staging function must stage the rows in a single transaction which is rolled
+    back when it fails. The verdict of a staged file is marked as staged.
+
+    Written By: Shivam Shinde
+
+    Version: 1.0
+
+    Revision: None
+
+    :param schema_path: Path of the schema json file
+    :param log_file: Path of the log file of the validation
+    :param file_paths: Paths of the files to validate
+    :param workers: Number of worker processes, number of cpus when not provided
+    :param keep_data: Whether the parsed dataframes of the good files which are not sharded are returned along with the
+    verdicts
+    :param shard_bytes: Size of the shards of the large files in bytes
+    :param stage: Function staging the rows of a sharded file, called with the path of the file and the generator of
+    the rows of its shards
+    :param sampling: Dictionary of the sampling parameters of the validator (sample_rows, probes, probe_rows and
+    prevalidation_bytes), the defaults of the validator when not provided
+    :param prechecked: Whether the header and the sample of the files were already checked by precheckFiles
+
+    :return: List containing the verdict and the parsed dataframe of every file in the same order as the file paths
+    """
+
+    workers = workers or os.cpu_count()
+    validator = rawDataValidator(compileSchema(schema_path), log_file, **(sampling or dict()))
+
+    # splitting the large plain files into shards unless they are rejected by the checks of their header and sample
+    shards, rejected = dict(), dict()
+    if workers > 1:
+        for file_path in file_paths:
+            if compressionOf(file_path) is None and os.path.getsize(file_path) > shard_bytes:
+                reason = validator.precheckFile(file_path) if not prechecked else None
+                if reason is None:
+                    shards[file_path] = validator.shardOffsets(file_path, shard_bytes)
+                else:
+                    rejected[file_path] = reason
+
+    tasks = []
+    for file_path in file_paths:
+        if file_path in shards:
+            tasks.extend((file_path, start, end) for start, end in shards[file_path])
+        elif file_path not in rejected:
+            tasks.append((file_path, None, None))
+    arguments = [(schema_path, log_file, keep_data, stage is not None, sampling, prechecked, task) for task in tasks]
+
+    if len(tasks) <= 1 or workers == 1:
+        return combineResults(validator, file_paths, shards, rejected, (runValidationTask(*task) for task in arguments),
+                              stage)
+
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), mp_context=context) as executor:
+        results = orderedResults(executor, runValidationTask, arguments, 2 * workers)
+        return combineResults(validator, file_paths, shards, rejected, results, stage)
+
+
+def combineResults(validator, file_paths, shards, rejected, results, stage=None):
+
+    """
+    Description: This function is used to turn the results of the validation tasks, consumed in the order of the tasks,
+    into the verdict of every file. The rows of the shards of a sharded file are handed to the staging function as they
+    arrive and the results of its shards are combined into its verdict.
+
+    Written By: Shivam Shinde
+
+    Version: 1.0
+
+    Revision: None
+
+    :param validator: Validator of the calling process
+    :param file_paths: Paths of the validated files
+    :param shards: Dictionary of the path and the byte offsets of the shards of every sharded file
+    :param rejected: Dictionary of the path and the reason of the files rejected before they were parsed
+    :param results: Iterator of the results of the validation tasks
+    :param stage: Function staging the rows of a sharded file
+
+    :return: List containing the verdict and the parsed dataframe of every file in the same order as the file paths
+    """
+
+    results = iter(results)
+    verdicts = []
+    for file_path in file_paths:
+        if file_path in shards:
+            shardResults, combined = [], []
+
+            def shardRows():
+                # handing the rows of the valid shards over one by one, only the results are kept
+                for _ in shards[file_path]:
+                    result, csv_file = next(results)
+                    shardResults.append(result)
+                    if csv_file is not None and not any(r['parseError'] or r['reason'] for r in shardResults):
+                        yield csv_file
+                combined.append(validator.combineShards(file_path, shardResults))
+                if combined[0]['status'] != 'good':
+                    raise shardedFileRejected(file_path)
+
+            staged = False
+            if stage is not None:
+                try:
+                    stage(file_path, shardRows())
+                    staged = True
+                except shardedFileRejected:
+                    pass
+
+            # consuming the results of the shards left unconsumed so that the results of the next files stay in order
+            shardResults.extend(next(results)[0] for _ in range(len(shards[file_path]) - len(shardResults)))
+            verdict, csv_file = combined[0] if combined else validator.combineShards(file_path, shardResults), None
+            verdict['staged'] = staged and verdict['status'] == 'good'
+        elif file_path in rejected:
+            verdict, csv_file = validator.rejectFile(file_path, rejected[file_path])
+        else:
+            verdict, csv_file = next(results)
+        verdict['path'] = file_path
+        verdicts.append((verdict, csv_file))
+    return verdicts
+
+
+def saveValidationManifest(verdicts, manifest_file):
+
+    """
+    Description: This function is used to save the manifest of a validation run i.e. which source files are good, which
+    are bad and which were skipped along with the path, the content hash and the verdict of every file.
+
+    Written By: Shivam Shinde
+
+    Version: 1.0
+
+    Revision: None
+
+    :param verdicts: List containing the verdict of every file
+    :param manifest_file: Path of the manifest json file
+
+    :return: None
+    """
+
+    manifest = {'created_at': datetime.now().isoformat(),
+                'good': [verdict['file'] for verdict in verdicts if verdict['status'] == 'good'],
+                'bad': [verdict['file'] for verdict in verdicts if verdict['status'] == 'bad'],
+                'skipped': [verdict['file'] for verdict in verdicts if verdict['status'] == 'skipped'],
+                'files': verdicts}
+
+    if os.path.dirname(manifest_file):
+        os.makedirs(os.path.dirname(manifest_file), exist_ok=True)
+    with open(manifest_file, 'w') as f:
+        json.dump(manifest, f, indent=4)
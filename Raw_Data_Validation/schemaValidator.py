@@ -0,0 +1,169 @@
+import csv
+import functools
+import json
+import re
+
+import pandas as pd
+
+from Raw_Data_Validation.dataFiles import compressionExtensions, openDataFile
+
+
+class compiledSchema:
+
+    """
+    Description: This class holds the schema json file compiled into the checks used by the raw data validation. The
+    regular expression of the file name is built from the sample file name and the lengths of the date and time stamps
+    (the csv files may be compressed using gzip, bz2, xz or zstd), the header is checked against the column names of
+    the schema and the values of the numeric columns are checked against their datatype. The derived columns of the
+    schema are the typed columns computed from the raw values when the data is staged into the database.
+
+    Written By: Shivam Shinde
+
+    Version: 1.0
+
+    Revision: None
+    """
+
+    # datatypes of the schema whose values must be numbers, the columns with the TEXT datatype accept any value
+    numericDatatypes = {'INTEGER', 'INT', 'REAL', 'FLOAT', 'NUMERIC'}
+
+    def __init__(self, schema_path):
+        with open(schema_path, 'r') as f:
+            schema = json.load(f)
+
+        self.schemaPath = schema_path
+        self.sampleFileName = schema['SampleFileName']
+        self.lengthOfDateStampInFile = schema['LengthOfDateStampInFile']
+        self.lengthOfTimeStampInFile = schema['LengthOfTimeStampInFile']
+        self.numberOfColumns = schema['NumberOfColumns']
+        self.columnNames = schema['ColumnNames']
+
+        # the prefix of the file name is everything before the date and time stamps of the sample file name, the
+        # extension of the csv file is optionally followed by the extension of its compression
+        prefix = self.sampleFileName.rsplit('_', 2)[0]
+        compressions = "|".join(re.escape(extension) for extension in compressionExtensions)
+        self.fileNameRegex = re.compile(re.escape(prefix) + r"\_\d{" + str(self.lengthOfDateStampInFile) + r"}\_\d{" +
+                                        str(self.lengthOfTimeStampInFile) + r"}\.csv(" + compressions + r")?$")
+
+        self.headers = [self.normalizeHeader(column) for column in self.columnNames]
+        self.stringColumns = [column for column, datatype in self.columnNames.items() if datatype.upper() == 'TEXT']
+        self.numericColumns = {column: datatype.upper() for column, datatype in self.columnNames.items()
+                               if datatype.upper() in self.numericDatatypes}
+
+        # columns of the staging table i.e. the raw columns followed by the derived columns
+        self.derivedColumns = schema.get('DerivedColumns', dict())
+        self.stagedColumns = {**self.columnNames, **self.derivedColumns}
+        self.stagedNumericColumns = {column: datatype.upper() for column, datatype in self.stagedColumns.items()
+                                     if datatype.upper() in self.numericDatatypes}
+
+    @staticmethod
+    def normalizeHeader(column):
+
+        """
+        Description: This method is used to normalize a column name of the data i.e. to remove the hyphens from it.
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :param column: Column name
+
+        :return: Normalized column name
+        """
+
+        return str(column).replace('-', '')
+
+    def isValidFileName(self, file_name):
+
+        """
+        Description: This method is used to match the file name against the compiled regular expression of the schema.
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :param file_name: Name of the data file
+
+        :return: True if the file name is valid else False
+        """
+
+        return self.fileNameRegex.match(file_name) is not None
+
+    def checkHeader(self, file_path):
+
+        """
+        Description: This method is used to check the number and the names of the columns of a file by reading only its
+        first line. Compressed files are decompressed only up to their first line.
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :param file_path: Path of the data file
+
+        :return: Reason of the failure or None if the header is valid
+        """
+
+        with openDataFile(file_path) as f:
+            header = next(csv.reader(f), [])
+
+        if len(header) != self.numberOfColumns:
+            return f"Expected {self.numberOfColumns} columns, found {len(header)}"
+
+        header = [self.normalizeHeader(column) for column in header]
+        if header != self.headers:
+            return f"Column names {header} do not match the schema columns {self.headers}"
+        return None
+
+    def checkColumnTypes(self, csv_file):
+
+        """
+        Description: This method is used to check that the values of the numeric columns of the schema are numbers
+        (and whole numbers for the INTEGER columns). Missing values are allowed.
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :param csv_file: Dataframe of the data file
+
+        :return: Reason of the failure or None if all the values match their datatype
+        """
+
+        for column, datatype in self.numericColumns.items():
+            values = csv_file[column].dropna()
+            numbers = pd.to_numeric(values, errors='coerce')
+            if numbers.isnull().any():
+                return f"Non numeric values found in the column {column} of the datatype {datatype}"
+            if datatype in ('INTEGER', 'INT') and (numbers % 1 != 0).any():
+                return f"Non integer values found in the column {column} of the datatype {datatype}"
+        return None
+
+
+@functools.lru_cache(maxsize=None)
+def compileSchema(schema_path):
+
+    """
+    Description: This function is used to compile the schema json file into the checks used by the validation. The
+    compiled schema is cached so that every schema file is read and compiled only once by a process.
+
+    Written By: Shivam Shinde
+
+    Version: 1.0
+
+    Revision: None
+
+    :param schema_path: Path of the schema json file
+
+    :return: Compiled schema
+    """
+
+    return compiledSchema(schema_path)
@@ -1,15 +1,22 @@
 import csv
 import os
-import shutil
-import sqlite3
+from datetime import datetime
 
+import numpy as np
+import pandas as pd
+
+from DB_Connection.connectionManager import connectionManager
 from Logging.logging import Logger
+from Raw_Data_Validation.dataFiles import compressionOf
+from Raw_Data_Validation.derivedColumns import deriveColumns
+from Raw_Data_Validation.schemaValidator import compileSchema
 
 
 class DBOperations:
     
     """
-    Description: This class contains the methods that deal with the database operations.
+    Description: This class contains the methods that deal with the database operations. An object of the class is
+    used for a single pipeline run, all its operations share the connections of the run which are closed by close().
     Written By: Shivam Shinde 
     Version: 1.0
     Revision: None
@@ -18,14 +25,27 @@ class DBOperations:
     
     def __init__(self):
         self.path = "Database/"
-        self.goodDataPath = "Training_raw_data_validated/GoodData/"
-        self.badDataPath = "Training_raw_data_validated/BadData/"
         self.logger = Logger()
+        self.schema = compileSchema("Training_Schema_json_file/schema_training.json")
+
+        # columns tagging every staged row with the batch which inserted it and the time of its insertion
+        self.batchColumns = {'Batch_Id': 'TEXT', 'Ingested_At': 'TEXT'}
+
+        # connection managers of the databases used by the run and the log file shared by all the operations
+        self.connections = dict()
+        self.file_object = open('TrainingLogs/DatabaseLogs.txt', 'a+')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
     def dbConnection(self,databaseName='goodRawDataDb'):
 
         """
-        Description: This method is used to create a connection with the sqlite3 database
+        Description: This method is used to get the connection manager of the sqlite3 database, which is created once
+        for the run. The connection itself is opened when the first operation needs it.
 
         On Failure: Raises exception
 
@@ -35,29 +55,49 @@ class DBOperations:
 
         Revision: None
 
-        :return: Databases connector
+        :return: Connection manager of the database
 
         """
 
-        f = open('TrainingLogs/DatabaseLogs.txt','a+')
         try:
-            if not os.path.isdir(self.path):
-                os.makedirs(self.path)
-            conn = sqlite3.connect(self.path+databaseName+'.db')
-            self.logger.log(f,f"Connection with the database {databaseName} made")
-            f.close()
-            return conn
-
-        except ConnectionError as ce:
-            self.logger.log(f,f"Connection error occurred while creating a connection to the database. Error: {str(ce)}")
-            f.close()
-            raise ce
+            if databaseName not in self.connections:
+                self.connections[databaseName] = connectionManager(self.path+databaseName+'.db', self.file_object)
+            return self.connections[databaseName]
+
+        except Exception as e:
+            self.logger.log(self.file_object,f"Connection error occurred while creating a connection to the database. Error: {str(e)}")
+            raise e
+
+    def close(self):
+
+        """
+        Description: This method is used to close the connections of the run with all the databases and the log file.
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :return: None
+
+        """
+
+        for connections in self.connections.values():
+            connections.close()
+        self.connections = dict()
+        if not self.file_object.closed:
+            self.file_object.close()
 
     def createTableIntoDb(self,columnNamesDict,databaseName='goodRawDataDb'):
 
         """
 
-        Description: This method is used create a table in the existing database
+        Description: This method is used create a table in the existing database. The table has the columns of the
+        schema followed by its derived columns and the batch columns, the columns missing from a table created by an
+        older run are added to it and the derived columns are computed for the rows already staged (their batch
+        columns are left empty). The indexes on the insertion time and on the airline, source and destination are
+        created along with the table.
 
         Written By: Shivam Shinde
 
@@ -75,88 +115,483 @@ class DBOperations:
 
         """
 
-        conn = self.dbConnection(databaseName)
-        cursor = conn.cursor()
+        try:
+            with self.dbConnection(databaseName).transaction() as conn:
+                cursor = conn.cursor()
+
+                # sqlite runs the ALTER TABLE statements outside of any transaction unless one is begun explicitly, so
+                # the added columns are committed or rolled back along with the values computed for them
+                if not conn.in_transaction:
+                    cursor.execute("BEGIN")
+                cursor.execute(''' SELECT count(name) FROM sqlite_master WHERE type='table' AND name='goodRawData' ''')
+
+                columnNamesDict = {**columnNamesDict, **self.schema.derivedColumns, **self.batchColumns}
+                if cursor.fetchone()[0] == 1:
+                    # adding the derived and batch columns missing from a table created by an older run
+                    existing = [row[1] for row in cursor.execute("PRAGMA table_info(goodRawData)").fetchall()]
+                    missing = [key for key in columnNamesDict.keys() if key not in existing]
+                    for key in missing:
+                        cursor.execute(f"ALTER TABLE goodRawData ADD {key} {columnNamesDict[key]}")
+                    if len(missing) > 0:
+                        self.backfillDerivedColumns(conn, missing)
+                        self.logger.log(self.file_object, f"Columns {', '.join(missing)} added to the table goodRawData")
+                    self.createIndexes(cursor)
+                    self.logger.log(self.file_object, "Table named goodRawData created in the database goodRawDataDb")
+
+                else:
+                    for key in columnNamesDict.keys():
+                        datatype = columnNamesDict[key]
+
+                        ## Here in try block we check if the table is existed or not and if it is then add the columns to it
+                        ## In catch block, we will create a table
+                        try:
+                            command = f"""ALTER TABLE goodRawData ADD {key} {datatype}"""
+                            cursor.execute(command)
+                        except:
+                            command = f"""CREATE TABLE goodRawData ({key} {datatype})"""
+                            cursor.execute(command)
+
+                    self.createIndexes(cursor)
+                    self.logger.log(self.file_object,"Table named goodRawData created successfully in the database goodRawDataDb")
 
-        cursor.execute(''' SELECT count(name) FROM sqlite_master WHERE type='table' AND name='goodRawData' ''')
+        except Exception as e:
+            self.logger.log(self.file_object,f"Exception occurred while creating the table inside the database named goodRawDataDb. Exception: {str(e)}")
+            raise e
 
-        f = open('TrainingLogs/DatabaseLogs.txt', 'a+')
-        try:
-            if cursor.fetchone()[0] == 1:
-                self.logger.log(f, "Table named goodRawData created in the database goodRawDataDb")
-                f.close()
-                conn.close()
+    def createIndexes(self,cursor):
 
-            else:
-                for key in columnNamesDict.keys():
-                    datatype = columnNamesDict[key]
-
-                    ## Here in try block we check if the table is existed or not and if it is then add the columns to it
-                    ## In catch block, we will create a table
-                    try:
-                        command = f"""ALTER TABLE goodRawData ADD {key} {datatype}"""
-                        cursor.execute(command)
-                    except:
-                        command = f"""CREATE TABLE goodRawData ({key} {datatype})"""
-                        cursor.execute(command)
-
-                conn.commit()
-                self.logger.log(f,"Table named goodRawData created successfully in the database goodRawDataDb")
-                f.close()
-                conn.close()
+        """
+
+        Description: This method is used to create the indexes of the table if they don't exist, on the insertion time
+        of the rows and on their airline, source and destination, so that a window of the data is read without
+        scanning the whole table.
+        Written By: Shivam Shinde
+        Version: 1.0
+        Revision: None
+        :param cursor: Cursor of the connection to the database
+        :return: None
+
+        """
+
+        cursor.execute("CREATE INDEX IF NOT EXISTS goodRawDataIngestedAt ON goodRawData (Ingested_At)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS goodRawDataRoute ON goodRawData (Airline, Source, Destination)")
+
+    def backfillDerivedColumns(self,conn,columns,batch_size=10000):
+
+        """
+
+        Description: This method is used to compute the derived columns added to an existing table for the rows staged
+        before they existed. The raw values are read batch by batch and the derived values are written back by rowid,
+        inside the transaction of the caller.
+        Written By: Shivam Shinde
+        Version: 1.0
+        Revision: None
+        :param conn: Connection with the database
+        :param columns: Names of the columns added to the table
+        :param batch_size: Number of rows derived at once
+        :return: None
+
+        """
+
+        columns = [column for column in columns if column in self.schema.derivedColumns]
+        if len(columns) == 0:
+            return
+
+        reader = conn.cursor()
+        reader.execute(f"SELECT rowid, {', '.join(self.schema.headers)} FROM goodRawData")
+        query = f"UPDATE goodRawData SET {', '.join(column + ' = ?' for column in columns)} WHERE rowid = ?"
+        for rows in iter(lambda: reader.fetchmany(batch_size), []):
+            batch = pd.DataFrame(rows, columns=['rowid'] + self.schema.headers)
+            batch = deriveColumns(batch, self.schema)[columns + ['rowid']].astype(object)
+            conn.executemany(query, batch.where(batch.notnull(), None).itertuples(index=False, name=None))
+
+
+    def insertGoodDataIntoTable(self,files,frames=None,database='goodRawDataDb',batch_size=10000,batch_id=None,
+                                manifest=None):
+
+        """
+
+        Description: This method is used to add the data into the already created table. The derived columns of every
+        file are computed once here and its rows are inserted using parameterized batches inside a single transaction,
+        which is committed once the whole file is inserted and rolled back if any of its rows fails, so a file is
+        either completely staged or not at all. A file which is not found in the parsed dataframes is read in chunks of
+        batch_size rows. Every row is tagged with the id of the batch and the time of the insertion. The file is
+        recorded in the ingestion ledger in the same transaction as its rows, so a file is never recorded as ingested
+        without its rows or staged without being recorded.
+        On Failure: Raises exception
+        Written By: Shivam Shinde
+        Version: 1.0
+        Revision: None
+        :param files: Paths of the good data files which are read and inserted in place
+        :param frames: Dictionary of the path and the dataframe parsed by the validation, the files found in it are
+        not read again
+        :param database: Name of the database into which the table is present.
+        :param batch_size: Number of rows inserted by a single executemany call
+        :param batch_id: Id of the batch of the files, a new id is created from the current time when not provided
+        :param manifest: List containing the verdict of every file, the files found in it are recorded in the ingestion
+        ledger
+        :return: None
+
+        """
+
+        ingested_at = datetime.now()
+        batch_id = batch_id if batch_id is not None else ingested_at.strftime("%Y%m%d_%H%M%S_%f")
+        ingested_at = ingested_at.isoformat(timespec='seconds')
+        columns = list(self.schema.stagedColumns)
+        entries = {entry['path']: entry for entry in manifest} if manifest is not None else dict()
+        for file in files:
+            # taking the dataframe parsed by the validation or reading the file in place in chunks
+            chunks = (deriveColumns(csv_file, self.schema)[columns]
+                      for csv_file in self.fileChunks(file, frames, batch_size))
+            self.stageFile(file, chunks, batch_id, ingested_at, entries.get(file), database, batch_size)
+
+    def stageFile(self,file,chunks,batch_id,ingested_at=None,entry=None,database='goodRawDataDb',batch_size=10000):
+
+        """
+
+        Description: This method is used to insert the rows of a file, given as chunks of rows with their derived
+        columns, inside a single transaction. The transaction is committed once all the chunks are inserted and rolled
+        back if any of the chunks fails, so the rows of a file staged as its shards are validated are rolled back when
+        one of its shards is rejected. The file is recorded in the ingestion ledger in the same transaction.
+        On Failure: Raises exception
+        Written By: Shivam Shinde
+        Version: 1.0
+        Revision: None
+        :param file: Path of the file
+        :param chunks: Iterator of the dataframes of the rows of the file with the staged columns
+        :param batch_id: Id of the batch of the file
+        :param ingested_at: Time of the insertion, the current time when not provided
+        :param entry: Entry of the file in the manifest, the file is recorded in the ingestion ledger when provided
+        :param database: Name of the database into which the table is present.
+        :param batch_size: Number of rows inserted by a single executemany call
+        :return: Number of rows inserted
+
+        """
+
+        f = self.file_object
+        ingested_at = ingested_at if ingested_at is not None else datetime.now().isoformat(timespec='seconds')
+        columns = list(self.schema.stagedColumns)
+        query = f"INSERT INTO goodRawData ({', '.join(columns + list(self.batchColumns))}) " \
+                f"values ({','.join('?' * (len(columns) + len(self.batchColumns)))})"
+        try:
+            # binding the values as python objects, the missing values are inserted as NULL
+            rows = 0
+            with self.dbConnection(database).transaction() as conn:
+                for csv_file in chunks:
+                    csv_file = csv_file.assign(Batch_Id=batch_id, Ingested_At=ingested_at)
+                    for start in range(0, len(csv_file), batch_size):
+                        batch = csv_file.iloc[start:start + batch_size].astype(object)
+                        conn.executemany(query, batch.where(batch.notnull(), None).itertuples(index=False, name=None))
+                    rows += len(csv_file)
+                if entry is not None:
+                    self.createIngestionLedger(conn.cursor())
+                    self.recordLedgerEntries(conn.cursor(), [dict(entry, rows=rows, status='good', reason=None)],
+                                             ingested_at)
+            self.logger.log(f, f"{rows} rows of the file {os.path.basename(file)} inserted into the table in the batch "
+                               f"{batch_id}")
+            return rows
 
         except Exception as e:
-            self.logger.log(f,f"Exception occurred while creating the table inside the database named goodRawDataDb. Exception: {str(e)}")
-            f.close()
-            conn.close()
+            self.logger.log(f,f"Error occurred while inserting the data of the file {os.path.basename(file)} into "
+                              f"the table. Exception: {str(e)}")
             raise e
 
+    def fileChunks(self,file,frames,chunksize):
+
+        """
+
+        Description: This method is used to get the rows of a good data file with the normalized headers, either the
+        dataframe parsed by the validation or the chunks of the file read in place.
+        Written By: Shivam Shinde
+        Version: 1.0
+        Revision: None
+        :param file: Path of the good data file
+        :param frames: Dictionary of the path and the dataframe parsed by the validation
+        :param chunksize: Number of rows read at once from the file
+        :return: Generator of the dataframes of the rows of the file
+
+        """
+
+        if frames is not None and file in frames:
+            yield frames[file]
+            return
+
+        with pd.read_csv(file, compression=compressionOf(file), chunksize=chunksize) as reader:
+            for csv_file in reader:
+                csv_file.columns = [self.schema.normalizeHeader(column) for column in csv_file.columns]
+                yield csv_file
+
+    def createIngestionLedger(self,cursor):
+
+        """
+
+        Description: This method is used to create the ingestion ledger table if it does not exist. The ledger has one
+        row for every ingested file, keyed by the hash of the content of the file.
+        Written By: Shivam Shinde
+        Version: 1.0
+        Revision: None
+        :param cursor: Cursor of the connection to the database
+        :return: None
+
+        """
+
+        cursor.execute("""CREATE TABLE IF NOT EXISTS ingestionLedger (hash TEXT PRIMARY KEY, file TEXT,
+                          ingested_at TEXT, rows INTEGER, status TEXT, reason TEXT)""")
 
-    def insertGoodDataIntoTable(self,database='goodRawDataDb'):
+    def recordLedgerEntries(self,cursor,entries,ingested_at):
 
         """
 
-        Description: This method is used to add the data into the already created table.
+        Description: This method is used to write the entries of the manifest into the ingestion ledger, replacing the
+        entry of a file whose content was rejected before.
+        Written By: Shivam Shinde
+        Version: 1.0
+        Revision: None
+        :param cursor: Cursor of the connection to the database
+        :param entries: Entries of the manifest to record
+        :param ingested_at: Time of the ingestion
+        :return: None
+
+        """
+
+        cursor.executemany("INSERT OR REPLACE INTO ingestionLedger VALUES (?, ?, ?, ?, ?, ?)",
+                           [(entry['hash'], entry['file'], ingested_at, entry['rows'], entry['status'], entry['reason'])
+                            for entry in entries])
+
+    def getIngestedFiles(self,hashes,database='goodRawDataDb'):
+
+        """
+
+        Description: This method is used to look up the content hashes in the ingestion ledger. Only the files which
+        were staged are returned, a file rejected before (e.g. because it could not be read) is validated again when it
+        is dropped again.
         On Failure: Raises exception
         Written By: Shivam Shinde
         Version: 1.0
         Revision: None
-        :param database: Name of the database into which the table is present.
+        :param hashes: Content hashes of the files to look up
+        :param database: Name of the database into which the ledger is present.
+        :return: Dictionary of the content hash and the ledger entry of the files which were already ingested
+
+        """
+
+        f = self.file_object
+        try:
+            with self.dbConnection(database).transaction() as conn:
+                self.createIngestionLedger(conn.cursor())
+
+            # looking up the hashes using the primary key, in batches below the limit of the sqlite variables
+            hashes = list(hashes)
+            ingested = dict()
+            with self.dbConnection(database).reader() as conn:
+                cursor = conn.cursor()
+                for i in range(0, len(hashes), 500):
+                    batch = hashes[i:i + 500]
+                    cursor.execute(f"SELECT hash, file, ingested_at, rows, status FROM ingestionLedger WHERE status = "
+                                   f"'good' AND hash IN ({','.join('?' * len(batch))})", batch)
+                    for hash_, file, ingested_at, rows, status in cursor.fetchall():
+                        ingested[hash_] = {'file': file, 'ingested_at': ingested_at, 'rows': rows, 'status': status}
+
+            self.logger.log(f, f"{len(ingested)} out of {len(hashes)} files found in the ingestion ledger")
+            return ingested
+
+        except Exception as e:
+            self.logger.log(f,f"Exception occurred while looking up the ingestion ledger. Exception: {str(e)}")
+            raise e
+
+    def recordIngestion(self,manifest,database='goodRawDataDb'):
+
+        """
+
+        Description: This method is used to record the bad files of the manifest in the ingestion ledger, the good
+        files being recorded by insertGoodDataIntoTable along with their rows. The verdict of a bad file is kept for
+        reference only, the file is validated again when it is dropped again. The files rejected because of their name
+        or by the pre-validation are not recorded since their content was never hashed.
+        On Failure: Raises exception
+        Written By: Shivam Shinde
+        Version: 1.0
+        Revision: None
+        :param manifest: List containing the verdict of every file
+        :param database: Name of the database into which the ledger is present.
         :return: None
 
         """
 
-        conn = self.dbConnection(database)
-        cursor = conn.cursor()
-        f = open('TrainingLogs/DatabaseLogs.txt', 'a+')
-        for file in os.listdir(self.goodDataPath):
-            try:
-                with open(self.goodDataPath + file, 'r') as p:
-                    next(p)
-                    reader = csv.reader(p,delimiter='\n')
-                    self.logger.log(f, f"{file} File loaded successfully!!")
-                    for line in enumerate(reader):
-                        for list_ in line[1]:
-                            try:
-                                cursor.execute(f"INSERT INTO goodRawData values ({list_})")
-                                conn.commit()
-                            except Exception as e:
-                                raise e
+        f = self.file_object
+        try:
+            ingested_at = datetime.now().isoformat()
+            entries = [entry for entry in manifest if entry['status'] == 'bad' and entry['hash'] is not None]
+            with self.dbConnection(database).transaction() as conn:
+                cursor = conn.cursor()
+                self.createIngestionLedger(cursor)
+                self.recordLedgerEntries(cursor, entries, ingested_at)
+
+            self.logger.log(f, f"{len(entries)} bad files recorded in the ingestion ledger")
+
+        except Exception as e:
+            self.logger.log(f,f"Exception occurred while recording the files in the ingestion ledger. Exception: {str(e)}")
+            raise e
+
+    def windowPredicate(self,window=None):
+
+        """
+
+        Description: This method is used to build the where clause selecting a window of the staged data, which is
+        pushed down to the database so that only the rows of the window are read, using the indexes of the table (the
+        rows are still read in the order of their insertion). The window is a dictionary which may have
+                    -   last_months: Number of months before now in which the rows were inserted
+                    -   since: Date (or time) from which the rows were inserted, included
+                    -   until: Date (or time) until which the rows were inserted, excluded
+                    -   airline, source, destination, batch_id: Value or list of values of the column
+        The rows inserted by the runs older than the batch columns have no insertion time, so they are never part of
+        a window on the insertion time.
+        On Failure: Raises exception
+        Written By: Shivam Shinde
+        Version: 1.0
+        Revision: None
+        :param window: Dictionary describing the window, None for the whole table
+        :return: Where clause (empty for the whole table) and the list of its parameters
+
+        """
+
+        columns = {'airline': 'Airline', 'source': 'Source', 'destination': 'Destination', 'batch_id': 'Batch_Id'}
+        conditions, params = [], []
+        for key, value in (window or dict()).items():
+            if value is None:
+                continue
+            if key == 'last_months':
+                conditions.append("Ingested_At >= ?")
+                params.append((pd.Timestamp.now() - pd.DateOffset(months=int(value))).isoformat(timespec='seconds'))
+            elif key == 'since':
+                conditions.append("Ingested_At >= ?")
+                params.append(str(value))
+            elif key == 'until':
+                conditions.append("Ingested_At < ?")
+                params.append(str(value))
+            elif key in columns:
+                values = [value] if isinstance(value, str) else list(value)
+                conditions.append(f"{columns[key]} IN ({','.join('?' * len(values))})")
+                params.extend(values)
+            else:
+                raise ValueError(f"Unknown key {key} in the window of the data")
 
-            except Exception as e:
-                conn.rollback()
-                shutil.move(self.goodDataPath+file,self.badDataPath)
-                self.logger.log(f,f"Error occurred while inserting the data into the table. Exception: {str(e)}")
-                f.close()
-                conn.close()
-                raise e
+        return (" WHERE " + " AND ".join(conditions) if len(conditions) > 0 else ""), params
 
-            f.close()
-            conn.close()
+    def getDataFromDbTable(self,database='goodRawDataDb',batch_size=10000,snapshot=False,window=None):
 
+        """
 
+        Description: This method is used to fetch the data from the table inside the database as a dataframe which is
+        handed to the next stage in the memory, without writing it into a csv file. The rows are fetched in batches and
+        copied into typed column arrays allocated for the whole table, so only one batch of the rows is held as python
+        tuples at a time. Only the rows of the window are read when a window is given. A columnar snapshot of the data
+        can also be saved on the disk.
+        On Failure: Raises exception
+        Written By: Shivam Shinde
+        Version: 1.0
+        Revision: None
+        :param database: The name of the database into which the table is present.
+        :param batch_size: Number of rows fetched at once
+        :param snapshot: Whether a columnar snapshot of the data is saved on the disk
+        :param window: Dictionary describing the window of the data as understood by windowPredicate, None for the
+        whole table
+        :return: Dataframe containing the data of the table
 
-    def getDataFromDbTableIntoCSV(self,database='goodRawDataDb'):
+        """
+
+        f = self.file_object
+
+        try:
+            # reading the raw and derived columns of the rows in the window, the batch columns are not handed over
+            where, params = self.windowPredicate(window)
+            headers = list(self.schema.stagedColumns)
+            numeric = [column in self.schema.stagedNumericColumns for column in headers]
+            with self.dbConnection(database).reader() as conn:
+                cursor = conn.cursor()
+                # counting and reading the rows in one read transaction so that both see the same snapshot of the
+                # table, even when rows are inserted in between
+                cursor.execute("BEGIN")
+                rows = cursor.execute(f"SELECT count(*) FROM goodRawData{where}", params).fetchone()[0]
+                cursor.execute(f"SELECT {', '.join(headers)} FROM goodRawData{where} ORDER BY rowid", params)
+
+                # allocating the arrays of the whole table once and filling them batch by batch
+                arrays = [np.empty(rows, dtype=float if isNumeric else object) for isNumeric in numeric]
+                filled = 0
+                while True:
+                    batch = cursor.fetchmany(batch_size)
+                    if len(batch) == 0:
+                        break
+                    for array, column, values in zip(arrays, headers, zip(*batch)):
+                        array[filled:filled + len(batch)] = self.columnArray(column, values)
+                    filled += len(batch)
+
+            # integer columns without any missing value are kept as integers
+            data = dict()
+            for array, column, isNumeric in zip(arrays, headers, numeric):
+                array = array[:filled]
+                if isNumeric and self.schema.stagedNumericColumns[column] in ('INTEGER', 'INT') and \
+                        not np.isnan(array).any():
+                    array = array.astype(np.int64)
+                data[column] = array
+            data = pd.DataFrame(data, columns=headers, copy=False)
+
+            self.logger.log(f,f"{len(data)} rows fetched from the database into the memory"
+                              f"{' for the window ' + str(window) if window else ''}")
+            if snapshot:
+                self.logger.log(f,f"Columnar snapshot of the data saved at {self.saveColumnarSnapshot(data)}")
+            return data
+
+        except Exception as e:
+            self.logger.log(f,f"Exception occurred while fetching the data from the database. Exception: {str(e)}")
+            raise e
+
+    def columnArray(self,column,values):
+
+        """
+
+        Description: This method is used to convert a batch of the values of a column into a typed array. The numeric
+        columns become float arrays with NaN for the missing values, the other columns become object arrays in which the
+        missing values (stored as NULL, or as the text 'nan' by the older runs) are NaN, exactly like the exported csv
+        file is read by pandas.
+        Written By: Shivam Shinde
+        Version: 1.0
+        Revision: None
+        :param column: Name of the column
+        :param values: Values of the column in the batch
+        :return: Typed array of the values
+
+        """
+
+        if column in self.schema.stagedNumericColumns:
+            return np.array([np.nan if value is None else value for value in values], dtype=float)
+        return np.array([np.nan if value is None or value == 'nan' else value for value in values], dtype=object)
+
+    def saveColumnarSnapshot(self,data):
+
+        """
+
+        Description: This method is used to save a columnar snapshot of the data fetched from the database. The
+        snapshot is saved as a parquet file when pyarrow is installed and as a pickled dataframe otherwise.
+        Written By: Shivam Shinde
+        Version: 1.0
+        Revision: None
+        :param data: Dataframe containing the data of the table
+        :return: Path of the snapshot
+
+        """
+
+        fileFromDb = "Training_fileFromDb/"
+        if not os.path.isdir(fileFromDb):
+            os.makedirs(fileFromDb)
+
+        try:
+            data.to_parquet(fileFromDb + "inputFile.parquet", index=False)
+            return fileFromDb + "inputFile.parquet"
+        except ImportError:
+            data.to_pickle(fileFromDb + "inputFile.pkl")
+            return fileFromDb + "inputFile.pkl"
+
+    def getDataFromDbTableIntoCSV(self,database='goodRawDataDb',window=None):
 
 
         """
@@ -166,44 +601,40 @@ class DBOperations:
         Version: 1.0
         Revision: None
         :param database: The name of the database into which the table is present.
+        :param window: Dictionary describing the window of the data as understood by windowPredicate, None for the
+        whole table
         :return: None
 
         """
 
         self.fileFromDb = "Training_fileFromDb/"
         self.fileName = "inputFile.csv"
-        f = open('TrainingLogs/DatabaseLogs.txt', 'a+')
+        f = self.file_object
 
         try:
-            conn = self.dbConnection()
-            cursor = conn.cursor()
-
-            query = "SELECT * FROM goodRawData"
-            cursor.execute(query)
-
-            results = cursor.fetchall()
-
-            headers = [i[0] for i in cursor.description]
+            where, params = self.windowPredicate(window)
+            headers = list(self.schema.stagedColumns)
+            query = f"SELECT {', '.join(headers)} FROM goodRawData{where} ORDER BY rowid"
 
             # Make the CSV output directory
             if not os.path.isdir(self.fileFromDb):
                 os.makedirs(self.fileFromDb)
 
-            # Open CSV file for writing.
-            csvfile = csv.writer(open(self.fileFromDb + self.fileName, 'w', newline=''), delimiter=',',
-                                 lineterminator='\r\n', quoting=csv.QUOTE_ALL, escapechar='\\')
-
-            # Add the headers and data to the CSV file.
-            csvfile.writerow(headers)
-            csvfile.writerows(results)
+            # Open CSV file for writing and add the headers and the data to it batch by batch.
+            with self.dbConnection(database).reader() as conn, \
+                    open(self.fileFromDb + self.fileName, 'w', newline='') as output:
+                cursor = conn.cursor()
+                cursor.execute(query, params)
+                csvfile = csv.writer(output, delimiter=',', lineterminator='\r\n', quoting=csv.QUOTE_ALL,
+                                     escapechar='\\')
+                csvfile.writerow(headers)
+                for rows in iter(lambda: cursor.fetchmany(10000), []):
+                    csvfile.writerows(rows)
 
             self.logger.log(f,"File exported successfully!!")
-            f.close()
-            conn.close()
 
         except Exception as e:
             self.logger.log(f,f"Exception occurred while exporting the data file from the database. Exception: {str(e)}")
-            f.close()
             raise e
 
 
@@ -1,6 +1,7 @@
 import os
 import re
 import warnings
+from datetime import datetime
 
 import numpy as np
 import pandas as pd
@@ -12,6 +13,7 @@ from sklearn.preprocessing import OrdinalEncoder, StandardScaler
 
 from Logging.logging import Logger
 from Training_data_ingestion.data_loading_train import DataGetter
+from model_methods.model_methods import modelMethods
 
 warnings.simplefilter(action='ignore', category=FutureWarning)
 
@@ -28,10 +30,25 @@ class PreprocessingMethods:
     Revision: None
     """
 
-    def __init__(self):
+    def __init__(self, dataframe=None, audit=False, window=None):
         self.logger_obj = Logger()
         self.file_object = open("TrainingLogs/preprocessingLogs.txt", "a+")
-        self.df = DataGetter(self.file_object, self.logger_obj).getData().copy()
+
+        # the data handed in the memory by the database stage is used when it is given, otherwise the csv file exported
+        # from the database is read. The preprocessed X and y are written into the csv files only when the run is read
+        # from the disk or audited. A window of the staged data is read from the database when it is given.
+        self.inMemory = dataframe is not None
+        self.audit = audit
+        if self.inMemory:
+            self.df = dataframe.reset_index(drop=True)
+        else:
+            self.df = DataGetter(self.file_object, self.logger_obj, window).getData().copy()
+        self.XPreprocessed = None
+        self.yPreprocessed = None
+
+        # state learned from the training data which is saved in the preprocessing bundle for the prediction
+        self.outlierBounds = dict()
+        self.droppedColumns = []
 
     def removeUnnecessaryFeatureColumn(self, column_name):
 
@@ -218,6 +235,53 @@ class PreprocessingMethods:
                                 f"Exception: {str(e)}")
             raise e
 
+    def hasDerivedColumns(self):
+
+        """
+        Description: This method is used to check whether the data has the typed columns derived from the raw values
+        when it was staged into the database. The json records predicted in the memory don't have them.
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :return: True if the data has the derived columns, False otherwise
+        """
+
+        return all(column in self.df.columns for column in ['Day_of_Journey', 'Month_of_Journey', 'Year_of_Journey',
+                                                            'Flight_Duration', 'Number_of_Stops'])
+
+    def usingDerivedColumns(self):
+
+        """
+        Description: This method is used to replace the raw Date_of_Journey, Duration and Total_Stops columns by the
+        typed columns derived from them when the data was staged into the database, instead of parsing the raw values
+        again. The day, month and year of the journey and the flight duration in minutes are used as they are and the
+        number of stops becomes the Total_Stops column.
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :return: None
+        """
+
+        try:
+            for column in ['Date_of_Journey', 'Duration', 'Total_Stops']:
+                self.removeUnnecessaryFeatureColumn(column)
+            self.df.rename(columns={'Number_of_Stops': 'Total_Stops'}, inplace=True)
+            self.logger_obj.log(self.file_object, "Using the day, month and year of journey, flight duration and "
+                                                  "number of stops derived when the data was staged")
+
+        except Exception as e:
+            self.logger_obj.log(self.file_object,
+                                f"Exception occurred while using the derived columns. Exception: {str(e)}")
+            raise e
+
     def removingdDuplicateRows(self):
 
         """
@@ -318,9 +382,13 @@ class PreprocessingMethods:
         """
 
         try:
-            # correcting the typos in the Additional_Info column of the dataframe
-            self.df['Additional_Info'] = np.where(self.df['Additional_Info'] == "No Info", "No info",
-                                                  self.df['Additional_Info'])
+            # the Additional_Info normalized when the data was staged replaces the raw one, otherwise correcting the
+            # typos in the Additional_Info column of the dataframe
+            if 'Additional_Info_Normalized' in self.df.columns:
+                self.df['Additional_Info'] = self.df.pop('Additional_Info_Normalized')
+            else:
+                self.df['Additional_Info'] = np.where(self.df['Additional_Info'] == "No Info", "No info",
+                                                      self.df['Additional_Info'])
             self.logger_obj.log(self.file_object, "Successfully corrected the typos in the Additional_Info column..")
         except Exception as e:
             self.logger_obj.log(self.file_object,
@@ -351,6 +419,7 @@ class PreprocessingMethods:
                 Q1 = self.df[feature].quantile(0.25)
                 Q3 = self.df[feature].quantile(0.75)
                 IQR = Q3 - Q1
+                self.outlierBounds[feature] = (Q1 - 1.45 * IQR, Q3 + 1.45 * IQR)
                 # replacing the outliers in the numerical column using the null value
                 self.df[feature] = np.where(self.df[feature] > (Q3 + 1.45 * IQR), np.nan, self.df[feature])
                 self.df[feature] = np.where(self.df[feature] < (Q1 - 1.45 * IQR), np.nan, self.df[feature])
@@ -384,6 +453,7 @@ class PreprocessingMethods:
             for feature in num_feat:
                 if self.df[feature].var() == 0:
                     self.removeUnnecessaryFeatureColumn(feature)
+                    self.droppedColumns.append(feature)
 
         except Exception as e:
             self.logger_obj.log(self.file_object,
@@ -407,6 +477,7 @@ class PreprocessingMethods:
         try:
             self.logger_obj.log(self.file_object, "Removing Year_of_Journey column from the dataframe")
             self.removeUnnecessaryFeatureColumn("Year_of_Journey")
+            self.droppedColumns.append("Year_of_Journey")
 
         except  Exception as e:
             pass
@@ -492,18 +563,33 @@ class PreprocessingMethods:
             ])
 
             # fitting and transforming the X using full_pipeline and then returning it
-            XPreprocessed = pd.DataFrame(full_pipeline.fit_transform(X),
-                                         columns=["Total_Stops", "Day_of_Journey", "Month_of_Journey",
-                                                  "Flight_Duration",
-                                                  "Airline", "Source", "Destination", "Additional_Info"])
-
-            yDataframe = pd.DataFrame(y, columns=['Price'])
-
-            if not os.path.exists("Training_PreprocessedData/"):
-                os.makedirs("Training_PreprocessedData/")
-
-            XPreprocessed.to_csv("Training_PreprocessedData/XPreprocessed.csv", header=True, index=False)
-            y.to_csv("Training_PreprocessedData/yDataframe.csv", header=True, index=False)
+            featureColumns = ["Total_Stops", "Day_of_Journey", "Month_of_Journey", "Flight_Duration",
+                              "Airline", "Source", "Destination", "Additional_Info"]
+            XPreprocessed = pd.DataFrame(full_pipeline.fit_transform(X), columns=featureColumns)
+
+            # keeping the fitted pipeline along with the outlier bounds and dropped columns so that the prediction
+            # data is transformed using exactly the same state as the training data, the bundle is saved along with
+            # the models once they are trained
+            self.preprocessingBundle = {
+                'bundleVersion': modelMethods.preprocessingBundleVersion,
+                'createdAt': datetime.now().isoformat(),
+                'columnTransformer': full_pipeline,
+                'outlierBounds': self.outlierBounds,
+                'droppedColumns': self.droppedColumns,
+                'featureColumns': featureColumns
+            }
+            self.logger_obj.log(self.file_object, "Created the fitted preprocessing bundle")
+
+            # keeping the preprocessed X and y in the memory, y is aligned with the rows of X
+            self.XPreprocessed = XPreprocessed
+            self.yPreprocessed = pd.DataFrame({'Price': np.asarray(y)})
+
+            if not self.inMemory or self.audit:
+                if not os.path.exists("Training_PreprocessedData/"):
+                    os.makedirs("Training_PreprocessedData/")
+
+                XPreprocessed.to_csv("Training_PreprocessedData/XPreprocessed.csv", header=True, index=False)
+                y.to_csv("Training_PreprocessedData/yDataframe.csv", header=True, index=False)
 
         except Exception as e:
             self.logger_obj.log(self.file_object, f"Exception occurred while implementing the data preprocessing "
@@ -514,7 +600,8 @@ class PreprocessingMethods:
     def getPreprocessedXAndy(self):
 
         """
-        Description: This method is used to get the preprocessed X and y
+        Description: This method is used to get the preprocessed X and y, from the memory when the data was handed in
+        the memory and from the csv files otherwise
 
         Written By: Shivam Shinde
 
@@ -525,6 +612,9 @@ class PreprocessingMethods:
         """
         try:
             self.logger_obj.log(self.file_object, "Exporting preprocessed X and y")
+            if self.inMemory:
+                return self.XPreprocessed, self.yPreprocessed
+
             X = pd.read_csv("Training_PreprocessedData/XPreprocessed.csv")
             y = pd.read_csv("Training_PreprocessedData/yDataframe.csv")
 
@@ -17,11 +17,14 @@ class Preprocessor:
     Revision: None
     """
 
-    def __init__(self):
+    def __init__(self, dataframe=None, audit=False, window=None):
         self.logger_obj = Logger()
-        self.process_data = PreprocessingMethods()
+        self.process_data = PreprocessingMethods(dataframe, audit, window)
         self.file_object = open("TrainingLogs/preprocessingLogs.txt", "a+")
 
+        # fitted preprocessing state, saved by the training along with the models
+        self.preprocessingBundle = None
+
     def preprocess(self):
         """
         Description: This method will implement all the preprocessing techniques on the date to make the data clean
@@ -41,18 +44,24 @@ class Preprocessor:
             self.process_data.removeUnnecessaryFeatureColumn('Dep_Time')
             self.process_data.removeUnnecessaryFeatureColumn('Arrival_Time')
 
-            # changing the datatype of the datetime column i.e. Date_of_Journey from string to datetime
-            self.process_data.datatypeToDatetime('Date_of_Journey')
+            if self.process_data.hasDerivedColumns():
+                # using the day, month and year of journey, flight duration and number of stops derived when the data
+                # was staged
+                self.process_data.usingDerivedColumns()
+
+            else:
+                # changing the datatype of the datetime column i.e. Date_of_Journey from string to datetime
+                self.process_data.datatypeToDatetime('Date_of_Journey')
 
-            # splitting the datetime column into three newly created columns
-            self.process_data.splittingDatetimeColumnIntoThree('Date_of_Journey')
+                # splitting the datetime column into three newly created columns
+                self.process_data.splittingDatetimeColumnIntoThree('Date_of_Journey')
 
-            # converting the duration of flight into minutes and then creating a new column for it while removing the
-            # original one
-            self.process_data.convertDurationIntoMinutes()
+                # converting the duration of flight into minutes and then creating a new column for it while removing
+                # the original one
+                self.process_data.convertDurationIntoMinutes()
 
-            # converting the Total_Stop column values into the integer from the string
-            self.process_data.makeTotalStopsInteger()
+                # converting the Total_Stop column values into the integer from the string
+                self.process_data.makeTotalStopsInteger()
 
             # removing the duplicate rows from the dataframe
             self.process_data.removingdDuplicateRows()
@@ -74,6 +83,7 @@ class Preprocessor:
 
             # getting preprocessed X and y
             X,y = self.process_data.getPreprocessedXAndy()
+            self.preprocessingBundle = self.process_data.preprocessingBundle
 
             self.logger_obj.log(self.file_object,
                                 f"Preprocessing of the data finished successfully!!")
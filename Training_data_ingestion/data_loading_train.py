@@ -1,5 +1,7 @@
 import pandas as pd
 
+from Training_DB_Operations.dataInsertionIntoDB import DBOperations
+
 class DataGetter:
 
     """
@@ -9,16 +11,20 @@ class DataGetter:
     Revision: None
     """
 
-    def __init__(self, fileObject, loggerObject):
+    def __init__(self, fileObject, loggerObject, window=None):
         self.fileObject = fileObject
         self.loggerObject = loggerObject
         self.trainingData = "Training_fileFromDb/inputFile.csv"
 
+        # window of the staged data (e.g. {'last_months': 6} or {'airline': 'IndiGo'}) read from the database
+        self.window = window
+
     def getData(self):
 
         """
 
-        Description: This method is used to read the data file from the provided location.
+        Description: This method is used to read the data file from the provided location. When a window is given,
+        only the rows of the window are read from the database, the window being pushed down to it as a where clause.
 
         On failure: Raises an exception
 
@@ -34,7 +40,11 @@ class DataGetter:
 
         self.loggerObject.log(self.fileObject, "Entered the getData method of DataGetter class")
         try:
-            self.data = pd.read_csv(self.trainingData)
+            if self.window:
+                with DBOperations() as db_operations:
+                    self.data = db_operations.getDataFromDbTable(window=self.window)
+            else:
+                self.data = pd.read_csv(self.trainingData)
             self.loggerObject.log(self.fileObject,"Successfully loaded the data using getData method of DataGetter class")
             self.loggerObject.log(self.fileObject, "Exiting the getData method of DataGetter class")
             return self.data
@@ -1,12 +1,12 @@
-import json
 import os
 import re
 import shutil
 from datetime import datetime
 
-import pandas as pd
-
 from Logging.logging import Logger
+from Raw_Data_Validation.rawDataValidator import fileContentHashes, invalidFileNameReason, precheckFiles, \
+    saveValidationManifest, validateFiles
+from Raw_Data_Validation.schemaValidator import compileSchema
 
 
 class rawDataValidation:
@@ -22,11 +22,26 @@ class rawDataValidation:
 
     """
 
-    def __init__(self,path):
+    def __init__(self,path,batch_id=None,sampling=None):
         self.Batch_Directory = path
         self.logger = Logger()
         self.schema = "Training_Schema_json_file/schema_training.json"
 
+        # verdict of every source file of the batch directory, the files are validated and inserted in place, saved
+        # in the validation manifest of the batch so that the runs never overwrite each other's manifest
+        self.manifest = []
+        batch_id = batch_id if batch_id is not None else datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        self.manifestFile = os.path.join('Training_raw_data_validated', f"validationManifest_{batch_id}.json")
+
+        # parsed dataframes of the good files, kept only when they are handed to the next stage in the memory
+        self.goodData = dict()
+
+        # sampling parameters of the pre-validation of the large files (sample_rows, probes, probe_rows and
+        # prevalidation_bytes), the defaults of the validator when not provided, and the paths of the files whose
+        # header and sample were already checked
+        self.sampling = sampling
+        self.prechecked = set()
+
     def valuesFromSchema(self):
 
         """
@@ -44,14 +59,13 @@ class rawDataValidation:
         """
 
         try:
-            with open(self.schema, 'r') as f:
-                dict1 = json.load(f)
+            # the schema is read and compiled only once by the process
+            schema = compileSchema(self.schema)
 
-            pattern = dict1['SampleFileName']
-            LengthOfDateStampInFile  = dict1['LengthOfDateStampInFile']
-            LengthOfTimeStampInFile = dict1['LengthOfTimeStampInFile']
-            NumberOfColumns = dict1['NumberOfColumns']
-            ColumnNames = dict1['ColumnNames']
+            LengthOfDateStampInFile = schema.lengthOfDateStampInFile
+            LengthOfTimeStampInFile = schema.lengthOfTimeStampInFile
+            NumberOfColumns = schema.numberOfColumns
+            ColumnNames = schema.columnNames
 
             l = open('TrainingLogs/valuesFromSchemaLog.txt','a+')
             message = f"Length of datestamp and timestamp in the file: {LengthOfDateStampInFile} and {LengthOfTimeStampInFile}, number of columns in the data: {NumberOfColumns}"
@@ -83,123 +97,24 @@ class rawDataValidation:
         Version: 1.0
         Revision: None
 
-        :return: Python regular expression
+        :return: Compiled python regular expression
 
         """
 
         try:
-            regex = r"flight\_fare\_\d{8}\_\d{6}\.csv"
-            return regex
+            # regular expression compiled from the sample file name and the lengths of the date and time stamps
+            return compileSchema(self.schema).fileNameRegex
 
         except Exception as e:
             raise e
 
-    def createDirectoryForGoodAndBadRawData(self):
-
-        """
-
-        Description: This method is used to create directory for the good (data which passed the validation) and bad
-        date (data which did not pass the validation)
-
-        Raises: Exception on failure
-
-        Writen by: Shivam Shinde
-
-        Version: 1.0
-
-        Revision: None
-
-        """
-        try:
-            path = os.path.join('Training_raw_data_validated/','GoodData/')
-            if not os.path.isdir(path):
-                os.makedirs(path)
-
-            path = os.path.join('Training_raw_data_validated/','BadData/')
-            if not os.path.isdir(path):
-                os.makedirs(path)
-
-        except OSError as oe:
-            f = open('TrainingLogs/GeneralLogs.txt','a+')
-            message = f"Exception occurred while creating directories for the bad and good training validated data. Exception: {str(oe)}"
-            self.logger.log(f,message)
-            f.close()
-            raise oe
-
-    def deleteExistingGoodRawTrainingDataFolder(self):
-
-        """
-
-        Description: This method is used to delete the directory of the raw good (data which passed the validation)
-        training data
-
-        Raises: Exception on failure
-
-        Writen By: Shivam Shinde
-
-        Version: 1.0
-
-        Revision: None
-
-        """
-
-        try:
-            path = 'Training_raw_data_validated/'
-            if os.path.isdir(os.path.join(path,'GoodData/')):
-                shutil.rmtree(os.path.join(path,'GoodData/'))
-
-            f = open("TrainingLogs/GeneralLogs.txt", "a+")
-            message = "Deleted the folder for good raw training data successfully."
-            self.logger.log(f,message)
-            f.close()
-
-        except OSError as oe:
-            f = open("TrainingLogs/GeneralLogs.txt", "a+")
-            message = f"Exception occurred while deleting the folder for good raw training data. Exception: {str(oe)}"
-            self.logger.log(f, message)
-            f.close()
-            raise oe
-
-    def deleteExistingBadRawTrainingDataFolder(self):
-
-        """
-
-        Description: This method is used to delete the directory of the raw bad (data which did not pass the
-        validation) training data
-
-        Raises: Exception on failure
-
-        Writen By: Shivam Shinde
-
-        Version: 1.0
-
-        Revision: None
-
-        """
-
-        try:
-            path = 'Training_raw_data_validated/'
-            if os.path.isdir(os.path.join(path, 'BadData/')):
-                shutil.rmtree(os.path.join(path, 'BadData/'))
-
-            f = open("TrainingLogs/GeneralLogs.txt", "a+")
-            message = "Deleted the folder for bad raw training data successfully."
-            self.logger.log(f, message)
-            f.close()
-
-        except OSError as oe:
-            f = open("TrainingLogs/GeneralLogs,txt", "a+")
-            message = f"Exception occurred while deleting the folder for bad raw training data. Exception: {str(oe)}"
-            self.logger.log(f, message)
-            f.close()
-            raise oe
-
-
     def moveBadDataFilesToArchievedBad(self):
 
         """
 
-        Description: This method is used to move the bad training data files to the archived bad data folder.
+        Description: This method is used to archive the bad training data files of the manifest into the archived bad
+        data folder. The files are hard linked into the archive so that their content is not copied, and copied only
+        when they can not be linked. The client files are left in place.
 
         Raises: Exception on failure
 
@@ -214,34 +129,31 @@ class rawDataValidation:
         date = now.date()
         time = now.strftime("%H%M%S")
         try:
-            source = 'Training_raw_data_validated/BadData/'
-            if os.path.isdir(source):
-
-                path = 'TrainingRawBadDataArchived/'
-                if not os.path.isdir(path):
-                    os.makedirs(path)
+            bad_files = [entry for entry in self.manifest if entry['status'] == 'bad']
+            if len(bad_files) > 0:
 
                 destination = 'TrainingRawBadDataArchived/BadData_' + str(date) + "_" + str(time)
                 if not os.path.isdir(destination):
                     os.makedirs(destination)
 
-                files = os.listdir(source)
-                for f in files:
-                    if f not in os.listdir(destination):
-                        shutil.move(source + f,destination)
-                p = open('TrainingLogs/GeneralLogs.txt','a+')
-                self.logger.log(p,"Bad data file were successfully moved from training raw data folder to the archived bad foler")
-                p.close()
+                for entry in bad_files:
+                    target = os.path.join(destination, entry['file'])
+                    if os.path.exists(target):
+                        continue
+                    # the client file is never moved out of its folder, it is copied when it can't be linked (e.g. when
+                    # the client folder is on another filesystem)
+                    try:
+                        os.link(entry['path'], target)
+                    except OSError:
+                        shutil.copy2(entry['path'], target)
 
-                if os.path.isdir(source):
-                    shutil.rmtree(source)
                 p = open('TrainingLogs/GeneralLogs.txt','a+')
-                self.logger.log(p,"Bad data folder from training raw data folder deleted successfully.")
+                self.logger.log(p,f"{len(bad_files)} bad data files were successfully archived into the archived bad folder")
                 p.close()
 
         except OSError as oe:
             p = open('TrainingLogs/GeneralLogs.txt', 'a+')
-            self.logger.log(p,"Exception occurred while moving the bad data files from training raw data folder to the archived bad data folder")
+            self.logger.log(p,f"Exception occurred while archiving the bad training data files. Exception: {str(oe)}")
             p.close()
             raise oe
 
@@ -249,7 +161,8 @@ class rawDataValidation:
     def validateTrainingDataFileName(self,regex):
 
         """
-        Description: This method is used to validate the data file name provided by the client.
+        Description: This method is used to validate the data file name provided by the client. Every file of the batch
+        directory is added to the manifest, the files with an invalid name are marked as bad. The files are not copied.
 
         Written By: Shivam Shinde
 
@@ -264,29 +177,26 @@ class rawDataValidation:
 
         """
 
-        ## Deleting the good and bad data folders in case previous execution failed
-        self.deleteExistingGoodRawTrainingDataFolder()
-        self.deleteExistingBadRawTrainingDataFolder()
-
-        raw_data_files = [f for f in os.listdir(self.Batch_Directory)]
+        raw_data_files = [f for f in sorted(os.listdir(self.Batch_Directory))
+                          if os.path.isfile(os.path.join(self.Batch_Directory, f))]
 
         f = open('TrainingLogs/RawDataFileNameValidation.txt', 'a+')
 
         try:
+            self.manifest = []
             for file in raw_data_files:
-
-                ## creating new directories for good and bad data
-                self.createDirectoryForGoodAndBadRawData()
+                entry = {'file': file, 'path': os.path.join(self.Batch_Directory, file), 'hash': None, 'status': None,
+                         'reason': None, 'rows': 0, 'columns': 0}
 
                 if re.match(regex, file):
-                    shutil.copy(f"{self.Batch_Directory}/{file}", "Training_raw_data_validated/GoodData/")
-                    self.logger.log(f, "Valid file name! File moved to the good data folder")
-                    self.logger.log(f, "The validation for the data file name passed!")
-                    f.close()
+                    self.logger.log(f, f"Valid file name! The validation for the data file name of the file {file} passed!")
                 else:
-                    shutil.copy(f"{self.Batch_Directory}/{file}", "Training_raw_data_validated/BadData/")
-                    self.logger.log(f, "Invalid file name! File moved to the bad data folder")
-                    f.close()
+                    entry['status'] = 'bad'
+                    entry['reason'] = invalidFileNameReason
+                    self.logger.log(f, f"Invalid file name! File {file} marked as bad data")
+                self.manifest.append(entry)
+
+            f.close()
 
         except Exception as e:
             self.logger.log(f, f"Exception occurred while validating the file name. Exception: {str(e)}")
@@ -295,11 +205,17 @@ class rawDataValidation:
 
 
 
-    def validateNumberOfColumns(self,numColumns):
+    def validateGoodDataFiles(self, workers=None, keep_data=False, stage=None):
 
         """
 
-        Description: This method is used to validate the number of columns in the data provided by the client.
+        Description: This method is used to validate, in place, every file of the manifest whose name is valid. Every
+        file is parsed only once to check the number of columns, the columns with all the missing values and the date
+        format and to normalize its headers. The files are validated in parallel by a pool of worker processes. The path,
+        the content hash and the verdict of every file are saved in the validation manifest. When keep_data is True, the
+        parsed dataframes of the good files are kept in goodData so that the next stage does not parse them again. The
+        rows of a large file validated in shards are never kept, they are handed to the staging function shard by shard
+        as the shards are validated.
 
         Written By: Shivam Shinde
 
@@ -307,38 +223,53 @@ class rawDataValidation:
 
         Revision: None
 
-        :param numColumns: This parameter is used to match the number of columns in the date.
+        :param workers: Number of worker processes used for the validation, number of cpus when not provided
+        :param keep_data: Whether the parsed dataframes of the good files are kept in the memory
+        :param stage: Function staging the rows of a file validated in shards, called with the path of the file and the
+        generator of the rows of its shards
 
-        :return: None
+        :return: List containing the verdict of every file of the manifest
 
         """
 
-        f = open("TrainingLogs/numberOfColumnsValidation.txt","a+")
-        self.logger.log(f,"Enter the method used for the validation of number of columns in the data")
+        f = open('TrainingLogs/rawDataValidationLogs.txt', 'a+')
         try:
-            for file in os.listdir('Training_raw_data_validated/GoodData/'):
-                csv_file = pd.read_csv('Training_raw_data_validated/GoodData/' + file)
-                if csv_file.shape[1] == numColumns:
-                    self.logger.log(f,"Validation for number of columns in the data passed!")
-                    pass
-                else:
-                    self.logger.log(f,"Validation for number of columns failed!")
-                    self.logger.log(f,"Moving the file to the bad data folder!")
-                    shutil.move('Training_raw_data_validated/GoodData/' + file, 'Training_raw_data_validated/BadData/')
-                    self.logger.log(f,"File moved to the bad data folder")
+            self.hashFiles()
+
+            pending = [entry['path'] for entry in self.manifest if entry['status'] is None]
+            verdicts = iter(validateFiles(self.schema, 'TrainingLogs/rawDataValidationLogs.txt', pending, workers,
+                                          keep_data, stage=stage, sampling=self.sampling, prechecked=True))
+
+            self.goodData = dict()
+            for i, entry in enumerate(self.manifest):
+                if entry['status'] is None:
+                    verdict, csv_file = next(verdicts)
+                    self.manifest[i] = dict(entry, **verdict)
+                    if csv_file is not None:
+                        self.goodData[entry['path']] = csv_file
+                if self.manifest[i]['status'] == 'bad':
+                    self.logger.log(f, f"File {entry['file']} is bad data. Reason: {self.manifest[i]['reason']}")
+
+            saveValidationManifest(self.manifest, self.manifestFile)
+
+            self.logger.log(f, f"Single pass validation finished. Good files: "
+                               f"{sum(v['status'] == 'good' for v in self.manifest)}, bad files: "
+                               f"{sum(v['status'] == 'bad' for v in self.manifest)}")
             f.close()
+            return self.manifest
+
         except Exception as e:
-            self.logger.log(f,"Exception occurred while validating the number of columns in the data. Exception:"+ str(e))
+            self.logger.log(f, f"Exception occurred in the single pass validation of the files. Exception: {str(e)}")
             f.close()
             raise e
 
-
-    def validateMissingValuesInWholeColumn(self):
+    def precheckFiles(self):
 
         """
 
-        Description: This method is used to check if any file in good data folder has any column with all the missing
-        value.
+        Description: This method is used to check the header and a sample of the rows of every file of the manifest
+        which is still to be validated, before the file is hashed and parsed. The files rejected by the check are marked
+        as bad in the manifest.
 
         Written By: Shivam Shinde
 
@@ -346,41 +277,49 @@ class rawDataValidation:
 
         Revision: None
 
-        :return: None
+        :return: Number of rejected files
 
         """
 
-        f = open('TrainingLogs/columnWithAllMissingValuesValidation.txt','a+')
-        self.logger.log(f,"Validation of files containing the columns with all missing values started")
-        try:
-            for file in os.listdir('Training_raw_data_validated/GoodData/'):
-                csv_file = pd.read_csv('Training_raw_data_validated/GoodData/' + file)
-                columns = csv_file.columns
-                for column in columns:
-                    noOfMissingValues = csv_file[column].isnull().sum()
-                    if noOfMissingValues == csv_file.shape[0]:
-                        self.logger.log(f,"Columns with all missing values validation failed for the  file:" + str(file))
-                        self.logger.log(f,"Moving the file " + str(file) + " from good data folder to bad data folder")
-                        shutil.move('Training_raw_data_validated/GoodData/' + file, 'Training_raw_data_validated/BadData/')
-                        self.logger.log(f,'Moved the file ' + str(file) +  'from good data folder to bad data folder')
-                        break
-                    else:
-                        pass
-                self.logger.log(f, f"There are no columns with all missing values in the file {file} provided by the client")
-            f.close()
+        pending = [entry['path'] for entry in self.manifest
+                   if entry['status'] is None and entry['path'] not in self.prechecked]
+        rejected = precheckFiles(self.schema, 'TrainingLogs/rawDataValidationLogs.txt', pending, self.sampling)
+        self.prechecked.update(pending)
+        for i, entry in enumerate(self.manifest):
+            if entry['path'] in rejected and entry['status'] is None:
+                self.manifest[i] = dict(entry, **rejected[entry['path']])
+        return len(rejected)
 
-        except Exception as e:
-            self.logger.log(f,"Exception occurred in the validation of files with columns with all the missing values. Exception: " + str(e))
-            f.close()
-            raise e
+    def hashFiles(self):
 
+        """
 
+        Description: This method is used to compute the content hash of every file of the manifest which is not hashed
+        yet and is still to be validated. The files are checked by the pre-validation first, so the files rejected by
+        their name or by the pre-validation are never read completely. The blocks of the large files are hashed in parallel.
 
-    def validatingDateFormat(self):
+        Written By: Shivam Shinde
 
+        Version: 1.0
+
+        Revision: None
+
+        :return: None
+
+        """
+
+        self.precheckFiles()
+        pending = [entry for entry in self.manifest if entry['hash'] is None and entry['status'] is None]
+        for entry, hash_ in zip(pending, fileContentHashes([entry['path'] for entry in pending])):
+            entry['hash'] = hash_
+
+    def skipIngestedFiles(self, ingested):
 
         """
-        Description: This method is used to validate the date format in the datetime column of the dataframe
+
+        Description: This method is used to mark the files of the manifest which were already ingested as skipped so
+        that they are neither parsed nor inserted again. A file is identified by the hash of its content, so a file
+        dropped again under another name is skipped as well, and so is a second copy of a file in the same batch.
 
         Written By: Shivam Shinde
 
@@ -388,29 +327,51 @@ class rawDataValidation:
 
         Revision: None
 
-        :return: None
+        :param ingested: Dictionary of the content hash and the ledger entry of the already staged files
+
+        :return: Number of skipped files
+
         """
 
-        f = open('TrainingLogs/DateFormatValidation.txt', 'a+')
+        f = open('TrainingLogs/rawDataValidationLogs.txt', 'a+')
+        seen = set()
+        skipped = 0
+        for entry in self.manifest:
+            if entry['status'] is not None:
+                continue
 
-        try:
-            for file in os.listdir('Training_raw_data_validated/GoodData/'):
-                csv_file = pd.read_csv('Training_raw_data_validated/GoodData/' + file)
-                csv_file_copy = csv_file.copy()
-                csv_file_copy.dropna()
-
-                try:
-                    pd.to_datetime(csv_file_copy['Date_of_Journey'], format="%d/%m/%Y", errors="raise")
-                    self.logger.log(f, f"Datetime column from the file {file} successfully validated..")
-                    f.close()
-                except Exception as e:
-                    self.logger.log(f, f"Exception occurred in the validation of date format in the file {file}. Exception: {str(e)}")
-                    shutil.move('Training_raw_data_validated/GoodData/' + file, 'Training_raw_data_validated/BadData/')
-                    self.logger.log(f, f"Moved the file {file} to the bad date folder..")
-                    f.close()
+            if entry['hash'] in ingested:
+                ledger = ingested[entry['hash']]
+                entry['status'] = 'skipped'
+                entry['reason'] = f"Already ingested as {ledger['file']} on {ledger['ingested_at']}"
+            elif entry['hash'] in seen:
+                entry['status'] = 'skipped'
+                entry['reason'] = "Same content as another file of the batch"
+            else:
+                seen.add(entry['hash'])
+                continue
 
-        except Exception as e:
-            self.logger.log(f, f"Exception occurred in the validation of date format of the datetime column in the "
-                               f"input date. Exception: {str(e)}")
-            f.close()
-            raise e
\ No newline at end of file
+            skipped += 1
+            self.logger.log(f, f"File {entry['file']} skipped. Reason: {entry['reason']}")
+
+        f.close()
+        return skipped
+
+    def goodDataFiles(self):
+
+        """
+
+        Description: This method is used to get the paths of the good files of the manifest which are left to be
+        inserted, the files staged shard by shard during their validation are already in the table.
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :return: List containing the paths of the files which passed the validation
+
+        """
+
+        return [entry['path'] for entry in self.manifest if entry['status'] == 'good' and not entry.get('staged')]
@@ -1,14 +1,38 @@
+import os
 import pathlib
-from flask import Flask, redirect, render_template, request, Response, url_for
-from datetime import datetime, timedelta
-from Predictions_using_trained_model import predictionsUsingTheTrainedModels
-from modeltraining import modelTraining
-from predictionValidationAndDBInsertion import \
-    PredictionValidationAndDBInsertion
-from trainingValidationAndDBInsertion import trainingValidationAndDBInsertion
+from flask import Flask, jsonify, redirect, render_template, request, Response, url_for
+from Prediction_Records.microBatching import microBatcher
+from Prediction_Records.recordPrediction import recordPredictor
+from job_queue.job_queue import jobQueue
+from model_methods.model_registry import modelRegistry
+from model_methods.prediction_cache import predictionCache
 
 app = Flask(__name__)
 
+# caching the predictions of the repeated queries
+cache_ttl = os.environ.get('PREDICTION_CACHE_TTL')
+prediction_cache = predictionCache(max_size=int(os.environ.get('PREDICTION_CACHE_SIZE', 100000)),
+                                   ttl=float(cache_ttl) if cache_ttl is not None else None)
+
+# loading the clustering model and the models for every cluster only once when the application starts
+model_registry = modelRegistry(cache=prediction_cache)
+try:
+    model_registry.loadModels()
+except Exception:
+    # models are not trained yet, they will be loaded after the first training
+    pass
+
+# merging the concurrent record prediction requests into a single batch
+record_predictor = recordPredictor(model_registry)
+record_batcher = microBatcher(record_predictor.predictRecords,
+                              merge_window_ms=float(os.environ.get('RECORD_BATCH_WINDOW_MS', 5)),
+                              max_batch_size=int(os.environ.get('RECORD_BATCH_MAX_SIZE', 512)))
+
+# running the training and prediction jobs in the local worker processes. The stages of a job hand their data to each
+# other in the memory, the intermediate csv files are written only when the jobs are audited.
+job_queue = jobQueue(model_registry, max_workers=int(os.environ.get('PREDICTION_JOB_WORKERS', os.cpu_count())),
+                     audit=bool(int(os.environ.get('PIPELINE_AUDIT', 0))))
+
 
 @app.route('/',methods=['GET'])
 def index():
@@ -24,12 +48,14 @@ def training():
             path = request.json['folderpath']
             path = pathlib.Path(path)
 
-            # checking if the data validation and the database insertion is successful or not.
-            # If it is successful then moving on to the clustering followed by training a model for each of the cluster
-            if trainingValidationAndDBInsertion(path).training_validation_and_db_insertion() == True:
-                m = modelTraining()
-                m.trainingModels()
-                return Response("Training successfullly completed!!")
+            # window of the staged data to train on, e.g. {"last_months": 6} or {"airline": "IndiGo"}, all of it
+            # when not given
+            window = request.json.get('window')
+
+            # queuing the validation, database insertion and training of the models for each of the cluster. The newly
+            # trained models are swapped into the model registry once the job completes.
+            job_id = job_queue.submitTraining(path, window)
+            return jsonify({'job_id': job_id, 'status': url_for('job_status', job_id=job_id)}), 202
 
     except Exception as e:
         return Response(f"Exception occurred while training models. Exception: {str(e)}")
@@ -37,44 +63,96 @@ def training():
 
 @app.route('/results')
 def results():
-    return render_template('results.html')
+    return render_template('results.html', job_id=request.args.get('job_id'))
 
 
 @app.route('/predictions', methods = ['POST'])
 def prediction():
 
     try:
-        if request.json is not None:
+        data = request.get_json(silent=True)
+        if data is not None:
 
-            path = request.json['folderpath']
+            path = data['folderpath']
             path = pathlib.Path(path)
 
-            start_time = datetime.now()
-            if PredictionValidationAndDBInsertion(path).prediction_validation_and_db_insertion() == True:
-                p = predictionsUsingTheTrainedModels(path)
-                p.predictUsingModel()
-                finish_time = datetime.now()
+            # very large files can be predicted in the streaming mode by providing the number of rows per chunk
+            chunksize = data.get('chunksize')
+            chunksize = int(chunksize) if chunksize is not None else None
 
-                time_required = finish_time - start_time
-                print(f"Time required for the predictions: {time_required}")
-
-                return Response(f"Prediction output file saved in the file folder Prediction_output_files/")
+            job_id = job_queue.submitPrediction(path, chunksize)
+            return jsonify({'job_id': job_id, 'status': url_for('job_status', job_id=job_id)}), 202
 
         elif request.form is not None:
 
             path = request.form['folderpath']
             path = pathlib.Path(path)
 
-            if PredictionValidationAndDBInsertion(path).prediction_validation_and_db_insertion() == True:
-                p = predictionsUsingTheTrainedModels(path)
-                p.predictUsingModel()
-
-                return redirect(url_for('results'))
+            job_id = job_queue.submitPrediction(path)
+            return redirect(url_for('results', job_id=job_id))
 
     except Exception as e:
         return Response(f"Exception occurred while predicting the flight fares using the saved models")
 
 
+@app.route('/predictions/batch', methods = ['POST'])
+def batch_prediction():
+
+    try:
+        data = request.json
+        path = pathlib.Path(data['folderpath'])
+
+        # number of files predicted in parallel
+        workers = data.get('workers', os.environ.get('BATCH_PREDICTION_WORKERS'))
+        workers = int(workers) if workers is not None else None
+
+        chunksize = data.get('chunksize')
+        chunksize = int(chunksize) if chunksize is not None else None
+
+        job_id = job_queue.submitBatchPrediction(path, workers, chunksize)
+        return jsonify({'job_id': job_id, 'status': url_for('job_status', job_id=job_id)}), 202
+
+    except Exception as e:
+        return Response(f"Exception occurred while queuing the batch prediction. Exception: {str(e)}")
+
+
+@app.route('/predict/cache', methods = ['GET'])
+def prediction_cache_stats():
+    return jsonify(model_registry.cacheStats())
+
+
+@app.route('/jobs/<job_id>', methods = ['GET'])
+def job_status(job_id):
+
+    job = job_queue.getJob(job_id)
+    if job is None:
+        return Response(f"Job {job_id} not found", status=404)
+    return jsonify(job)
+
+
+@app.route('/predict/records', methods = ['POST'])
+def predict_records():
+
+    try:
+        # records can be posted either as a list or as {"records": [...]}
+        records = request.json
+        if isinstance(records, dict):
+            records = records.get('records')
+
+        record_predictor.validateRecords(records)
+
+    except Exception as e:
+        return Response(f"Invalid records received for the prediction. Exception: {str(e)}", status=400)
+
+    try:
+        predictions = record_batcher.submit(records)
+        return jsonify({'Flight_Fare': predictions})
+
+    except Exception as e:
+        return Response(f"Exception occurred while predicting the flight fares for the records. Exception: {str(e)}",
+                        status=500)
+
+
 
 
 if __name__ == '__main__':
@@ -0,0 +1,147 @@
+import json
+import multiprocessing
+import os
+import pathlib
+import shutil
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from Logging.logging import Logger
+from Prediction_Workspace.predictionWorkspace import predictionWorkspace
+from Predictions_using_trained_model import predictionsUsingTheTrainedModels
+from model_methods.model_registry import modelRegistry
+from predictionValidationAndDBInsertion import PredictionValidationAndDBInsertion
+
+
+def predictSingleFile(batch_id, file_path, chunksize=None, audit=False):
+
+    """
+    Description: This function is used to validate, transform and predict a single client file in a worker process.
+    The file gets its own workspace (and hence its own database and output file) inside the folder of the batch.
+
+    Written By: Shivam Shinde
+
+    Version: 1.0
+
+    Revision: None
+
+    :param batch_id: Id of the batch to which the file belongs
+    :param file_path: Path of the client file
+    :param chunksize: Number of rows predicted at once in the streaming mode, None to predict the whole file at once
+    :param audit: Whether the intermediate csv files are written to audit the prediction of the file
+
+    :return: Dictionary containing the status of the file
+    """
+
+    file_name = os.path.basename(file_path)
+    workspace = predictionWorkspace(os.path.join(batch_id, pathlib.Path(file_name).stem))
+    status = {'file': file_name, 'status': None, 'output': None, 'error': None}
+    try:
+        # linking the file into the input folder of its workspace so that it is processed on its own
+        os.makedirs(workspace.inputPath, exist_ok=True)
+        try:
+            os.link(file_path, os.path.join(workspace.inputPath, file_name))
+        except OSError:
+            shutil.copy(file_path, workspace.inputPath)
+
+        # in the streaming mode the staged rows are read back from the database chunk by chunk by the prediction
+        path = pathlib.Path(workspace.inputPath)
+        validation = PredictionValidationAndDBInsertion(path, workspace, audit, stream=chunksize is not None)
+        validation.prediction_validation_and_db_insertion()
+
+        # a file which failed the validation has no rows in the database
+        if validation.stagedRows == 0:
+            status['status'] = 'rejected'
+        else:
+            model_registry = modelRegistry.getWorkerRegistry()
+            p = predictionsUsingTheTrainedModels(path, model_registry, workspace, validation.stagedData, audit)
+            status['output'] = p.predictUsingModel(chunksize)
+            status['status'] = 'completed'
+
+    except Exception as e:
+        status['status'] = 'failed'
+        status['error'] = str(e)
+
+    workspace.cleanUp()
+    return status
+
+
+class batchPrediction:
+
+    """
+    Description: This class is used to predict the flight fare for every file in the client folder in parallel. Every
+    file is validated, transformed and predicted independently in a pool of worker processes and gets its own output
+    file and status.
+
+    Written By: Shivam Shinde
+
+    Version: 1.0
+
+    Revision: None
+    """
+
+    def __init__(self, path, batch_id, workers=None, chunksize=None, audit=False, executor=None):
+        self.path = path
+        self.batch_id = batch_id
+        self.workers = workers
+        self.chunksize = chunksize
+        self.audit = audit
+
+        # pool of worker processes kept by the caller between the batches, a pool is created for the batch without it
+        self.executor = executor
+        self.logger = Logger()
+        self.file_object = open("PredictionLogs/batchPredictionLogs.txt", "a+")
+        self.statusFile = os.path.join(predictionWorkspace(batch_id).root, "batchStatus.json")
+
+    def predictFiles(self, progress_callback=None):
+
+        """
+        Description: This method is used to predict all the files of the client folder using a pool of worker
+        processes and to save the status of every file in the status file of the batch.
+
+        On Failure: Raises exception
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :param progress_callback: Function called with the number of finished files and the total number of files
+
+        :return: Path of the status file of the batch
+        """
+
+        try:
+            files = [os.path.join(self.path, f) for f in sorted(os.listdir(self.path))
+                     if os.path.isfile(os.path.join(self.path, f))]
+            self.logger.log(self.file_object, f"Predicting {len(files)} files of the batch {self.batch_id} using "
+                                              f"{self.workers or os.cpu_count()} worker processes")
+
+            statuses = []
+            context = multiprocessing.get_context('spawn')
+            pool = nullcontext(self.executor) if self.executor is not None else \
+                ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+            with pool as executor:
+                futures = [executor.submit(predictSingleFile, self.batch_id, f, self.chunksize, self.audit)
+                           for f in files]
+                for future in as_completed(futures):
+                    status = future.result()
+                    statuses.append(status)
+                    self.logger.log(self.file_object, f"File {status['file']} of the batch {self.batch_id} finished "
+                                                      f"with the status {status['status']}")
+                    if progress_callback is not None:
+                        progress_callback(len(statuses), len(files))
+
+            statuses.sort(key=lambda status: status['file'])
+            os.makedirs(os.path.dirname(self.statusFile), exist_ok=True)
+            with open(self.statusFile, 'w') as f:
+                json.dump(statuses, f, indent=4)
+
+            self.logger.log(self.file_object, f"Status of the batch {self.batch_id} saved at {self.statusFile}")
+            return self.statusFile
+
+        except Exception as e:
+            self.logger.log(self.file_object, f"Exception occurred while predicting the batch {self.batch_id}. "
+                                              f"Exception: {str(e)}")
+            raise e
@@ -0,0 +1,384 @@
+import argparse
+import json
+import multiprocessing
+import os
+import pathlib
+import shutil
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+
+from Logging.logging import Logger
+from Raw_Data_Validation.schemaValidator import compileSchema
+from batchPrediction import batchPrediction
+from trainingValidationAndDBInsertion import trainingValidationAndDBInsertion
+
+try:
+    from inotify_simple import INotify, flags
+except ImportError:
+    # inotify is used only to wake up as soon as a file is written, the folder is polled without it
+    INotify = None
+
+
+class folderWatcher:
+
+    """
+    Description: This class is used to watch a client drop folder and to process the data files as they land in it,
+    instead of processing the whole folder when its path is posted to the application. The folder is polled and the
+    size and modification time of every file are cached between the polls, a file is considered completely written
+    once its size and modification time stay unchanged for the settle time (or as soon as inotify reports that it was
+    closed after writing, where inotify is available). Only the completed files whose name matches the schema are
+    linked into a folder of their own and handed to the processing function, so a file is never processed twice. The
+    files of a failed arrival are tried again after a backoff which doubles with every failure, and are quarantined
+    (not tried again until they are changed) once they failed the maximum number of attempts.
+
+    Written By: Shivam Shinde
+
+    Version: 1.0
+
+    Revision: None
+    """
+
+    def __init__(self, folder, schema_path, process, kind, interval=5.0, settle_seconds=10.0, root="Watch_Arrivals",
+                 max_attempts=5, max_backoff=3600.0):
+        self.folder = folder
+        self.schema = compileSchema(schema_path)
+        self.process = process
+        self.kind = kind
+        self.interval = interval
+        self.settleSeconds = settle_seconds
+        self.arrivalsPath = os.path.join(root, kind)
+        self.stateFile = os.path.join(root, f"{kind}WatchState.json")
+        self.quarantineFile = os.path.join(root, f"{kind}WatchQuarantine.json")
+        self.maxAttempts = max_attempts
+        self.maxBackoff = max_backoff
+        self.logger = Logger()
+        self.file_object = open(f"{'TrainingLogs' if kind == 'training' else 'PredictionLogs'}/folderWatcherLogs.txt",
+                                "a+")
+
+        # size, modification time and the time since which they are unchanged for every file seen in the last poll
+        self.stats = dict()
+
+        # size and modification time of the files already processed, kept between the restarts of the watcher
+        self.processed = dict()
+        if os.path.exists(self.stateFile):
+            with open(self.stateFile, 'r') as f:
+                self.processed = json.load(f)
+
+        # number of failed attempts and the time of the next attempt of the files whose processing failed, with the
+        # size and modification time of the file which failed
+        self.failures = dict()
+
+        # size and modification time of the files which failed the maximum number of attempts, kept between the
+        # restarts of the watcher
+        self.quarantined = dict()
+        if os.path.exists(self.quarantineFile):
+            with open(self.quarantineFile, 'r') as f:
+                self.quarantined = json.load(f)
+
+        # names of the files reported as closed after writing by inotify since the last poll
+        self.closed = set()
+        self.inotify = None
+        if INotify is not None:
+            try:
+                self.inotify = INotify()
+                self.inotify.add_watch(self.folder, flags.CLOSE_WRITE | flags.MOVED_TO)
+            except OSError:
+                self.inotify = None
+
+    def completedFiles(self):
+
+        """
+        Description: This method is used to scan the folder and to find the files which are completely written and not
+        processed yet. Only the size and modification time of the files are read, their content is never opened.
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :return: Sorted list containing the names of the completed files
+        """
+
+        now = time.monotonic()
+        stats = dict()
+        completed = []
+
+        with os.scandir(self.folder) as entries:
+            for entry in entries:
+                if not entry.is_file() or not self.schema.isValidFileName(entry.name):
+                    continue
+
+                stat = entry.stat()
+                key = [stat.st_size, stat.st_mtime_ns]
+                if self.processed.get(entry.name) == key or self.quarantined.get(entry.name) == key:
+                    stats[entry.name] = key + [now]
+                    continue
+
+                # the file is settled when its size and modification time are unchanged since the previous polls
+                previous = self.stats.get(entry.name)
+                since = previous[2] if previous is not None and previous[:2] == key else now
+                stats[entry.name] = key + [since]
+
+                # a file which failed is tried again only once its backoff is over, unless it was changed since
+                failure = self.failures.get(entry.name)
+                if failure is not None and failure[0] == key and now < failure[2]:
+                    continue
+
+                if entry.name in self.closed or now - since >= self.settleSeconds:
+                    completed.append(entry.name)
+
+        # forgetting the processed, failed and quarantined files which were removed from the folder
+        self.processed = {name: key for name, key in self.processed.items() if name in stats}
+        self.failures = {name: failure for name, failure in self.failures.items() if name in stats}
+        self.quarantined = {name: key for name, key in self.quarantined.items() if name in stats}
+        self.stats = stats
+        self.closed.clear()
+        return sorted(completed)
+
+    def stageArrival(self, names):
+
+        """
+        Description: This method is used to link the completed files into a folder of their own so that only these files
+        are processed. The files are copied when they can't be linked.
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :param names: Names of the completed files
+
+        :return: Id of the arrival and the path of its folder
+        """
+
+        arrival_id = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        path = os.path.join(self.arrivalsPath, arrival_id)
+        os.makedirs(path)
+        for name in names:
+            try:
+                os.link(os.path.join(self.folder, name), os.path.join(path, name))
+            except OSError:
+                shutil.copy(os.path.join(self.folder, name), path)
+        return arrival_id, path
+
+    def pollOnce(self):
+
+        """
+        Description: This method is used to process the files completed since the previous poll. The files are recorded
+        as processed only when the processing function returns. When it fails, the files are tried again once their
+        backoff is over, or quarantined once they failed the maximum number of attempts.
+
+        On Failure: Raises exception
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :return: Id of the processed arrival or None if no file was completed
+        """
+
+        names = self.completedFiles()
+        if len(names) == 0:
+            return None
+
+        arrival_id, path = self.stageArrival(names)
+        self.logger.log(self.file_object, f"Processing the arrival {arrival_id} of {len(names)} {self.kind} files: "
+                                          f"{', '.join(names)}")
+        try:
+            self.process(arrival_id, path)
+        except Exception as e:
+            self.recordFailure(names)
+            raise e
+        finally:
+            shutil.rmtree(path, ignore_errors=True)
+
+        for name in names:
+            self.processed[name] = self.stats[name][:2]
+            self.failures.pop(name, None)
+        with open(self.stateFile, 'w') as f:
+            json.dump(self.processed, f, indent=4)
+
+        self.logger.log(self.file_object, f"Arrival {arrival_id} processed successfully")
+        return arrival_id
+
+    def recordFailure(self, names):
+
+        """
+        Description: This method is used to record a failed attempt to process the files. The next attempt of a file is
+        delayed by the poll interval doubled for every failed attempt, up to the maximum backoff. A file which failed the
+        maximum number of attempts is quarantined until it is changed or removed from the folder.
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :param names: Names of the files of the failed arrival
+
+        :return: None
+        """
+
+        now = time.monotonic()
+        quarantined = []
+        for name in names:
+            key = self.stats[name][:2]
+            failure = self.failures.get(name)
+            attempts = failure[1] + 1 if failure is not None and failure[0] == key else 1
+            if attempts >= self.maxAttempts:
+                self.failures.pop(name, None)
+                self.quarantined[name] = key
+                quarantined.append(name)
+            else:
+                self.failures[name] = [key, attempts, now + min(self.interval * 2 ** attempts, self.maxBackoff)]
+
+        if len(quarantined) > 0:
+            with open(self.quarantineFile, 'w') as f:
+                json.dump(self.quarantined, f, indent=4)
+            self.logger.log(self.file_object, f"Quarantined the {self.kind} files {', '.join(quarantined)} after "
+                                              f"{self.maxAttempts} failed attempts, they are tried again once changed")
+
+    def waitForChanges(self):
+
+        """
+        Description: This method is used to wait until the next poll. With inotify, the wait ends as soon as a file is
+        written into the folder.
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :return: None
+        """
+
+        if self.inotify is None:
+            time.sleep(self.interval)
+            return
+
+        for event in self.inotify.read(timeout=int(self.interval * 1000)):
+            self.closed.add(event.name)
+
+    def run(self, stop_event=None):
+
+        """
+        Description: This method is used to watch the folder until the stop event is set. A failed arrival is logged
+        and the watcher carries on.
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :param stop_event: Event which stops the watcher when it is set, the watcher runs forever when not provided
+
+        :return: None
+        """
+
+        stop_event = stop_event if stop_event is not None else threading.Event()
+        self.logger.log(self.file_object, f"Watching the folder {self.folder} for the {self.kind} files "
+                                          f"({'inotify' if self.inotify is not None else 'polling'})")
+        while not stop_event.is_set():
+            try:
+                self.pollOnce()
+            except Exception as e:
+                self.logger.log(self.file_object, f"Exception occurred while processing the {self.kind} files of the "
+                                                  f"folder {self.folder}. Exception: {str(e)}")
+            self.waitForChanges()
+
+
+def ingestTrainingArrival(arrival_id, path):
+
+    """
+    Description: This function is used to validate the training files of an arrival and to insert them into the
+    database. The models are trained on demand by the training route, not for every arrival.
+
+    Written By: Shivam Shinde
+
+    Version: 1.0
+
+    Revision: None
+
+    :param arrival_id: Id of the arrival
+    :param path: Path of the folder of the arrival
+
+    :return: None
+    """
+
+    # tagging the staged rows with the id of the arrival, the staged data is read by the training, not here
+    validation = trainingValidationAndDBInsertion(pathlib.Path(path), batch_id=f"watch_{arrival_id}", fetch=False)
+    validation.training_validation_and_db_insertion()
+
+
+def predictionArrivalProcessor(workers=None, chunksize=None, audit=False):
+
+    """
+    Description: This function is used to create the processing function of the prediction files. Every file of an
+    arrival is validated, staged and predicted independently by the batch prediction, using the models currently saved.
+    The worker processes are kept between the arrivals, so every worker keeps its loaded models and reloads them only
+    when a training publishes a new set. A pool broken by a dead worker is replaced at the next arrival.
+
+    Written By: Shivam Shinde
+
+    Version: 1.0
+
+    Revision: None
+
+    :param workers: Number of files predicted in parallel, None to use all the cores
+    :param chunksize: Number of rows predicted at once in the streaming mode, None to predict a whole file at once
+    :param audit: Whether the intermediate csv files are written to audit the predictions
+
+    :return: Function predicting the files of an arrival
+    """
+
+    # pool of worker processes shared by all the arrivals, created by the first arrival
+    pool = {'executor': None}
+
+    def predictArrival(arrival_id, path):
+        if pool['executor'] is None:
+            pool['executor'] = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+        try:
+            batchPrediction(path, f"watch_{arrival_id}", workers, chunksize, audit,
+                            executor=pool['executor']).predictFiles()
+        except BrokenProcessPool:
+            pool['executor'].shutdown(wait=False)
+            pool['executor'] = None
+            raise
+
+    return predictArrival
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description="Process the client files as they land in the drop folder")
+    parser.add_argument('kind', choices=['training', 'prediction'], help="Kind of the files in the drop folder")
+    parser.add_argument('--folder', default=None, help="Drop folder to watch")
+    parser.add_argument('--interval', type=float, default=5.0, help="Seconds between the polls of the folder")
+    parser.add_argument('--settle', type=float, default=10.0,
+                        help="Seconds for which a file must be unchanged to be considered completely written")
+    parser.add_argument('--max-attempts', type=int, default=5,
+                        help="Failed attempts after which the files of an arrival are quarantined until they change")
+    parser.add_argument('--workers', type=int, default=None, help="Number of prediction files predicted in parallel")
+    parser.add_argument('--chunksize', type=int, default=None, help="Number of rows predicted at once")
+    parser.add_argument('--audit', action='store_true', help="Write the intermediate csv files of the predictions")
+    args = parser.parse_args()
+
+    if args.kind == 'training':
+        watcher = folderWatcher(args.folder or "Training_Data_From_Client",
+                                "Training_Schema_json_file/schema_training.json", ingestTrainingArrival, args.kind,
+                                args.interval, args.settle, max_attempts=args.max_attempts)
+    else:
+        watcher = folderWatcher(args.folder or "Prediction_Data_From_Client",
+                                "Prediction_Schema_json_file/schema_prediction.json",
+                                predictionArrivalProcessor(args.workers, args.chunksize, args.audit), args.kind,
+                                args.interval, args.settle, max_attempts=args.max_attempts)
+    watcher.run()
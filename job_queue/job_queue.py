@@ -0,0 +1,161 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from Logging.logging import Logger
+from job_queue.job_store import jobStore
+from job_queue.job_tasks import runBatchPredictionJob, runPredictionJob, runTrainingJob
+
+
+class jobQueue:
+
+    """
+    Description: This class is used to run the training and prediction jobs out of the request thread in a pool of
+    local worker processes. Training jobs run one at a time in their own worker process so that the predictions can
+    still be served while the models are retrained.
+
+    Written By: Shivam Shinde
+
+    Version: 1.0
+
+    Revision: None
+    """
+
+    def __init__(self, model_registry, max_workers=None, audit=False):
+        self.logger = Logger()
+        self.file_object = open("PredictionLogs/jobQueueLogs.txt", "a+")
+        self.model_registry = model_registry
+
+        # writing the intermediate csv files of every job to audit it
+        self.audit = audit
+        self.store = jobStore()
+
+        # spawning fresh worker processes so that they don't inherit the threads and open files of the application
+        context = multiprocessing.get_context('spawn')
+        self.training_executor = ProcessPoolExecutor(max_workers=1, mp_context=context)
+        self.prediction_executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=context)
+
+    def submitTraining(self, folderpath, window=None):
+
+        """
+        Description: This method is used to queue a training job.
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :param folderpath: Path of the folder containing the training data files
+        :param window: Dictionary describing the window of the staged data used for the training, None for all of it
+
+        :return: Id of the queued job
+        """
+
+        job_id = self.store.createJob('training')
+        future = self.training_executor.submit(runTrainingJob, job_id, str(folderpath), self.audit, window)
+        future.add_done_callback(partial(self.jobFinished, job_id, True))
+        self.logger.log(self.file_object, f"Training job {job_id} queued for the folder {folderpath}")
+        return job_id
+
+    def submitPrediction(self, folderpath, chunksize=None):
+
+        """
+        Description: This method is used to queue a prediction job.
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :param folderpath: Path of the folder containing the prediction data files
+        :param chunksize: Number of rows predicted at once in the streaming mode, None to predict the whole data at once
+
+        :return: Id of the queued job
+        """
+
+        job_id = self.store.createJob('prediction')
+        future = self.prediction_executor.submit(runPredictionJob, job_id, str(folderpath), chunksize, self.audit)
+        future.add_done_callback(partial(self.jobFinished, job_id, False))
+        self.logger.log(self.file_object, f"Prediction job {job_id} queued for the folder {folderpath}")
+        return job_id
+
+    def submitBatchPrediction(self, folderpath, workers=None, chunksize=None):
+
+        """
+        Description: This method is used to queue a batch prediction job which predicts every file of the folder
+        independently.
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :param folderpath: Path of the folder containing the prediction data files
+        :param workers: Number of files predicted in parallel, None to use all the cores
+        :param chunksize: Number of rows predicted at once in the streaming mode, None to predict a whole file at once
+
+        :return: Id of the queued job
+        """
+
+        job_id = self.store.createJob('batch_prediction')
+        future = self.prediction_executor.submit(runBatchPredictionJob, job_id, str(folderpath), workers, chunksize,
+                                                 self.audit)
+        future.add_done_callback(partial(self.jobFinished, job_id, False))
+        self.logger.log(self.file_object, f"Batch prediction job {job_id} queued for the folder {folderpath}")
+        return job_id
+
+    def jobFinished(self, job_id, reload_models, future):
+
+        """
+        Description: This method is called when a job has finished. A job whose worker process died is marked as
+        failed and the newly trained models are swapped into the model registry after a successful training job. The
+        other processes (the worker processes and the other application processes) find the new set on the disk
+        themselves before they predict.
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :param job_id: Id of the finished job
+        :param reload_models: Whether the models should be reloaded after the job completed successfully
+        :param future: Future of the finished job
+
+        :return: None
+        """
+
+        exception = future.exception()
+        if exception is not None:
+            self.store.updateJob(job_id, status='failed', error=str(exception))
+            self.logger.log(self.file_object, f"Job {job_id} failed. Exception: {str(exception)}")
+            return
+
+        self.logger.log(self.file_object, f"Job {job_id} completed successfully")
+        if reload_models:
+            try:
+                self.model_registry.refreshModels()
+            except Exception as e:
+                self.logger.log(self.file_object, f"Exception occurred while reloading the models after the job "
+                                                  f"{job_id}. Exception: {str(e)}")
+
+    def getJob(self, job_id):
+
+        """
+        Description: This method is used to get the status of a job.
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :param job_id: Id of the job
+
+        :return: Dictionary containing the status of the job or None if the job does not exist
+        """
+
+        return self.store.getJob(job_id)
@@ -0,0 +1,146 @@
+import json
+import os
+import sqlite3
+import uuid
+from datetime import datetime
+
+
+class jobStore:
+
+    """
+    Description: This class is used to keep the status of the training and prediction jobs in a sqlite3 database so
+    that the status can be updated from the worker processes and read by the application.
+
+    Written By: Shivam Shinde
+
+    Version: 1.0
+
+    Revision: None
+    """
+
+    def __init__(self, path="Database/", databaseName="jobs"):
+        self.path = path
+        self.databaseName = databaseName
+
+    def dbConnection(self):
+
+        """
+        Description: This method is used to create a connection with the jobs database and create the jobs table if it
+        does not exist.
+
+        On Failure: Raises exception
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :return: Database connector
+        """
+
+        if not os.path.isdir(self.path):
+            os.makedirs(self.path)
+        conn = sqlite3.connect(os.path.join(self.path, self.databaseName + '.db'), timeout=30)
+        conn.execute("""CREATE TABLE IF NOT EXISTS jobs (job_id TEXT PRIMARY KEY, job_type TEXT, status TEXT,
+                        stage TEXT, progress TEXT, result TEXT, error TEXT, created_at TEXT, updated_at TEXT)""")
+        return conn
+
+    def createJob(self, job_type):
+
+        """
+        Description: This method is used to add a new queued job to the jobs table.
+
+        On Failure: Raises exception
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :param job_type: Type of the job i.e. training or prediction
+
+        :return: Id of the created job
+        """
+
+        job_id = uuid.uuid4().hex
+        now = datetime.now().isoformat()
+        conn = self.dbConnection()
+        try:
+            with conn:
+                conn.execute("INSERT INTO jobs VALUES (?, ?, 'queued', NULL, '[]', NULL, NULL, ?, ?)",
+                             (job_id, job_type, now, now))
+        finally:
+            conn.close()
+        return job_id
+
+    def updateJob(self, job_id, status=None, stage=None, result=None, error=None):
+
+        """
+        Description: This method is used to update the status of a job. Every new stage is added to the progress of
+        the job along with the time at which it started.
+
+        On Failure: Raises exception
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :param job_id: Id of the job
+        :param status: New status of the job (queued, running, completed or failed)
+        :param stage: Stage of the pipeline which the job has started
+        :param result: Location of the result of the job
+        :param error: Error message in case the job failed
+
+        :return: None
+        """
+
+        now = datetime.now().isoformat()
+        conn = self.dbConnection()
+        try:
+            with conn:
+                row = conn.execute("SELECT progress FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+                progress = json.loads(row[0]) if row is not None else []
+                if stage is not None:
+                    progress.append({'stage': stage, 'started_at': now})
+
+                conn.execute("""UPDATE jobs SET status = COALESCE(?, status), stage = COALESCE(?, stage), progress = ?,
+                                result = COALESCE(?, result), error = COALESCE(?, error), updated_at = ?
+                                WHERE job_id = ?""",
+                             (status, stage, json.dumps(progress), result, error, now, job_id))
+        finally:
+            conn.close()
+
+    def getJob(self, job_id):
+
+        """
+        Description: This method is used to get the status of a job.
+
+        On Failure: Raises exception
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :param job_id: Id of the job
+
+        :return: Dictionary containing the status of the job or None if the job does not exist
+        """
+
+        conn = self.dbConnection()
+        try:
+            conn.row_factory = sqlite3.Row
+            row = conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        finally:
+            conn.close()
+
+        if row is None:
+            return None
+        job = dict(row)
+        job['progress'] = json.loads(job['progress'])
+        return job
@@ -0,0 +1,189 @@
+import pathlib
+from datetime import datetime
+
+from Logging.logging import Logger
+from Prediction_Workspace.predictionWorkspace import predictionWorkspace
+from Predictions_using_trained_model import predictionsUsingTheTrainedModels
+from batchPrediction import batchPrediction
+from job_queue.job_store import jobStore
+from model_methods.model_registry import modelRegistry
+from modeltraining import modelTraining
+from predictionValidationAndDBInsertion import PredictionValidationAndDBInsertion
+from trainingValidationAndDBInsertion import trainingValidationAndDBInsertion
+
+
+def runTrainingJob(job_id, folderpath, audit=False, window=None):
+
+    """
+    Description: This function is used to run the training job in a worker process. It validates the training data,
+    inserts it into the database, tagging its rows with the id of the job, and trains the models for every cluster on
+    the window of the staged data.
+
+    On Failure: Raises exception
+
+    Written By: Shivam Shinde
+
+    Version: 1.0
+
+    Revision: None
+
+    :param job_id: Id of the job
+    :param folderpath: Path of the folder containing the training data files
+    :param audit: Whether the intermediate csv files are written to audit the job
+    :param window: Dictionary describing the window of the staged data used for the training, None for all of it
+
+    :return: Location of the trained models, None when no models were trained
+    """
+
+    logger = Logger()
+    file_object = open("TrainingLogs/jobLogs.txt", "a+")
+    store = jobStore()
+    try:
+        store.updateJob(job_id, status='running', stage='validation_and_db_insertion')
+        logger.log(file_object, f"Training job {job_id} started for the folder {folderpath}")
+
+        validation = trainingValidationAndDBInsertion(pathlib.Path(folderpath), audit, job_id, window)
+        validated = validation.training_validation_and_db_insertion()
+
+        # nothing to train on (e.g. none of the files passed the validation and the window of the staged data is
+        # empty), the served models are left as they are
+        if validated != True or validation.stagedData is None or len(validation.stagedData) == 0:
+            store.updateJob(job_id, status='rejected', stage='completed',
+                            result=validation.raw_data_validation.manifestFile,
+                            error="No staged training data in the window, no models were trained")
+            logger.log(file_object, f"Training job {job_id} rejected since there is no staged data to train on")
+            file_object.close()
+            return None
+
+        store.updateJob(job_id, stage='model_training')
+
+        # training on the data handed in the memory by the database stage
+        modelTraining(validation.stagedData, audit).trainingModels()
+
+        store.updateJob(job_id, status='completed', stage='completed', result='Models/')
+        logger.log(file_object, f"Training job {job_id} completed successfully")
+        file_object.close()
+        return 'Models/'
+
+    except Exception as e:
+        store.updateJob(job_id, status='failed', error=str(e))
+        logger.log(file_object, f"Exception occurred in the training job {job_id}. Exception: {str(e)}")
+        file_object.close()
+        raise e
+
+
+def runPredictionJob(job_id, folderpath, chunksize=None, audit=False):
+
+    """
+    Description: This function is used to run the prediction job in a worker process. It validates the prediction
+    data, inserts it into the database and predicts the flight fare using the trained models. Every job runs in its
+    own workspace so that several prediction jobs can run at the same time.
+
+    On Failure: Raises exception
+
+    Written By: Shivam Shinde
+
+    Version: 1.0
+
+    Revision: None
+
+    :param job_id: Id of the job
+    :param folderpath: Path of the folder containing the prediction data files
+    :param chunksize: Number of rows predicted at once in the streaming mode, None to predict the whole data at once
+    :param audit: Whether the intermediate csv files are written to audit the job
+
+    :return: Location of the prediction output file, None when none of the files passed the validation
+    """
+
+    logger = Logger()
+    file_object = open("PredictionLogs/jobLogs.txt", "a+")
+    store = jobStore()
+    workspace = predictionWorkspace(job_id)
+    try:
+        start_time = datetime.now()
+        store.updateJob(job_id, status='running', stage='validation_and_db_insertion')
+        logger.log(file_object, f"Prediction job {job_id} started for the folder {folderpath}")
+
+        # in the streaming mode the staged rows are read back from the database chunk by chunk by the prediction
+        path = pathlib.Path(folderpath)
+        validation = PredictionValidationAndDBInsertion(path, workspace, audit, stream=chunksize is not None)
+        validation.prediction_validation_and_db_insertion()
+
+        # none of the files passed the validation, the reasons are in the validation manifest of the job
+        if validation.stagedRows == 0:
+            store.updateJob(job_id, status='rejected', stage='completed', result=workspace.validationManifest,
+                            error="None of the prediction data files passed the validation")
+            logger.log(file_object, f"Prediction job {job_id} rejected since none of its files passed the validation")
+            file_object.close()
+            return None
+
+        store.updateJob(job_id, stage='prediction')
+
+        # predicting the data handed in the memory by the database stage
+        model_registry = modelRegistry.getWorkerRegistry()
+        p = predictionsUsingTheTrainedModels(path, model_registry, workspace, validation.stagedData, audit)
+        result = p.predictUsingModel(chunksize)
+
+        store.updateJob(job_id, status='completed', stage='completed', result=result)
+        logger.log(file_object, f"Prediction job {job_id} completed in {datetime.now() - start_time}")
+        file_object.close()
+        return result
+
+    except Exception as e:
+        store.updateJob(job_id, status='failed', error=str(e))
+        logger.log(file_object, f"Exception occurred in the prediction job {job_id}. Exception: {str(e)}")
+        file_object.close()
+        raise e
+
+    finally:
+        # removing the intermediate folders and the database of the job whatever its outcome, the output folder with
+        # the predictions and the validation manifest is kept on purpose
+        workspace.cleanUp()
+
+
+def runBatchPredictionJob(job_id, folderpath, workers=None, chunksize=None, audit=False):
+
+    """
+    Description: This function is used to run the batch prediction job in a worker process. Every file of the folder
+    is validated, transformed and predicted independently in a pool of worker processes.
+
+    On Failure: Raises exception
+
+    Written By: Shivam Shinde
+
+    Version: 1.0
+
+    Revision: None
+
+    :param job_id: Id of the job, also used as the id of the batch
+    :param folderpath: Path of the folder containing the prediction data files
+    :param workers: Number of files predicted in parallel, None to use all the cores
+    :param chunksize: Number of rows predicted at once in the streaming mode, None to predict a whole file at once
+    :param audit: Whether the intermediate csv files are written to audit the job
+
+    :return: Location of the status file of the batch
+    """
+
+    logger = Logger()
+    file_object = open("PredictionLogs/jobLogs.txt", "a+")
+    store = jobStore()
+    try:
+        start_time = datetime.now()
+        store.updateJob(job_id, status='running', stage='batch_prediction')
+        logger.log(file_object, f"Batch prediction job {job_id} started for the folder {folderpath}")
+
+        def progress(finished, total):
+            store.updateJob(job_id, stage=f'batch_prediction ({finished}/{total} files)')
+
+        result = batchPrediction(folderpath, job_id, workers, chunksize, audit).predictFiles(progress)
+
+        store.updateJob(job_id, status='completed', stage='completed', result=result)
+        logger.log(file_object, f"Batch prediction job {job_id} completed in {datetime.now() - start_time}")
+        file_object.close()
+        return result
+
+    except Exception as e:
+        store.updateJob(job_id, status='failed', error=str(e))
+        logger.log(file_object, f"Exception occurred in the batch prediction job {job_id}. Exception: {str(e)}")
+        file_object.close()
+        raise e
@@ -22,8 +22,13 @@ class modelMethods:
 
     """
 
+    # version of the format of the preprocessing bundle saved along with the models
+    preprocessingBundleVersion = 1
+
     def __init__(self):
         self.model_directory = "Models"
+        # directory into which the models of the training run of this process are saved before they are published
+        self.staging_directory = f"Models_staging_{os.getpid()}"
         self.logger = Logger()
         self.file_object = open("TrainingLogs/modelMethodsLogs.txt","a+")
 
@@ -36,25 +41,29 @@ class modelMethods:
 
         :param filename: Name of the model after saving
 
+        :param clusterno: Cluster number for which the model is saved
+
         :return: None
         """
 
         self.logger.log(self.file_object, "Saving the created model into the python pickle file")
         try:
+            # the models of a training run are saved into its staging directory, the served models are replaced by
+            # publishModelSet once the whole set is saved
             if filename == "KMeansCluster":
-                path = os.path.join(self.model_directory, "ClusteringModel")
+                path = os.path.join(self.staging_directory, "ClusteringModel")
+            elif filename == "PreprocessingBundle":
+                path = os.path.join(self.staging_directory, "PreprocessingBundle")
             else:
-                path = os.path.join(self.model_directory, "ModelForClusterNo"+str(clusterno))
+                path = os.path.join(self.staging_directory, "ModelForClusterNo"+str(clusterno))
 
-            # removing the previously created models
             if os.path.exists(path):
-                shutil.rmtree(self.model_directory)
-                os.makedirs(path)
-            else:
-                os.makedirs(path)
+                shutil.rmtree(path)
+            os.makedirs(path)
 
             # saving the model as a python pickle file
-            pickle.dump(model, open(os.path.join(path, f"{filename}.pkl"),"wb"))
+            with open(os.path.join(path, f"{filename}.pkl"),"wb") as f:
+                pickle.dump(model, f)
 
             self.logger.log(self.file_object, f"Model {model} saved successfully in {path}")
 
@@ -62,6 +71,102 @@ class modelMethods:
             self.logger.log(self.file_object, f"Exception occurred while saving the model {model}. Exception: {str(e)}")
             raise e
 
+    def startModelSet(self):
+
+        """
+        Description: This method is used to start a new set of models by emptying the staging directory of the process.
+        The models saved by the training run are written into it while the previously published models keep being
+        served.
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :return: None
+        """
+
+        try:
+            if os.path.isdir(self.staging_directory):
+                shutil.rmtree(self.staging_directory)
+            os.makedirs(self.staging_directory)
+            self.logger.log(self.file_object, f"Started a new set of models in {self.staging_directory}")
+
+        except Exception as e:
+            self.logger.log(self.file_object, f"Exception occurred while starting a new set of models. "
+                                              f"Exception: {str(e)}")
+            raise e
+
+    def publishModelSet(self):
+
+        """
+        Description: This method is used to publish the set of models saved in the staging directory in place of the
+        served models. The set is published only when it has the clustering model, a model for every one of its
+        clusters and the preprocessing bundle. The staging directory is renamed into the model directory (the previous
+        models being renamed out of the way just before) so that the models are never seen partially written, and the
+        previous models are removed afterwards.
+
+        On Failure: Raises exception
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :return: None
+        """
+
+        try:
+            with open(os.path.join(self.staging_directory, "ClusteringModel", "KMeansCluster.pkl"), "rb") as f:
+                kmeans = pickle.load(f)
+            saved = [directory for directory in os.listdir(self.staging_directory)
+                     if directory.startswith("ModelForClusterNo")]
+            missing = set(range(kmeans.n_clusters)) - {int(directory[len("ModelForClusterNo"):]) for directory in saved}
+            if missing:
+                raise Exception(f"Models of the clusters {sorted(missing)} are missing from the set of models")
+            if not os.path.exists(os.path.join(self.staging_directory, "PreprocessingBundle", "PreprocessingBundle.pkl")):
+                raise Exception("Preprocessing bundle is missing from the set of models")
+
+            # renaming the previous models out of the way and the new set into their place, both the directories are
+            # on the same filesystem so the renames don't copy anything
+            previous = f"{self.model_directory}_previous_{os.getpid()}"
+            if os.path.isdir(previous):
+                shutil.rmtree(previous)
+            if os.path.isdir(self.model_directory):
+                os.rename(self.model_directory, previous)
+            os.rename(self.staging_directory, self.model_directory)
+            if os.path.isdir(previous):
+                shutil.rmtree(previous)
+
+            self.logger.log(self.file_object, f"Published the set of {kmeans.n_clusters} cluster models into "
+                                              f"{self.model_directory}")
+
+        except Exception as e:
+            self.logger.log(self.file_object, f"Exception occurred while publishing the set of models. "
+                                              f"Exception: {str(e)}")
+            raise e
+
+    def discardModelSet(self):
+
+        """
+        Description: This method is used to remove the staging directory of a training run which failed, the served
+        models are left as they are.
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :return: None
+        """
+
+        if os.path.isdir(self.staging_directory):
+            shutil.rmtree(self.staging_directory, ignore_errors=True)
+            self.logger.log(self.file_object, f"Discarded the unpublished set of models in {self.staging_directory}")
+
     def loadingSavedModel(self, filename, clusterno):
 
         """
@@ -82,6 +187,8 @@ class modelMethods:
             self.logger.log(self.file_object, f"Loading the model {filename}.pkl")
             if filename == "KMeansCluster":
                 path = os.path.join(self.model_directory, "ClusteringModel")
+            elif filename == "PreprocessingBundle":
+                path = os.path.join(self.model_directory, "PreprocessingBundle")
             else:
                 path = os.path.join(self.model_directory, "ModelForClusterNo" + str(clusterno))
 
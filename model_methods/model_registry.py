@@ -0,0 +1,371 @@
+import os
+import pickle
+import threading
+import time
+import warnings
+
+import numpy as np
+
+from Logging.logging import Logger
+from model_methods.prediction_cache import predictionCache
+
+warnings.simplefilter(action='ignore', category=FutureWarning)
+
+
+class modelRegistry:
+    """
+
+    Description: This class keeps the clustering model, the model for every cluster and the fitted preprocessing
+    bundle in the memory so that the predictions can be served without loading the saved models from the disk for every request. Whenever the models
+    are reloaded (e.g. after the training), the complete set of models is swapped in one go.
+
+    Written By: Shivam Shinde
+
+    Version: 1.0
+
+    Revision: None
+
+    """
+
+    # model registry of a worker process, kept between the jobs run by the same process
+    workerRegistry = None
+
+    # number of times a set of models replaced while it was loaded is loaded again
+    loadAttempts = 5
+
+    def __init__(self, model_directory="Models", cache=None):
+        self.model_directory = model_directory
+        self.cache = cache
+        self.logger = Logger()
+        self.file_object = open("PredictionLogs/modelRegistryLogs.txt", "a+")
+        self.lock = threading.Lock()
+
+        # tuple of (clustering model, dictionary of cluster number and model, preprocessing bundle, version of the models)
+        self.models = None
+
+        # identity of the model directory whose set was loaded, the training publishes every set as a new directory so
+        # a set replaced by any process is found using a single stat of the model directory
+        self.directory = None
+        self.reloadLock = threading.Lock()
+
+    def loadModels(self):
+
+        """
+        Description: This method is used to load the clustering model and the model for every cluster from the
+        model directory and swap them in place of the models which are currently in the memory.
+
+        On Failure: Raises exception
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :return: Version of the loaded models
+        """
+
+        self.logger.log(self.file_object, "Loading the saved models into the model registry")
+        try:
+            # the training publishes a new set by renaming it into the model directory, a load which raced with it is
+            # done again so that the models of two different sets are never mixed
+            for attempt in range(self.loadAttempts):
+                try:
+                    directory = self.directoryIdentity()
+                    kmeans, cluster_models, preprocessing_bundle, version = self.readModelSet()
+                    if self.directoryIdentity() == directory:
+                        break
+                except FileNotFoundError:
+                    if attempt == self.loadAttempts - 1:
+                        raise
+                self.logger.log(self.file_object, "Set of models replaced while it was loaded, loading it again")
+                time.sleep(0.1)
+            else:
+                raise Exception("Set of models kept being replaced while it was loaded")
+
+            # swapping the complete set of models at once so that a request never sees a half loaded set
+            with self.lock:
+                self.models = (kmeans, cluster_models, preprocessing_bundle, version)
+                self.directory = directory
+
+            # predictions of the previous models are never looked up again since the version is part of the cache key
+            if self.cache is not None:
+                self.cache.clear()
+
+            self.logger.log(self.file_object, f"Loaded {len(cluster_models)} cluster models into the model registry. "
+                                              f"Model version: {version}")
+            return version
+
+        except Exception as e:
+            self.logger.log(self.file_object, f"Exception occurred while loading the models into the model registry. "
+                                              f"Exception: {str(e)}")
+            raise e
+
+    def readModelSet(self):
+
+        """
+        Description: This method is used to read the clustering model, the model of every cluster and the preprocessing
+        bundle from the model directory. A set which has no model for some of the clusters of the clustering model is
+        refused.
+
+        On Failure: Raises exception
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :return: Clustering model, dictionary containing the model for every cluster number, preprocessing bundle and
+        version of the models
+        """
+
+        kmeans_path = os.path.join(self.model_directory, "ClusteringModel", "KMeansCluster.pkl")
+        with open(kmeans_path, "rb") as f:
+            kmeans = pickle.load(f)
+        version = os.stat(kmeans_path).st_mtime_ns
+
+        # loading the model saved for every cluster
+        cluster_models = dict()
+        for directory in os.listdir(self.model_directory):
+            if not directory.startswith("ModelForClusterNo"):
+                continue
+
+            clusterno = int(directory[len("ModelForClusterNo"):])
+            path = os.path.join(self.model_directory, directory)
+            for file in os.listdir(path):
+                if file.endswith(".pkl"):
+                    model_path = os.path.join(path, file)
+                    with open(model_path, "rb") as f:
+                        cluster_models[clusterno] = pickle.load(f)
+                    version = max(version, os.stat(model_path).st_mtime_ns)
+                    self.logger.log(self.file_object, f"Model {file} loaded for the cluster number {clusterno}")
+
+        missing = set(range(kmeans.n_clusters)) - set(cluster_models)
+        if missing:
+            self.logger.log(self.file_object, f"Models of the clusters {sorted(missing)} are missing from the model "
+                                              f"directory")
+            raise Exception(f"Models of the clusters {sorted(missing)} are missing from the model directory. Train the "
+                            f"models again.")
+
+        # loading the preprocessing bundle saved by the training (models trained before it existed have none)
+        preprocessing_bundle = None
+        bundle_path = os.path.join(self.model_directory, "PreprocessingBundle", "PreprocessingBundle.pkl")
+        if os.path.exists(bundle_path):
+            with open(bundle_path, "rb") as f:
+                preprocessing_bundle = pickle.load(f)
+            version = max(version, os.stat(bundle_path).st_mtime_ns)
+        else:
+            self.logger.log(self.file_object, "Preprocessing bundle not found in the model directory")
+
+        return kmeans, cluster_models, preprocessing_bundle, version
+
+    def directoryIdentity(self):
+
+        """
+        Description: This method is used to get the identity of the model directory. A set of models is published by
+        renaming its directory into place, which gives the model directory a new inode and change time.
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :return: Tuple of the inode and the change time of the model directory, None when no models were trained yet
+        """
+
+        try:
+            stat = os.stat(self.model_directory)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_ctime_ns
+
+    def refreshModels(self):
+
+        """
+        Description: This method is used to reload the models when a new set was published into the model directory
+        since the loaded set was read, whichever process published it. A set which can't be loaded (e.g. an incomplete
+        set) is not tried again until the next set is published, the loaded models are served meanwhile.
+
+        On Failure: Raises exception
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :return: Version of the loaded models, None when no models are loaded
+        """
+
+        directory = self.directoryIdentity()
+        if directory is None or directory == self.directory:
+            return self.models[3] if self.models is not None else None
+
+        # a single thread reloads the new set while the others keep serving the loaded models
+        if not self.reloadLock.acquire(blocking=self.models is None):
+            return self.models[3]
+        try:
+            if self.directoryIdentity() != self.directory:
+                try:
+                    self.loadModels()
+                except Exception:
+                    if self.models is None:
+                        raise
+                    self.directory = directory
+            return self.models[3] if self.models is not None else None
+        finally:
+            self.reloadLock.release()
+
+    @classmethod
+    def getWorkerRegistry(cls):
+
+        """
+        Description: This method is used to get the model registry of a worker process. The registry is created by the
+        first job of the process and its models are reloaded only when a new set was published into the model directory
+        since they were loaded, so a worker never goes back to the older models of a stale requester. The rows of the
+        bulk predictions rarely repeat, so the registry of a worker has no prediction cache unless the
+        PREDICTION_JOB_CACHE environment variable is set to 1, the cache serves the record predictions of the
+        application.
+
+        On Failure: Raises exception
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :return: Model registry of the worker process
+        """
+
+        if cls.workerRegistry is None:
+            cache = predictionCache() if bool(int(os.environ.get('PREDICTION_JOB_CACHE', 0))) else None
+            cls.workerRegistry = cls(cache=cache)
+        if cls.workerRegistry.refreshModels() is None:
+            cls.workerRegistry.loadModels()
+        return cls.workerRegistry
+
+    def getModels(self):
+
+        """
+        Description: This method is used to get the models which are currently loaded in the model registry.
+
+        On Failure: Raises exception
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :return: Clustering model, dictionary containing the model for every cluster number, preprocessing bundle and
+        version of the models
+        """
+
+        models = self.models
+        if models is None:
+            self.logger.log(self.file_object, "Models requested before they were loaded into the model registry")
+            raise Exception("Models are not loaded into the model registry. Train the models first.")
+        return models
+
+    def predict(self, data, models=None):
+
+        """
+        Description: This method is used to predict the flight fare for the preprocessed data. The predictions of the
+        rows found in the prediction cache are taken from it and the remaining rows are predicted using the models.
+
+        On Failure: Raises exception
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :param data: Preprocessed dataframe
+
+        :param models: Models returned by getModels which were used to preprocess the data. The currently loaded models
+        are used when it is not provided.
+
+        :return: Array of predicted flight fares in the same order as the observations in the data
+        """
+
+        try:
+            if models is None:
+                models = self.getModels()
+
+            if self.cache is None:
+                return self.predictUsingClusters(data, models)
+
+            # looking up the predictions of the rows which were already predicted by the same models
+            keys = self.cache.rowKeys(data, models[3])
+            predictions, found = self.cache.getMany(keys)
+
+            missing = np.flatnonzero(~found)
+            if len(missing) > 0:
+                features = data.iloc[missing] if hasattr(data, 'iloc') else data[missing]
+                predictions[missing] = self.predictUsingClusters(features, models)
+                self.cache.putMany([keys[i] for i in missing], predictions[missing])
+
+            return predictions
+
+        except Exception as e:
+            self.logger.log(self.file_object, f"Exception occurred while predicting using the model registry. "
+                                              f"Exception: {str(e)}")
+            raise e
+
+    def predictUsingClusters(self, data, models):
+
+        """
+        Description: This method is used to predict the flight fare using the models. Every observation is routed to
+        its cluster using the clustering model and then scored using the model of that cluster.
+
+        On Failure: Raises exception
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :param data: Preprocessed dataframe
+
+        :param models: Models returned by getModels
+
+        :return: Array of predicted flight fares in the same order as the observations in the data
+        """
+
+        kmeans, cluster_models, preprocessing_bundle, version = models
+        clusterNumbers = kmeans.predict(data)
+
+        # grouping the rows by their cluster number in a single pass
+        order = np.argsort(clusterNumbers, kind='stable')
+        clusters, starts = np.unique(clusterNumbers[order], return_index=True)
+        ends = np.append(starts[1:], len(order))
+
+        # predicting every group using a single call and scattering the predictions back to their rows
+        predictions = np.empty(len(data), dtype=float)
+        for i, start, end in zip(clusters, starts, ends):
+            rows = order[start:end]
+            features = data.iloc[rows] if hasattr(data, 'iloc') else data[rows]
+            predictions[rows] = cluster_models[i].predict(features)
+
+        return predictions
+
+    def cacheStats(self):
+
+        """
+        Description: This method is used to get the hit and miss counters of the prediction cache.
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :return: Dictionary containing the counters of the cache or None if the registry has no cache
+        """
+
+        return self.cache.stats() if self.cache is not None else None
@@ -0,0 +1,153 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+class predictionCache:
+
+    """
+    Description: This class is a bounded and thread safe least recently used cache of the predicted flight fares. The
+    predictions are stored against the hash of the preprocessed feature row and the version of the models, so the
+    repeated queries are answered without evaluating the models again. Entries can optionally expire after a time to
+    live.
+
+    Written By: Shivam Shinde
+
+    Version: 1.0
+
+    Revision: None
+    """
+
+    def __init__(self, max_size=100000, ttl=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def rowKeys(features, version):
+
+        """
+        Description: This method is used to create the cache key of every row of the preprocessed features.
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :param features: Preprocessed features as a 2D numpy array
+        :param version: Version of the models used for the predictions
+
+        :return: List of cache keys
+        """
+
+        features = np.ascontiguousarray(features, dtype=float)
+        prefix = str(version).encode()
+        return [hashlib.blake2b(prefix + row.tobytes(), digest_size=16).digest() for row in features]
+
+    def getMany(self, keys):
+
+        """
+        Description: This method is used to look up the predictions for the given keys.
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :param keys: List of cache keys
+
+        :return: Array of cached predictions (nan for the misses) and boolean array marking the hits
+        """
+
+        values = np.full(len(keys), np.nan)
+        found = np.zeros(len(keys), dtype=bool)
+        now = time.monotonic()
+
+        with self.lock:
+            for i, key in enumerate(keys):
+                entry = self.entries.get(key)
+                if entry is None:
+                    continue
+                value, expiry = entry
+                if expiry is not None and expiry < now:
+                    del self.entries[key]
+                    continue
+                self.entries.move_to_end(key)
+                values[i] = value
+                found[i] = True
+
+            hits = int(found.sum())
+            self.hits += hits
+            self.misses += len(keys) - hits
+
+        return values, found
+
+    def putMany(self, keys, values):
+
+        """
+        Description: This method is used to add the predictions to the cache, removing the least recently used
+        entries when the cache is full.
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :param keys: List of cache keys
+        :param values: Predictions for the keys
+
+        :return: None
+        """
+
+        expiry = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self.lock:
+            for key, value in zip(keys, values):
+                self.entries[key] = (float(value), expiry)
+                self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+
+        """
+        Description: This method is used to remove all the entries from the cache.
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :return: None
+        """
+
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+
+        """
+        Description: This method is used to get the hit and miss counters of the cache.
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :return: Dictionary containing the counters of the cache
+        """
+
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self.entries), 'max_size': self.max_size,
+                    'ttl': self.ttl, 'hit_rate': self.hits / lookups if lookups else 0.0}
@@ -26,10 +26,16 @@ class modelTraining:
     :returns: None
     """
 
-    def __init__(self):
+    def __init__(self, data=None, audit=False, window=None):
         self.file_obj = open("TrainingLogs/ModelTraining.txt", "a+")
         self.logger = Logger()
 
+        # data handed in the memory by the database stage, the exported csv file (or the window of the staged data,
+        # when a window is given) is read when it is not given
+        self.data = data
+        self.audit = audit
+        self.window = window
+
     def trainingModels(self):
         """
         Description: This method is used to train the machine learning model for the every cluster of the data
@@ -42,13 +48,17 @@ class modelTraining:
         
         :return: None
         """
+        # the models are saved into a staging directory and published together once all of them are trained, so the
+        # served models are never replaced by a partial set
+        mm = modelMethods()
         try:
             self.logger.log(
                 self.file_obj, "*************MACHINE LEARNING MODEL TRAINING FOR ALL THE CLUSTERS STARTED**************")
+            mm.startModelSet()
 
             # preprocessing the obtained data
             self.logger.log(self.file_obj, "Training_Preprocessing of the data started!!")
-            p = Preprocessor()
+            p = Preprocessor(self.data, self.audit, self.window)
             X, y = p.preprocess()
             self.logger.log(self.file_obj, "Training_Preprocessing of the data completed!!")
 
@@ -86,19 +96,23 @@ class modelTraining:
                     X_train, X_test, y_train, y_test)
 
                 # saving the best model obtained
-                mm = modelMethods()
                 mm.modelSaving(bestModel, bestModelName, i)
 
                 self.logger.log(
                     self.file_obj,
                     f"Training of the machine learning model for the data cluster {i} successfully completed")
 
+            # saving the fitted preprocessing state with the models trained on the data it preprocessed
+            mm.modelSaving(p.preprocessingBundle, "PreprocessingBundle", None)
+
+            mm.publishModelSet()
             self.logger.log(self.file_obj, "***************MACHINE LEARNING MODEL TRAINING FOR ALL CLUSTERS COMPLETED "
                                            "SUCCESSFULLY*************")
 
         except Exception as e:
             self.logger.log(
                 self.file_obj, f"Exception occurred while training the machine learning model. Exception: {str(e)}")
+            mm.discardModelSet()
             raise e
 
 
@@ -0,0 +1,259 @@
+import argparse
+import json
+import os
+import pathlib
+import platform
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from Logging.logging import Logger
+from Prediction_DB_Operation.dataInsertionIntoDB_prediction import DBOperationsPrediction
+from Prediction_Preprocessing.preprocessingMethods_prediction import PreprocessingMethodsPrediction
+from Prediction_Workspace.predictionWorkspace import predictionWorkspace
+from Prediction_raw_data_validation.rawDataValidation_prediction import rawPredictionDataValidation
+from model_methods.model_registry import modelRegistry
+
+
+# values used to generate the synthetic prediction data, taken from the data received from the client
+airlines = ['Jet Airways', 'IndiGo', 'Air India', 'Multiple carriers', 'SpiceJet', 'Vistara', 'Air Asia', 'GoAir',
+            'Multiple carriers Premium economy', 'Jet Airways Business', 'Vistara Premium economy', 'Trujet']
+airlineWeights = [3849, 2053, 1751, 1196, 818, 479, 319, 194, 13, 6, 3, 1]
+
+routes = [('Delhi', 'Cochin', 'DEL ? BOM ? COK'), ('Kolkata', 'Banglore', 'CCU ? MAA ? BLR'),
+          ('Banglore', 'Delhi', 'BLR ? DEL'), ('Banglore', 'New Delhi', 'BLR ? BOM ? DEL'),
+          ('Mumbai', 'Hyderabad', 'BOM ? HYD'), ('Chennai', 'Kolkata', 'MAA ? CCU')]
+routeWeights = [4536, 2871, 1265, 932, 697, 381]
+
+totalStops = ['non-stop', '1 stop', '2 stops', '3 stops', '4 stops']
+totalStopsWeights = [3491, 5625, 1520, 45, 1]
+
+additionalInfo = ['No info', 'In-flight meal not included', 'No check-in baggage included', '1 Long layover',
+                  'Change airports', 'Business class', 'No Info', '1 Short layover', 'Red-eye flight',
+                  '2 Long layover']
+additionalInfoWeights = [8344, 1982, 320, 19, 7, 4, 3, 1, 1, 1]
+
+
+def generateSyntheticPredictionData(rows, column_names, seed=0):
+
+    """
+    Description: This function is used to generate synthetic prediction data having the columns of the prediction
+    schema and values distributed like the data received from the client.
+
+    Written By: Shivam Shinde
+
+    Version: 1.0
+
+    Revision: None
+
+    :param rows: Number of rows to generate
+    :param column_names: Names of the columns from the prediction schema
+    :param seed: Seed of the random number generator
+
+    :return: Dataframe containing the synthetic prediction data
+    """
+
+    rng = np.random.default_rng(seed)
+
+    def choice(values, weights):
+        weights = np.asarray(weights, dtype=float)
+        return np.asarray(values, dtype=object)[rng.choice(len(values), size=rows, p=weights / weights.sum())]
+
+    route = rng.choice(len(routes), size=rows, p=np.asarray(routeWeights) / sum(routeWeights))
+    day = pd.Series(rng.integers(1, 29, size=rows)).astype(str)
+    month = pd.Series(rng.integers(3, 7, size=rows)).map('{:02d}'.format)
+    duration = rng.integers(75, 1800, size=rows)
+    departure = rng.integers(0, 24 * 60, size=rows)
+    arrival = (departure + duration) % (24 * 60)
+
+    hours, minutes = pd.Series(duration // 60).astype(str), pd.Series(duration % 60).astype(str)
+    durationText = (hours + 'h ' + minutes + 'm').where(duration % 60 != 0, hours + 'h')
+
+    data = pd.DataFrame({
+        'Airline': choice(airlines, airlineWeights),
+        'Date_of_Journey': day + '/' + month + '/2019',
+        'Source': np.asarray([r[0] for r in routes], dtype=object)[route],
+        'Destination': np.asarray([r[1] for r in routes], dtype=object)[route],
+        'Route': np.asarray([r[2] for r in routes], dtype=object)[route],
+        'Dep_Time': pd.Series(departure // 60).map('{:02d}'.format) + ':' + pd.Series(departure % 60).map('{:02d}'.format),
+        'Arrival_Time': pd.Series(arrival // 60).map('{:02d}'.format) + ':' + pd.Series(arrival % 60).map('{:02d}'.format),
+        'Duration': durationText,
+        'Total_Stops': choice(totalStops, totalStopsWeights),
+        'Additional_Info': choice(additionalInfo, additionalInfoWeights),
+    })
+
+    return data[list(column_names)]
+
+
+class predictionBenchmark:
+
+    """
+    Description: This class is used to measure the time taken by every stage of the prediction path on synthetic data
+    of a given size. Every stage is called on its own, in the same order as the prediction pipeline, inside a separate
+    workspace so that the default prediction folders and database are never touched.
+
+    Written By: Shivam Shinde
+
+    Version: 1.0
+
+    Revision: None
+    """
+
+    def __init__(self, rows, run_id=None, seed=0):
+        self.rows = rows
+        self.seed = seed
+        self.run_id = run_id if run_id is not None else f"benchmark_{rows}_{datetime.now().strftime('%Y%m%d%H%M%S')}"
+        self.workspace = predictionWorkspace(self.run_id)
+        self.logger = Logger()
+        self.file_object = open("PredictionLogs/benchmarkLogs.txt", "a+")
+        self.timings = dict()
+
+    @contextmanager
+    def stage(self, name):
+
+        """
+        Description: This method is used to record the wall-clock time taken by the code run inside it under the
+        given stage name.
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :param name: Name of the stage
+        """
+
+        start = time.perf_counter()
+        yield
+        self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - start
+
+    def runBenchmark(self, model_registry):
+
+        """
+        Description: This method is used to run every stage of the prediction path on the synthetic data and to record
+        the time taken by it.
+
+        On Failure: Raises exception
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :param model_registry: Model registry having the models loaded
+
+        :return: Dictionary containing the number of rows and the time taken by every stage in seconds
+        """
+
+        try:
+            self.logger.log(self.file_object, f"Benchmark {self.run_id} started for {self.rows} rows")
+            path = pathlib.Path(self.workspace.inputPath)
+            validation = rawPredictionDataValidation(path, self.workspace)
+            LengthOfDateStampInFile, LengthOfTimeStampInFile, NumberOfColumns, ColumnNames = validation.valuesFromSchema()
+
+            # writing the synthetic data into the input folder of the workspace
+            with self.stage('synthetic_data_generation'):
+                os.makedirs(self.workspace.inputPath, exist_ok=True)
+                file_name = f"flight_fare_{'1' * LengthOfDateStampInFile}_{'1' * LengthOfTimeStampInFile}.csv"
+                generateSyntheticPredictionData(self.rows, ColumnNames.keys(), self.seed).to_csv(
+                    os.path.join(self.workspace.inputPath, file_name), index=False)
+
+            with self.stage('file_name_validation'):
+                validation.validateTrainingDataFileName(validation.manualRegexCreation())
+
+            # column count, missing column and date format checks and header normalization are done in a single
+            # parse of the file, in place, and the parsed dataframe is kept for the insertion
+            with self.stage('single_pass_validation'):
+                validation.validateGoodDataFiles(keep_data=True)
+
+            # the dataframes parsed by the validation are inserted without reading the files again
+            with DBOperationsPrediction(self.workspace) as db_operations:
+                with self.stage('sqlite_insert'):
+                    db_operations.createTableIntoDb(ColumnNames)
+                    db_operations.insertGoodDataIntoTable(validation.goodDataFiles(), validation.goodData)
+
+                # the data of the table is handed to the preprocessing in the memory, no csv file is written
+                with self.stage('db_fetch'):
+                    staged_data = db_operations.getDataFromDbTable()
+
+            # running the preprocessing steps one by one in the same order as PreprocessorPrediction, the staged data
+            # has the columns derived at the insertion
+            kmeans, cluster_models, preprocessing_bundle, version = model_registry.getModels()
+            with self.stage('preprocessing_load_data'):
+                process_data = PreprocessingMethodsPrediction(staged_data, preprocessing_bundle, self.workspace)
+
+            steps = [
+                ('preprocessing_remove_unnecessary_columns', lambda: [process_data.removeUnnecessaryFeatureColumn(c)
+                                                              for c in ['Route', 'Dep_Time', 'Arrival_Time']]),
+                ('preprocessing_derived_columns', process_data.usingDerivedColumns),
+                ('preprocessing_additional_info_typos', process_data.correctingTyposInAdditionalInfoColumn),
+                ('preprocessing_outliers_with_nan', process_data.replacingOutliersWithNan),
+                ('preprocessing_zero_variance_columns', process_data.removingColumnsWithZeroVariance),
+                ('preprocessing_year_of_journey', process_data.removingYearOfJourneyColumn),
+                ('preprocessing_transform_pipeline', process_data.transformPipeline),
+            ]
+            for name, step in steps:
+                with self.stage(name):
+                    step()
+
+            data = process_data.df
+
+            with self.stage('kmeans_routing'):
+                clusterNumbers = kmeans.predict(data)
+
+            # predicting every cluster on its own so that a slow cluster model can be spotted
+            order = np.argsort(clusterNumbers, kind='stable')
+            clusters, starts = np.unique(clusterNumbers[order], return_index=True)
+            ends = np.append(starts[1:], len(order))
+            clusterTimings = dict()
+            for i, start, end in zip(clusters, starts, ends):
+                features = data.iloc[order[start:end]]
+                with self.stage('cluster_predict'):
+                    begin = time.perf_counter()
+                    cluster_models[i].predict(features)
+                    clusterTimings[str(i)] = {'rows': int(end - start), 'seconds': time.perf_counter() - begin}
+
+            self.logger.log(self.file_object, f"Benchmark {self.run_id} finished for {self.rows} rows")
+            return {'rows': self.rows,
+                    'run_id': self.run_id,
+                    'model_version': version,
+                    'stages': self.timings,
+                    'clusters': clusterTimings,
+                    'total_seconds': sum(seconds for name, seconds in self.timings.items()
+                                         if name != 'synthetic_data_generation')}
+
+        except Exception as e:
+            self.logger.log(self.file_object, f"Exception occurred while running the benchmark {self.run_id}. "
+                                              f"Exception: {str(e)}")
+            raise e
+
+        finally:
+            self.workspace.cleanUp()
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description="Time every stage of the prediction path on synthetic data")
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000, 1000000],
+                        help="Sizes of the synthetic data to benchmark")
+    parser.add_argument('--seed', type=int, default=0, help="Seed used to generate the synthetic data")
+    parser.add_argument('--output', default=None, help="File in which the results are saved as json")
+    args = parser.parse_args()
+
+    model_registry = modelRegistry()
+    model_registry.loadModels()
+
+    results = {'created_at': datetime.now().isoformat(),
+               'python': platform.python_version(),
+               'pandas': pd.__version__,
+               'runs': [predictionBenchmark(rows, seed=args.seed).runBenchmark(model_registry) for rows in args.rows]}
+
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=4)
+    print(json.dumps(results, indent=4))
@@ -1,6 +1,5 @@
 from Logging.logging import Logger
 from Prediction_DB_Operation.dataInsertionIntoDB_prediction import DBOperationsPrediction
-from Prediction_Raw_Data_Transformation.RawDataTransformation_prediction import RawPredictionDataTransformation
 from Prediction_raw_data_validation.rawDataValidation_prediction import rawPredictionDataValidation
 
 
@@ -18,10 +17,17 @@ class PredictionValidationAndDBInsertion:
 
     """
 
-    def __init__(self,path):
-        self.raw_data_validation = rawPredictionDataValidation(path)
-        self.raw_data_transformation = RawPredictionDataTransformation()
-        self.raw_data_db_insertion = DBOperationsPrediction()
+    def __init__(self,path,workspace=None,audit=False,stream=False):
+        self.raw_data_validation = rawPredictionDataValidation(path, workspace)
+        self.raw_data_db_insertion = DBOperationsPrediction(workspace)
+        self.audit = audit
+
+        # whether the staged data is streamed from the database by the prediction instead of being handed in the memory
+        self.stream = stream
+
+        # data of the table handed to the preprocessing in the memory and the number of rows staged in the table
+        self.stagedData = None
+        self.stagedRows = 0
         self.file_object = open('PredictionLogs/trainingValidationAndDBInsertion.txt', 'a+')
         self.logger = Logger()
 
@@ -31,7 +37,10 @@ class PredictionValidationAndDBInsertion:
         """
 
         Description: This method is used to validate the training data provided by the client and its insertion into
-        the database after its validation.
+        the database after its validation. The data of the table is kept in stagedData so that the next stage reads it
+        from the memory, the csv file is exported only when the run is audited. When the data is streamed, the parsed
+        files are not kept, the good files are inserted chunk by chunk and nothing is read back, the prediction reads
+        the table in chunks itself.
 
         Written By: Shivam Shinde
 
@@ -51,50 +60,43 @@ class PredictionValidationAndDBInsertion:
             ## getting regular expression pattern to match with the data file name
             reg_exp = self.raw_data_validation.manualRegexCreation()
 
-            ## validating the data file name
+            ## validating the data file name and adding every file to the manifest (the files are never copied)
             self.raw_data_validation.validateTrainingDataFileName(reg_exp)
 
-            ## validating the number of columns
-            self.raw_data_validation.validateNumberOfColumns(10)
-
-            ## checking if there is any column with all of its values are missing i.e. nan
-            self.raw_data_validation.validateMissingValuesInWholeColumn()
-
-            ## checking the format of the dates in  the Date_of_Journey column of the dataframe
-            self.raw_data_validation.validatingDateFormat()
-
-            self.logger.log(self.file_object, "Validation of the raw prediction data completed!!")
-
-            self.logger.log(self.file_object, "Performing data transformation on  the data before inserting it into the database so that there won't be any exception..")
-
-            self.logger.log(self.file_object, "Adding the quotes to the data values in the columns with the string datatype...")
-            self.raw_data_transformation.addingQuotesToStringColumns()
-
-            self.logger.log(self.file_object,"Removing the hyphen from the column names (headers) of the data...")
-            self.raw_data_transformation.removeHyphenFromColumnName()
-
-
+            ## creating the table before the validation, the large files are staged shard by shard as they are validated
             self.logger.log(self.file_object, "Starting the database operations...")
             self.logger.log(self.file_object, "Creating a table into the database...")
             self.raw_data_db_insertion.createTableIntoDb(ColumnNames)
             self.logger.log(self.file_object, "Created table into the database...")
 
+            ## validating the number of columns, the columns with all the missing values and the date format of every
+            ## file in place, parsing every file only once
+            verdicts = self.raw_data_validation.validateGoodDataFiles(keep_data=not self.stream,
+                                                                      stage=self.stageShards)
+
+            self.logger.log(self.file_object, f"Validation of the raw prediction data completed!! Good files: "
+                                              f"{sum(v['status'] == 'good' for v in verdicts)} out of {len(verdicts)}")
+
             self.logger.log(self.file_object, "Inserting the data into created table...")
-            self.raw_data_db_insertion.insertGoodDataIntoTable()
+            self.stagedRows += self.raw_data_db_insertion.insertGoodDataIntoTable(
+                self.raw_data_validation.goodDataFiles(), self.raw_data_validation.goodData)
             self.logger.log(self.file_object, "Data insertion into the table completed successfully...")
 
-            self.logger.log(self.file_object,
-                            "Removing good data folder as good data insertion into the database is completed...")
-            self.raw_data_validation.deleteExistingGoodRawTrainingDataFolder()
-            self.logger.log(self.file_object, "Good data folder removed successfully...")
+            ## releasing the dataframes parsed by the validation once they are inserted
+            self.raw_data_validation.goodData = dict()
 
-            self.logger.log(self.file_object, "Moving the bad data folder to the archived bad data folder...")
+            self.logger.log(self.file_object, "Archiving the bad data files into the archived bad data folder...")
             self.raw_data_validation.moveBadDataFilesToArchievedBad()
-            self.logger.log(self.file_object,
-                            "Bad data moved to archived data folder successfully and also deleted bad data folder...")
+            self.logger.log(self.file_object, "Bad data files archived successfully...")
 
-            self.logger.log(self.file_object, "Getting the raw data from the database as a csv file...")
-            self.raw_data_db_insertion.getDataFromDbTableIntoCSV()
+            if not self.stream:
+                self.logger.log(self.file_object, "Getting the raw data from the database into the memory...")
+                self.stagedData = self.raw_data_db_insertion.getDataFromDbTable(snapshot=self.audit)
+
+            ## exporting the data as a columnar snapshot and a csv file only to audit the run
+            if self.audit:
+                self.logger.log(self.file_object, "Getting the raw data from the database as a csv file...")
+                self.raw_data_db_insertion.getDataFromDbTableIntoCSV()
 
             ## closing the file object
             self.file_object.close()
@@ -107,3 +109,31 @@ class PredictionValidationAndDBInsertion:
             self.file_object.close()
             raise e
 
+        finally:
+            ## closing the connections of the run with the database
+            self.raw_data_db_insertion.close()
+
+    def stageShards(self, file, chunks):
+
+        """
+
+        Description: This method is used to stage the rows of a large file shard by shard as its shards are validated,
+        in a single transaction which is rolled back when one of the shards is rejected.
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :param file: Path of the file
+
+        :param chunks: Generator of the rows of the shards of the file with their derived columns
+
+        :return: Number of rows inserted
+
+        """
+
+        rows = self.raw_data_db_insertion.stageFile(file, chunks)
+        self.stagedRows += rows
+        return rows
@@ -1,6 +1,7 @@
+from datetime import datetime
+
 from Logging.logging import Logger
 from Training_DB_Operations.dataInsertionIntoDB import DBOperations
-from Training_Raw_Data_Transformation.RawDataTransformation import RawTrainingDataTransformation
 from Training_raw_data_validation.rawDataValidation import rawDataValidation
 
 
@@ -18,10 +19,21 @@ class trainingValidationAndDBInsertion:
 
     """
 
-    def __init__(self,path):
-        self.raw_data_validation = rawDataValidation(path)
-        self.raw_data_transformation = RawTrainingDataTransformation()
+    def __init__(self,path,audit=False,batch_id=None,window=None,fetch=True):
+        # id tagging the rows inserted by this run and its validation manifest, shared by the files staged during the
+        # validation and the files inserted after it, and the window of the staged data handed to the training
+        self.batchId = batch_id if batch_id is not None else datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        self.window = window
+
+        self.raw_data_validation = rawDataValidation(path, self.batchId)
         self.raw_data_db_insertion = DBOperations()
+        self.audit = audit
+
+        # whether the staged data is read back for the next stage, the callers which only stage the files don't need it
+        self.fetch = fetch
+
+        # data of the table handed to the preprocessing in the memory
+        self.stagedData = None
         self.file_object = open('TrainingLogs/trainingValidationAndDBInsertion.txt', 'a+')
         self.logger = Logger()
 
@@ -30,7 +42,9 @@ class trainingValidationAndDBInsertion:
         """
 
         Description: This method is used to validate the training data provided by the client and its insertion into
-        the database after its validation.
+        the database after its validation. The data of the table (only the rows of the window, when a window is given)
+        is kept in stagedData so that the next stage reads it from the memory, the csv file is exported only when the
+        run is audited. Nothing is read back when the run only stages the files.
 
         Written By: Shivam Shinde
 
@@ -50,51 +64,56 @@ class trainingValidationAndDBInsertion:
             ## getting regular expression pattern to match with the data file name
             reg_exp = self.raw_data_validation.manualRegexCreation()
 
-            ## validating the data file name
+            ## validating the data file name and adding every file to the manifest (the files are never copied)
             self.raw_data_validation.validateTrainingDataFileName(reg_exp)
 
-            ## validating the number of columns
-            self.raw_data_validation.validateNumberOfColumns(11)
-
-            ## checking if there is any column with all of its values are missing i.e. nan
-            self.raw_data_validation.validateMissingValuesInWholeColumn()
-
-            ## checking the format of the dates in  the Date_of_Journey column of the dataframe
-            self.raw_data_validation.validatingDateFormat()
-
-            self.logger.log(self.file_object, "Validation of the raw training data completed!!")
-
-            self.logger.log(self.file_object,
-                            "Performing data transformation on  the data before inserting it into the database so that there won't be any exception..")
-
-            self.logger.log(self.file_object,
-                            "Adding the quotes to the data values in the columns with the string datatype...")
-            self.raw_data_transformation.addingQuotesToStringColumns()
-
-            self.logger.log(self.file_object, "Removing the hyphen from the column names (headers) of the data...")
-            self.raw_data_transformation.removeHyphenFromColumnName()
+            ## skipping the files whose content was already ingested, looked up by their content hash in the ledger. The
+            ## header and a sample of every file are checked before the file is hashed.
+            self.raw_data_validation.hashFiles()
+            ingested = self.raw_data_db_insertion.getIngestedFiles(
+                [entry['hash'] for entry in self.raw_data_validation.manifest if entry['hash'] is not None])
+            skipped = self.raw_data_validation.skipIngestedFiles(ingested)
+            self.logger.log(self.file_object, f"{skipped} files skipped as they were already ingested")
 
+            ## creating the table before the validation, the large files are staged shard by shard as they are validated
             self.logger.log(self.file_object, "Starting the database operations...")
             self.logger.log(self.file_object, "Creating a table into the database...")
             self.raw_data_db_insertion.createTableIntoDb(ColumnNames)
             self.logger.log(self.file_object, "Created table into the database...")
 
+            ## validating the number of columns, the columns with all the missing values and the date format of every
+            ## file in place, parsing every file only once
+            verdicts = self.raw_data_validation.validateGoodDataFiles(keep_data=True, stage=self.stageShards)
+
+            self.logger.log(self.file_object, f"Validation of the raw training data completed!! Good files: "
+                                              f"{sum(v['status'] == 'good' for v in verdicts)} out of {len(verdicts)}")
+
             self.logger.log(self.file_object, "Inserting the data into created table...")
-            self.raw_data_db_insertion.insertGoodDataIntoTable()
+            self.raw_data_db_insertion.insertGoodDataIntoTable(self.raw_data_validation.goodDataFiles(),
+                                                               self.raw_data_validation.goodData,
+                                                               batch_id=self.batchId,
+                                                               manifest=self.raw_data_validation.manifest)
             self.logger.log(self.file_object, "Data insertion into the table completed successfully...")
 
-            self.logger.log(self.file_object,
-                            "Removing good data folder as good data insertion into the database is completed...")
-            self.raw_data_validation.deleteExistingGoodRawTrainingDataFolder()
-            self.logger.log(self.file_object, "Good data folder removed successfully...")
+            ## releasing the dataframes parsed by the validation once they are inserted
+            self.raw_data_validation.goodData = dict()
+
+            ## recording the bad files in the ingestion ledger, the good files were recorded along with their rows
+            self.raw_data_db_insertion.recordIngestion(self.raw_data_validation.manifest)
 
-            self.logger.log(self.file_object, "Moving the bad data folder to the archived bad data folder...")
+            self.logger.log(self.file_object, "Archiving the bad data files into the archived bad data folder...")
             self.raw_data_validation.moveBadDataFilesToArchievedBad()
-            self.logger.log(self.file_object,
-                            "Bad data moved to archived data folder successfully and also deleted bad data folder...")
+            self.logger.log(self.file_object, "Bad data files archived successfully...")
+
+            if self.fetch:
+                self.logger.log(self.file_object, "Getting the raw data from the database into the memory...")
+                self.stagedData = self.raw_data_db_insertion.getDataFromDbTable(snapshot=self.audit,
+                                                                                window=self.window)
 
-            self.logger.log(self.file_object, "Getting the raw data from the database as a csv file...")
-            self.raw_data_db_insertion.getDataFromDbTableIntoCSV()
+            ## exporting the data as a columnar snapshot and a csv file only to audit the run
+            if self.fetch and self.audit:
+                self.logger.log(self.file_object, "Getting the raw data from the database as a csv file...")
+                self.raw_data_db_insertion.getDataFromDbTableIntoCSV(window=self.window)
 
             ## closing the file object
             self.file_object.close()
@@ -108,4 +127,30 @@ class trainingValidationAndDBInsertion:
             self.file_object.close()
             raise e
 
+        finally:
+            ## closing the connections of the run with the database
+            self.raw_data_db_insertion.close()
+
+    def stageShards(self, file, chunks):
+
+        """
+
+        Description: This method is used to stage the rows of a large file shard by shard as its shards are validated.
+        The rows are inserted in a single transaction along with the entry of the file in the ingestion ledger, which
+        is rolled back when one of the shards is rejected.
+
+        Written By: Shivam Shinde
+
+        Version: 1.0
+
+        Revision: None
+
+        :param file: Path of the file
+        :param chunks: Generator of the rows of the shards of the file with their derived columns
+
+        :return: Number of rows inserted
+
+        """
 
+        entry = next(entry for entry in self.raw_data_validation.manifest if entry['path'] == file)
+        return self.raw_data_db_insertion.stageFile(file, chunks, self.batchId, entry=entry)